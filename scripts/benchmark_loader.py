@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+数据加载基准测试
+按 问题类型 / 规模目录（tiny ~ xlarge）/ 压缩格式 分组，每组选取代表性文件，
+分别测量各加载方式的冷启动耗时、热缓存耗时、旁路缓存耗时、吞吐量（MB/s、边/秒）和峰值RSS，
+结果输出为JSON，并可与保存的基线比较，超过阈值的退化以非零退出码报告。
+
+每次测量都在新的子进程中进行，峰值RSS互不影响；冷启动前用 posix_fadvise 把源文件
+移出系统页缓存（仅对未修改的页有效，不需要root权限）。
+
+Git LFS 对象尚未下载（文件仍是指针）或文件超过大小上限的组，使用按固定随机种子生成的
+合成数据代替，因此不同机器、未执行 git lfs pull 的检出之间结果仍然可比。
+
+用法示例:
+    python3 scripts/benchmark_loader.py processed/ --output bench.json
+    python3 scripts/benchmark_loader.py processed/ --baseline bench.json --threshold 0.2
+    python3 scripts/benchmark_loader.py --synthetic-only --tiers tiny small medium
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import gzip
+import lzma
+import tarfile
+import tempfile
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import multiprocessing as mp
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .unified_loader import (LoadStats, find_data_files, uncompressed_size, probe_header,
+                                 is_parts_dir, part_files, load_instance, load_graph_txt,
+                                 iter_edges, configure_cache, SIZE_TIERS, PARTS_SUFFIX,
+                                 BINARY_SUFFIX, is_lfs_pointer, is_tar_xz)
+    from .binary_corpus import convert_file
+except ImportError:
+    from unified_loader import (LoadStats, find_data_files, uncompressed_size, probe_header,
+                                is_parts_dir, part_files, load_instance, load_graph_txt,
+                                iter_edges, configure_cache, SIZE_TIERS, PARTS_SUFFIX,
+                                BINARY_SUFFIX, is_lfs_pointer, is_tar_xz)
+    from binary_corpus import convert_file
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_VERSION = 1
+CODECS = ("xz-tar", "xz", "gzip", "xz-parts", "none", "binary")
+LOADERS = ("instance", "python", "stream")
+GRAPH_PROBLEMS = ("graph_partitioning", "graph_coloring")
+
+# 合成数据的规模：图为边数，数值划分为数字个数
+SYNTHETIC_EDGES = {"tiny": 2_000, "small": 20_000, "medium": 200_000,
+                   "large": 1_000_000, "xlarge": 4_000_000}
+SYNTHETIC_VALUES = {"tiny": 100, "small": 1_000, "medium": 10_000,
+                    "large": 100_000, "xlarge": 1_000_000}
+FIXTURE_VERSION = 1
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.expanduser("~"), ".cache", "co-benchmark",
+                                    f"bench-fixtures-v{FIXTURE_VERSION}")
+_SYNTHETIC_PARTS = 4
+
+# 越大越差的指标，参与基线比较
+_COMPARED_METRICS = ("cold_s", "warm_s", "cached_s", "peak_rss_mb")
+
+
+@dataclass
+class BenchTarget:
+    """一个待测文件"""
+    path: str
+    problem: str
+    tier: str
+    codec: str
+    name: str
+    synthetic: bool = False
+    compressed_bytes: int = 0
+    uncompressed_bytes: int = 0
+
+
+@dataclass
+class BenchResult:
+    """一个文件在一种加载方式下的测量结果"""
+    key: str
+    problem: str
+    tier: str
+    codec: str
+    loader: str
+    name: str
+    path: str
+    synthetic: bool
+    compressed_bytes: int
+    uncompressed_bytes: int
+    items: int = 0
+    item_unit: str = "edges"
+    cold_s: Optional[float] = None
+    warm_s: Optional[float] = None
+    warm_min_s: Optional[float] = None
+    cached_s: Optional[float] = None
+    mb_per_s: Optional[float] = None
+    items_per_s: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    rss_delta_mb: Optional[float] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: str = ""
+
+
+def _is_graph(problem: str) -> bool:
+    return problem in GRAPH_PROBLEMS
+
+
+def codec_of(path: str) -> str:
+    """压缩格式标签：xz 文件区分是否为tar封装"""
+    if is_parts_dir(path):
+        return "xz-parts"
+    if path.endswith(BINARY_SUFFIX):
+        return "binary"
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".xz"):
+        return "xz-tar" if is_tar_xz(path) else "xz"
+    return "none"
+
+
+def _tier_of(path: str) -> Optional[str]:
+    for part in reversed(os.path.normpath(path).split(os.sep)):
+        if part in SIZE_TIERS:
+            return part
+    return None
+
+
+def _problem_of(path: str) -> Optional[str]:
+    for part in os.path.normpath(path).split(os.sep):
+        if part.endswith("_partitioning") or part.endswith("_coloring"):
+            return part
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 选择测试文件
+# ---------------------------------------------------------------------------
+
+def discover_targets(root: str, tiers: List[str], codecs: List[str], per_group: int = 1,
+                     max_mb: float = 1024, fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+                     synthetic_only: bool = False) -> List[BenchTarget]:
+    """
+    为每个 (问题类型, 规模, 压缩格式) 组选取代表性文件
+
+    每组按压缩大小排序后取 per_group 个等间隔分位的文件（per_group=1 时取中位数）。
+    组内没有可用的真实文件（全是LFS指针或都超过 max_mb）时生成合成数据代替。
+    synthetic_only=True 时不扫描数据目录，对图划分、图着色和数值划分的所有 规模×格式 组合生成合成数据。
+    """
+    groups: Dict[Tuple[str, str, str], List[BenchTarget]] = {}
+    if synthetic_only:
+        for problem in GRAPH_PROBLEMS + ("number_partitioning",):
+            for tier in tiers:
+                for codec in codecs:
+                    groups[(problem, tier, codec)] = []
+    else:
+        for path in find_data_files(root):
+            tier, problem = _tier_of(path), _problem_of(path)
+            if tier not in tiers or problem is None:
+                continue
+            if is_lfs_pointer(path):
+                # 指针文件无法判断是否为tar封装，按数据集中xz文件的惯例记为 xz-tar
+                codec = "gzip" if path.endswith(".gz") else "xz-tar"
+                groups.setdefault((problem, tier, codec), [])
+                continue
+            codec = codec_of(path)
+            if codec not in codecs:
+                continue
+            group = groups.setdefault((problem, tier, codec), [])
+            try:
+                size = uncompressed_size(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"跳过无法读取大小的文件 {path}: {e}")
+                continue
+            if size > max_mb * 2**20:
+                continue
+            info = probe_header(path)
+            group.append(BenchTarget(
+                path=path, problem=problem, tier=tier, codec=codec,
+                name=info.name or os.path.basename(path),
+                compressed_bytes=_compressed_size(path), uncompressed_bytes=size))
+
+    targets = []
+    for (problem, tier, codec), group in sorted(groups.items()):
+        if codec not in codecs:
+            continue
+        if not group:
+            targets.append(make_fixture(fixtures_dir, problem, tier, codec))
+            continue
+        group.sort(key=lambda t: (t.compressed_bytes, t.path))
+        count = min(per_group, len(group))
+        picks = sorted({round((i + 0.5) * len(group) / count - 0.5) for i in range(count)})
+        targets.extend(group[i] for i in picks)
+    return targets
+
+
+def _compressed_size(path: str) -> int:
+    if is_parts_dir(path):
+        return sum(os.path.getsize(p) for p in part_files(path))
+    return os.path.getsize(path)
+
+
+# ---------------------------------------------------------------------------
+# 合成数据
+# ---------------------------------------------------------------------------
+
+def _synthetic_text(problem: str, tier: str, name: str) -> bytes:
+    """按固定随机种子生成与数据集格式一致的文本"""
+    seed = sum(map(ord, f"{problem}/{tier}")) + FIXTURE_VERSION
+    rng = np.random.default_rng(seed)
+    if _is_graph(problem):
+        m = SYNTHETIC_EDGES[tier]
+        n = max(10, m // 5)
+        u = rng.integers(1, n + 1, m)
+        v = rng.integers(1, n + 1, m)
+        # 约1%的重复边，使去重阶段也有实际工作量
+        dup = rng.random(m) < 0.01
+        v[dup] = np.roll(v, 1)[dup]
+        u[dup] = np.roll(u, 1)[dup]
+        # 与数据集一致：图着色实例不给定颜色数（k 为0）
+        k = 0 if problem == "graph_coloring" else 2
+        header = (f"# problem: {problem}\n# name: {name}\n# n: {n}\n# m: {m}\n# k: {k}\n"
+                  f"# weighted: 0\n# directed: 0\n{n} {m}\n")
+        body = "\n".join(f"{a} {b} 1" for a, b in zip(u.tolist(), v.tolist()))
+    else:
+        n = SYNTHETIC_VALUES[tier]
+        values = rng.integers(1, 10**15, n)
+        header = f"# problem: {problem}\n# name: {name}\n# n: {n}\n# k: 0\n\n{n}\n"
+        body = "\n".join(map(str, values.tolist()))
+    return (header + body + "\n").encode()
+
+
+def _write_tar_xz(path: str, member: str, data: bytes):
+    with tarfile.open(path, "w:xz") as tar:
+        info = tarfile.TarInfo(member)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+
+def make_fixture(fixtures_dir: str, problem: str, tier: str, codec: str) -> BenchTarget:
+    """生成（或复用已生成的）合成数据文件"""
+    name = f"synthetic_{problem}_{tier}"
+    base = os.path.join(fixtures_dir, f"{name}_{codec}.txt")
+    path = {"xz-tar": base + ".xz", "xz": base + ".xz", "gzip": base + ".gz",
+            "xz-parts": base + PARTS_SUFFIX, "none": base,
+            "binary": base[:-len(".txt")] + BINARY_SUFFIX}[codec]
+    if not os.path.exists(path):
+        os.makedirs(fixtures_dir, exist_ok=True)
+        logger.info(f"生成合成数据: {path}")
+        data = _synthetic_text(problem, tier, name) if codec != "binary" else b""
+        tmp = path + ".tmp"
+        if codec == "xz-tar":
+            _write_tar_xz(tmp, os.path.basename(base), data)
+        elif codec == "xz":
+            with lzma.open(tmp, "wb") as f:
+                f.write(data)
+        elif codec == "gzip":
+            with gzip.open(tmp, "wb") as f:
+                f.write(data)
+        elif codec == "none":
+            with open(tmp, "wb") as f:
+                f.write(data)
+        elif codec == "binary":
+            # 由同名的明文数据转换，保证与其他格式的内容一致
+            convert_file(make_fixture(fixtures_dir, problem, tier, "none").path, tmp)
+        else:
+            # 与 split_large_files.py 一致：按行边界切分明文，各分卷独立xz压缩
+            os.makedirs(tmp)
+            prefix = os.path.join(tmp, os.path.basename(base) + ".part")
+            step = -(-len(data) // _SYNTHETIC_PARTS)
+            start = 0
+            for i in range(_SYNTHETIC_PARTS):
+                end = len(data) if i == _SYNTHETIC_PARTS - 1 else data.index(b"\n", start + step) + 1
+                with lzma.open(prefix + "a" + chr(ord("a") + i) + ".xz", "wb") as f:
+                    f.write(data[start:end])
+                start = end
+        os.rename(tmp, path)
+    return BenchTarget(path=path, problem=problem, tier=tier, codec=codec, name=name,
+                       synthetic=True, compressed_bytes=_compressed_size(path),
+                       uncompressed_bytes=uncompressed_size(path))
+
+
+# ---------------------------------------------------------------------------
+# 测量（在子进程中运行）
+# ---------------------------------------------------------------------------
+
+def _evict_page_cache(path: str):
+    """把源文件移出系统页缓存，使下一次读取成为冷读取"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for source in (part_files(path) if is_parts_dir(path) else [path]):
+        fd = os.open(source, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _reset_peak_rss():
+    """把 Linux 记录的进程RSS峰值（VmHWM）重置为当前RSS，其他平台忽略"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    进程的RSS峰值
+
+    Linux 上读取 /proc/self/status 的 VmHWM。ru_maxrss 在 fork+exec 后会继承父进程的峰值，
+    不能反映子进程自身的内存占用，因此只作为其他平台的后备。
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以KB为单位，macOS 以字节为单位
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _run_loader(loader: str, path: str, stats: Optional[LoadStats]) -> int:
+    """执行一次加载，返回解析出的边数或数字个数"""
+    if loader == "instance":
+        instance = load_instance(path, stats=stats)
+        return instance.m if hasattr(instance, "m") else instance.n
+    if loader == "python":
+        return load_graph_txt(path, use_numpy=False, stats=stats).m
+    if loader == "stream":
+        return sum(len(block) for block in iter_edges(path))
+    raise ValueError(f"未知的加载方式: {loader}")
+
+
+def measure(target: BenchTarget, loader: str, repeat: int = 3, cold: bool = True,
+            cache_dir: Optional[str] = None) -> BenchResult:
+    """
+    测量一个文件在一种加载方式下的性能（应在独立的子进程中调用）
+
+    Args:
+        target: 待测文件
+        loader: instance（load_instance）/ python（纯Python解析）/ stream（iter_edges 流式读取）
+        repeat: 热缓存测量次数，取中位数
+        cold: 是否先把文件移出页缓存再测一次冷启动
+        cache_dir: 不为 None 时额外测量从旁路二进制缓存加载的耗时（仅 instance 加载图）
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    result = BenchResult(
+        key=f"{target.problem}/{target.tier}/{target.codec}/{loader}/{target.name}",
+        problem=target.problem, tier=target.tier, codec=target.codec, loader=loader,
+        name=target.name, path=target.path, synthetic=target.synthetic,
+        compressed_bytes=target.compressed_bytes, uncompressed_bytes=target.uncompressed_bytes,
+        item_unit="edges" if _is_graph(target.problem) else "values")
+    _reset_peak_rss()
+    baseline_rss = _current_rss_mb()
+    try:
+        if cold:
+            _evict_page_cache(target.path)
+            start = time.perf_counter()
+            result.items = _run_loader(loader, target.path, None)
+            result.cold_s = time.perf_counter() - start
+
+        times = []
+        stats = None
+        for _ in range(max(1, repeat)):
+            stats = LoadStats() if loader != "stream" else None
+            start = time.perf_counter()
+            result.items = _run_loader(loader, target.path, stats)
+            times.append(time.perf_counter() - start)
+        result.warm_s = statistics.median(times)
+        result.warm_min_s = min(times)
+        if stats is not None:
+            result.stages = {name: round(stage.seconds, 6) for name, stage in stats.stages.items()}
+
+        if cache_dir is not None and loader == "instance" and _is_graph(target.problem):
+            configure_cache(cache_dir)
+            load_instance(target.path)  # 写入缓存
+            start = time.perf_counter()
+            load_instance(target.path)
+            result.cached_s = time.perf_counter() - start
+            configure_cache(enabled=False)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+
+    if result.warm_s:
+        result.mb_per_s = target.uncompressed_bytes / 2**20 / result.warm_s
+        result.items_per_s = result.items / result.warm_s
+    result.peak_rss_mb = _peak_rss_mb()
+    if result.peak_rss_mb is not None and baseline_rss is not None:
+        result.rss_delta_mb = max(0.0, result.peak_rss_mb - baseline_rss)
+    return result
+
+
+def _measure_worker(args: Tuple[BenchTarget, str, int, bool, Optional[str]]) -> BenchResult:
+    return measure(*args)
+
+
+def run_benchmark(targets: List[BenchTarget], loaders: List[str], repeat: int = 3,
+                  cold: bool = True, cached: bool = True, isolate: bool = True,
+                  python_max_tier: str = "medium") -> List[BenchResult]:
+    """
+    对所有文件运行各加载方式
+
+    python 加载方式只用于文本格式的图数据，且只测到 python_max_tier 规模；stream 只用于图数据。
+    isolate=True 时每次测量使用新的子进程（spawn），峰值RSS互不影响。
+    """
+    max_tier_index = SIZE_TIERS.index(python_max_tier)
+    jobs = []
+    for target in targets:
+        for loader in loaders:
+            if loader in ("python", "stream") and not _is_graph(target.problem):
+                continue
+            if loader == "python" and (SIZE_TIERS.index(target.tier) > max_tier_index
+                                       or target.codec == "binary"):
+                continue
+            jobs.append((target, loader))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="co-bench-cache-") as tmp:
+        for i, (target, loader) in enumerate(jobs, 1):
+            cache_dir = os.path.join(tmp, str(i)) if cached else None
+            args = (target, loader, repeat, cold, cache_dir)
+            if isolate:
+                with mp.get_context("spawn").Pool(1) as pool:
+                    result = pool.apply(_measure_worker, (args,))
+            else:
+                result = measure(*args)
+            logger.info(f"[{i}/{len(jobs)}] {result.key}: "
+                        + (result.error or f"warm {result.warm_s:.4f}s"))
+            results.append(result)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# 报告与基线比较
+# ---------------------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def build_report(results: List[BenchResult]) -> Dict[str, Any]:
+    return {
+        "version": BENCHMARK_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": [asdict(r) for r in results],
+    }
+
+
+@dataclass
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2,
+                    rss_threshold: float = 0.3, min_seconds: float = 0.005) -> List[Regression]:
+    """
+    与基线比较，返回超过阈值的退化
+
+    耗时指标（cold_s / warm_s / cached_s）比基线慢 threshold 以上、且两次都不短于
+    min_seconds（过短的耗时噪声太大）时记为退化；peak_rss_mb 按 rss_threshold 判断。
+    只比较两份报告中都存在的条目。
+    """
+    base_by_key = {r["key"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for record in current.get("results", []):
+        base = base_by_key.get(record["key"])
+        if base is None or record.get("error") or base.get("error"):
+            continue
+        for metric in _COMPARED_METRICS:
+            old, new = base.get(metric), record.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == "peak_rss_mb":
+                limit = rss_threshold
+            else:
+                if max(old, new) < min_seconds:
+                    continue
+                limit = threshold
+            if new > old * (1 + limit):
+                regressions.append(Regression(record["key"], metric, old, new))
+    return regressions
+
+
+def _format_rate(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    for unit, scale in (("G", 1e9), ("M", 1e6), ("K", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.1f}{unit}"
+    return f"{value:.0f}"
+
+
+def print_table(results: List[BenchResult]):
+    def sec(value):
+        return f"{value:.4f}" if value is not None else "-"
+
+    print(f"{'key':<72} {'cold s':>8} {'warm s':>8} {'cache s':>8} {'MB/s':>8} "
+          f"{'items/s':>8} {'RSS MB':>8}")
+    for r in results:
+        if r.error:
+            print(f"{r.key:<72} 失败: {r.error}")
+            continue
+        key = r.key + (" *" if r.synthetic else "")
+        print(f"{key:<72} {sec(r.cold_s):>8} {sec(r.warm_s):>8} {sec(r.cached_s):>8} "
+              f"{(r.mb_per_s or 0):>8.1f} {_format_rate(r.items_per_s):>8} "
+              f"{(r.peak_rss_mb or 0):>8.1f}")
+    if any(r.synthetic for r in results):
+        print("（* 为合成数据）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dataset loaders across size tiers and codecs')
+    parser.add_argument('root', nargs='?', default='processed/', help='Dataset root directory (default: processed/)')
+    parser.add_argument('--tiers', nargs='+', default=list(SIZE_TIERS), choices=SIZE_TIERS,
+                        help='Size tiers to benchmark (default: all)')
+    parser.add_argument('--codecs', nargs='+', default=list(CODECS), choices=CODECS,
+                        help='Codecs to benchmark (default: all)')
+    parser.add_argument('--loaders', nargs='+', default=list(LOADERS), choices=LOADERS,
+                        help='Loaders to benchmark (default: all)')
+    parser.add_argument('--per-group', type=int, default=1,
+                        help='Files per (problem, tier, codec) group (default: 1, the median-size file)')
+    parser.add_argument('--repeat', type=int, default=3, help='Warm runs per measurement (default: 3)')
+    parser.add_argument('--max-mb', type=float, default=1024,
+                        help='Skip real files larger than this uncompressed size in MB (default: 1024)')
+    parser.add_argument('--python-max-tier', default='medium', choices=SIZE_TIERS,
+                        help='Largest tier for the pure-Python loader (default: medium)')
+    parser.add_argument('--synthetic-only', action='store_true',
+                        help='Benchmark synthetic fixtures only, ignoring the dataset directory')
+    parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR,
+                        help=f'Directory for synthetic fixtures (default: {DEFAULT_FIXTURES_DIR})')
+    parser.add_argument('--no-cold', action='store_true', help='Skip cold (page-cache evicted) runs')
+    parser.add_argument('--no-cached', action='store_true', help='Skip sidecar-cache runs')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Measure in this process instead of a fresh subprocess per run (RSS is not isolated)')
+    parser.add_argument('--output', '-o', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Compare against this JSON report')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative slowdown for timing metrics (default: 0.2)')
+    parser.add_argument('--rss-threshold', type=float, default=0.3,
+                        help='Allowed relative growth for peak RSS (default: 0.3)')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='Ignore timings shorter than this when comparing (default: 0.005)')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    targets = discover_targets(args.root, args.tiers, args.codecs, args.per_group, args.max_mb,
+                               args.fixtures_dir, args.synthetic_only)
+    if not targets:
+        print("没有找到可测试的文件", file=sys.stderr)
+        sys.exit(1)
+    print(f"测试 {len(targets)} 个文件（合成数据 {sum(t.synthetic for t in targets)} 个）", file=sys.stderr)
+
+    results = run_benchmark(targets, args.loaders, args.repeat, cold=not args.no_cold,
+                            cached=not args.no_cached, isolate=not args.in_process,
+                            python_max_tier=args.python_max_tier)
+    report = build_report(results)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("machine") != report["meta"]["machine"]:
+            print("警告: 基线来自不同的机器架构，比较结果仅供参考", file=sys.stderr)
+        regressions = compare_reports(report, baseline, args.threshold, args.rss_threshold,
+                                      args.min_seconds)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能退化:")
+            for r in regressions:
+                print(f"  {r.key} {r.metric}: {r.baseline:.4f} -> {r.current:.4f} ({r.ratio:.2f}x)")
+            sys.exit(1)
+        print("\n与基线相比没有超过阈值的退化")
+
+
+if __name__ == "__main__":
+    main()
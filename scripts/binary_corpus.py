@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+二进制实例格式（.cobin）
+把文本格式的实例转换为紧凑的二进制文件，加载时通过mmap零拷贝读取，不再需要解压和解析文本。
+load_instance 可以直接读取 .cobin 文件。
+
+文件布局（所有整数均为小端序）:
+    固定头部 40 字节: MAGIC "COBINARY" | uint16 版本 | uint16 问题类别 | uint32 标志位
+                      | uint64 n | uint64 m（图为边数，数值划分为数字个数）| uint64 元数据长度
+    元数据: UTF-8 JSON，包含实例名称、原文本头部（meta）和各数组的 dtype/shape/偏移量
+    数组区: 按64字节对齐的原始数组
+        图:       u, v, w（每条无向边一次，u < v），可选 CSR 的 indptr, indices, weights
+        数值划分: values（int64），或超出int64时的 limbs（(n, L) uint64，见 limb_array.py）；
+                  含负数时 limbs 存储绝对值，negative（uint8）标记负数（BINARY_FLAG_SIGNED）
+
+用法示例:
+    python3 scripts/binary_corpus.py convert processed/ processed_bin/ --workers 8 --verify
+    python3 scripts/binary_corpus.py info processed_bin/graph_partitioning/compressed/large/citationCiteseer.cobin
+
+    from unified_loader import load_instance
+    graph = load_instance("processed_bin/graph_partitioning/compressed/large/citationCiteseer.cobin")
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .unified_loader import (GraphInstance, NPPInstance, load_instance,
+                                 probe_header, uncompressed_size, iter_edges, find_data_files,
+                                 is_parts_dir, part_files, read_binary_header, read_binary_instance,
+                                 BINARY_MAGIC, BINARY_VERSION, BINARY_SUFFIX, BINARY_HEADER,
+                                 BINARY_KIND_GRAPH, BINARY_KIND_NPP, BINARY_FLAG_CSR,
+                                 BINARY_FLAG_BIGINT, BINARY_FLAG_SORTED, BINARY_FLAG_SIGNED,
+                                 PARTS_SUFFIX, is_lfs_pointer, atomic_write, _index_dtype)
+except ImportError:
+    from unified_loader import (GraphInstance, NPPInstance, load_instance,
+                                probe_header, uncompressed_size, iter_edges, find_data_files,
+                                is_parts_dir, part_files, read_binary_header, read_binary_instance,
+                                BINARY_MAGIC, BINARY_VERSION, BINARY_SUFFIX, BINARY_HEADER,
+                                BINARY_KIND_GRAPH, BINARY_KIND_NPP, BINARY_FLAG_CSR,
+                                BINARY_FLAG_BIGINT, BINARY_FLAG_SORTED, BINARY_FLAG_SIGNED,
+                                PARTS_SUFFIX, is_lfs_pointer, atomic_write, _index_dtype)
+
+logger = logging.getLogger(__name__)
+
+_ALIGN = 64
+_COPY_BLOCK = 1 << 22
+
+# 超过该解压大小（MB）的图改为流式转换：外部排序去重，不构建CSR
+DEFAULT_MAX_MEMORY_MB = 1024
+
+Instance = Union[GraphInstance, NPPInstance]
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(metadata: Dict[str, Any], specs: Dict[str, Tuple[np.dtype, Tuple[int, ...]]]) -> bytes:
+    """计算各数组的偏移量，返回最终的元数据JSON（偏移量的位数会影响元数据长度，需反复计算）"""
+    layout = {name: {"dtype": dtype.newbyteorder("<").str, "shape": list(shape), "offset": 0}
+              for name, (dtype, shape) in specs.items()}
+    metadata = dict(metadata, arrays=layout)
+    while True:
+        block = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+        offset = _align(BINARY_HEADER.size + len(block))
+        changed = False
+        for name, (dtype, shape) in specs.items():
+            if layout[name]["offset"] != offset:
+                layout[name]["offset"] = offset
+                changed = True
+            offset = _align(offset + dtype.itemsize * int(np.prod(shape, dtype=np.int64)))
+        if not changed:
+            return block
+
+
+def _write_file(path: str, kind: int, flags: int, n: int, m: int, metadata: Dict[str, Any],
+                specs: Dict[str, Tuple[np.dtype, Tuple[int, ...]]], write_array):
+    """
+    先写临时文件再原子替换
+
+    write_array(f, name, dtype) 负责把数组 name 以 dtype 写入 f 的当前位置。
+    """
+    block = _layout(metadata, specs)
+    offsets = json.loads(block)["arrays"]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with atomic_write(path) as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, kind, flags, n, m, len(block)))
+        f.write(block)
+        for name, (dtype, _) in specs.items():
+            f.write(b"\0" * (offsets[name]["offset"] - f.tell()))
+            write_array(f, name, dtype.newbyteorder("<"))
+
+
+def write_instance(path: str, instance: Instance, include_csr: bool = True):
+    """
+    把已加载的实例写为 .cobin 文件
+
+    Args:
+        path: 输出文件路径
+        instance: 图实例或数值划分实例
+        include_csr: 图实例是否同时写入CSR数组（加载后无需再构建）
+    """
+    metadata = {"name": instance.name, "meta": instance.meta}
+    flags = 0
+    if isinstance(instance, GraphInstance):
+        kind = BINARY_KIND_GRAPH
+        edges = instance.edge_array
+        arrays = {"u": edges.u, "v": edges.v, "w": edges.w}
+        if include_csr:
+            csr = instance.csr
+            arrays.update(indptr=csr.indptr, indices=csr.indices, weights=csr.weights)
+            flags |= BINARY_FLAG_CSR
+        n, m = instance.n, len(edges)
+    else:
+        kind = BINARY_KIND_NPP
+        values = instance.value_array
+        if isinstance(values, np.ndarray):
+            arrays = {"values": values.astype(np.int64, copy=False)}
+        else:
+            arrays = {"limbs": values.limbs}
+            flags |= BINARY_FLAG_BIGINT
+            if values.negative is not None:
+                arrays["negative"] = values.negative.view(np.uint8)
+                flags |= BINARY_FLAG_SIGNED
+        n = m = instance.n
+
+    specs = {name: (arr.dtype, arr.shape) for name, arr in arrays.items()}
+    _write_file(path, kind, flags, n, m, metadata, specs,
+                lambda f, name, dtype: f.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()))
+
+
+# ---------------------------------------------------------------------------
+# 转换
+# ---------------------------------------------------------------------------
+
+def binary_path_for(src_path: str, src_root: str, dst_root: str) -> str:
+    """
+    源文件在输出目录中对应的 .cobin 路径（保持相对目录结构）
+
+    例如 <src_root>/graph_partitioning/compressed/large/citationCiteseer.txt.xz
+    对应 <dst_root>/graph_partitioning/compressed/large/citationCiteseer.cobin
+    """
+    rel = os.path.relpath(src_path.rstrip(os.sep), src_root)
+    for suffix in (PARTS_SUFFIX, ".gz", ".xz", ".txt"):
+        if rel.endswith(suffix):
+            rel = rel[:-len(suffix)]
+    return os.path.join(dst_root, rel + BINARY_SUFFIX)
+
+
+def _convert_streaming(src: str, dst: str, spill_dir: Optional[str] = None):
+    """
+    大图的流式转换：外部排序去重后逐块写出边数组，内存占用与图大小无关
+
+    边按 (u, v) 升序存储（BINARY_FLAG_SORTED），不写入CSR。
+    """
+    info = probe_header(src)
+    if info.n is None:
+        raise ValueError(f"无法从头部确定节点数: {src}")
+    idx_dtype = _index_dtype(max(info.n - 1, 0))
+    idx_max = np.iinfo(idx_dtype).max
+
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="cobin-") as tmp:
+        spill = {name: open(os.path.join(tmp, name), "wb") for name in ("u", "v", "w")}
+        m = 0
+        w_max = 0
+        try:
+            for chunk in iter_edges(src, dedup=True, spill_dir=tmp):
+                if len(chunk) == 0:
+                    continue
+                if int(chunk.v.max()) > idx_max:
+                    raise ValueError(f"节点编号超出头部声明的范围: {src}")
+                spill["u"].write(chunk.u.astype(idx_dtype).tobytes())
+                spill["v"].write(chunk.v.astype(idx_dtype).tobytes())
+                spill["w"].write(chunk.w.astype(np.int64).tobytes())
+                w_max = max(w_max, int(np.abs(chunk.w).max()))
+                m += len(chunk)
+        finally:
+            for f in spill.values():
+                f.close()
+
+        w_dtype = _index_dtype(w_max)
+        specs = {"u": (idx_dtype, (m,)), "v": (idx_dtype, (m,)), "w": (w_dtype, (m,))}
+        spill_dtypes = {"u": idx_dtype, "v": idx_dtype, "w": np.dtype(np.int64)}
+
+        def copy_array(f, name, dtype):
+            with open(os.path.join(tmp, name), "rb") as source:
+                step = _COPY_BLOCK * spill_dtypes[name].itemsize
+                for block in iter(lambda: source.read(step), b""):
+                    f.write(np.frombuffer(block, dtype=spill_dtypes[name]).astype(dtype).tobytes())
+
+        _write_file(dst, BINARY_KIND_GRAPH, BINARY_FLAG_SORTED, info.n, m,
+                    {"name": info.name, "meta": info.meta}, specs, copy_array)
+
+
+def convert_file(src: str, dst: str, include_csr: bool = True,
+                 max_memory_mb: float = DEFAULT_MAX_MEMORY_MB,
+                 spill_dir: Optional[str] = None) -> str:
+    """
+    把单个文本实例转换为 .cobin 文件
+
+    解压后超过 max_memory_mb 的图使用流式转换（边按 (u, v) 排序，不含CSR）。
+
+    Returns:
+        "memory" 或 "streaming"，表示使用的转换方式
+    """
+    info = probe_header(src)
+    if "graph" in (info.problem or "") and uncompressed_size(src) > max_memory_mb * 2**20:
+        _convert_streaming(src, dst, spill_dir)
+        return "streaming"
+    write_instance(dst, load_instance(src), include_csr)
+    return "memory"
+
+
+def verify_roundtrip(src: str, dst: str, spill_dir: Optional[str] = None) -> List[str]:
+    """
+    比较文本文件和 .cobin 文件加载出的实例，返回差异描述（为空表示语义一致）
+
+    比较名称、头部、n、m、边集合及权重（或数字序列）和CSR。
+    流式转换的文件（BINARY_FLAG_SORTED）同样流式校验，不把文本实例整个加载到内存。
+    """
+    fields, _ = read_binary_header(dst)
+    if fields["kind"] == BINARY_KIND_GRAPH and fields["flags"] & BINARY_FLAG_SORTED:
+        return _verify_streaming(src, dst, spill_dir)
+
+    expected = load_instance(src)
+    actual = read_binary_instance(dst)
+    problems = []
+    if type(expected) is not type(actual):
+        return [f"实例类型不同: {type(expected).__name__} != {type(actual).__name__}"]
+    for attr in ("name", "n", "meta"):
+        if getattr(expected, attr) != getattr(actual, attr):
+            problems.append(f"{attr} 不同: {getattr(expected, attr)!r} != {getattr(actual, attr)!r}")
+
+    if isinstance(expected, GraphInstance):
+        if expected.m != actual.m:
+            problems.append(f"边数不同: {expected.m} != {actual.m}")
+            return problems
+        a, b = expected.edge_array, actual.edge_array
+        for name in ("u", "v", "w"):
+            if not np.array_equal(getattr(a, name), getattr(b, name)):
+                problems.append(f"边数组 {name} 不同")
+        if fields["flags"] & BINARY_FLAG_CSR:
+            for name in ("indptr", "indices", "weights"):
+                if not np.array_equal(getattr(expected.csr, name), getattr(actual.csr, name)):
+                    problems.append(f"CSR数组 {name} 不同")
+    elif expected.values != actual.values:
+        problems.append("数字序列不同")
+    return problems
+
+
+def _verify_streaming(src: str, dst: str, spill_dir: Optional[str] = None) -> List[str]:
+    """逐块比较 iter_edges(src, dedup=True) 和 .cobin 中按 (u, v) 排序的边数组"""
+    info = probe_header(src)
+    actual = read_binary_instance(dst)
+    if not isinstance(actual, GraphInstance):
+        return [f"实例类型不同: GraphInstance != {type(actual).__name__}"]
+    problems = []
+    for attr, expected in (("name", info.name), ("n", info.n), ("meta", info.meta)):
+        if expected != getattr(actual, attr):
+            problems.append(f"{attr} 不同: {expected!r} != {getattr(actual, attr)!r}")
+
+    edges = actual.edge_array
+    offset = 0
+    for chunk in iter_edges(src, dedup=True, spill_dir=spill_dir):
+        end = offset + len(chunk)
+        if end > len(edges):
+            problems.append(f"边数不同: 文本至少 {end} 条，二进制 {len(edges)} 条")
+            return problems
+        for name in ("u", "v", "w"):
+            if not np.array_equal(getattr(chunk, name), getattr(edges, name)[offset:end]):
+                problems.append(f"边数组 {name} 不同（第 {offset} 到 {end} 条边之间）")
+                return problems
+        offset = end
+    if offset != len(edges):
+        problems.append(f"边数不同: {offset} != {len(edges)}")
+    return problems
+
+
+def _convert_worker(args: Tuple[str, str, bool, float, Optional[str], bool]) -> Dict[str, Any]:
+    src, dst, include_csr, max_memory_mb, spill_dir, verify = args
+    logging.getLogger().setLevel(logging.WARNING)
+    start = time.perf_counter()
+    record = {"src": src, "dst": dst, "mode": None, "error": "", "problems": []}
+    try:
+        record["mode"] = convert_file(src, dst, include_csr, max_memory_mb, spill_dir)
+        if verify:
+            record["problems"] = verify_roundtrip(src, dst, spill_dir)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def _source_files(path: str) -> List[str]:
+    return part_files(path) if is_parts_dir(path) else [path]
+
+
+def _is_up_to_date(src: str, dst: str) -> bool:
+    if not os.path.exists(dst):
+        return False
+    return os.path.getmtime(dst) >= max(os.path.getmtime(s) for s in _source_files(src))
+
+
+def convert_tree(src_root: str, dst_root: str, workers: int = 1, include_csr: bool = True,
+                 max_memory_mb: float = DEFAULT_MAX_MEMORY_MB, spill_dir: Optional[str] = None,
+                 verify: bool = False, force: bool = False) -> List[Dict[str, Any]]:
+    """
+    并行转换整个数据目录，输出目录保持 <问题>/compressed/<规模>/ 结构
+
+    输出文件比源文件新时跳过（force=True 时全部重新转换）；尚未通过 git lfs pull
+    下载的文件（LFS指针）不转换，记录为 "lfs-pointer"。
+
+    Args:
+        src_root: 文本数据根目录
+        dst_root: 输出根目录
+        workers: 工作进程数
+        include_csr: 是否写入CSR数组
+        max_memory_mb: 超过该解压大小（MB）的图使用流式转换
+        spill_dir: 流式转换的临时目录
+        verify: 转换后是否与文本加载结果逐一比较
+        force: 是否忽略已有的输出文件
+
+    Returns:
+        每个文件的转换记录（src, dst, mode, error, problems, seconds），
+        mode 为 "memory" / "streaming" / "skipped" / "lfs-pointer"
+    """
+    jobs = []
+    records = []
+    for src in find_data_files(src_root):
+        if src.endswith(BINARY_SUFFIX):
+            continue
+        dst = binary_path_for(src, src_root, dst_root)
+        mode = None
+        if is_lfs_pointer(src):
+            mode = "lfs-pointer"
+        elif not force and _is_up_to_date(src, dst):
+            mode = "skipped"
+        if mode is not None:
+            records.append({"src": src, "dst": dst, "mode": mode, "error": "",
+                            "problems": [], "seconds": 0.0})
+            continue
+        jobs.append((src, dst, include_csr, max_memory_mb, spill_dir, verify))
+
+    # 大文件先开始，减少并行转换时的尾部等待
+    jobs.sort(key=lambda job: -_source_bytes(job[0]))
+    if workers <= 1:
+        records.extend(_convert_worker(job) for job in jobs)
+    else:
+        # 工作进程被杀死（例如OOM）时 ProcessPoolExecutor 让未完成的任务抛出
+        # BrokenProcessPool，而不是像 multiprocessing.Pool 那样一直等待
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(_convert_worker, job): job for job in jobs}
+            for future in as_completed(futures):
+                src, dst = futures[future][:2]
+                try:
+                    records.append(future.result())
+                except BrokenProcessPool as e:
+                    records.append({"src": src, "dst": dst, "mode": None,
+                                    "error": f"BrokenProcessPool: {e}", "problems": [], "seconds": 0.0})
+    records.sort(key=lambda r: r["src"])
+    return records
+
+
+def _source_bytes(path: str) -> int:
+    return sum(os.path.getsize(source) for source in _source_files(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert datasets to the compact binary instance format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert a dataset tree')
+    convert_parser.add_argument('src_root', help='Text dataset root (e.g. processed/)')
+    convert_parser.add_argument('dst_root', help='Output root for .cobin files')
+    convert_parser.add_argument('--workers', type=int, default=mp.cpu_count(),
+                                help='Number of worker processes (default: number of CPUs)')
+    convert_parser.add_argument('--no-csr', action='store_true', help='Do not store CSR arrays')
+    convert_parser.add_argument('--max-memory-mb', type=float, default=DEFAULT_MAX_MEMORY_MB,
+                                help=f'Stream graphs larger than this uncompressed size in MB '
+                                     f'(default: {DEFAULT_MAX_MEMORY_MB})')
+    convert_parser.add_argument('--spill-dir', help='Temporary directory for streaming conversion')
+    convert_parser.add_argument('--verify', action='store_true',
+                                help='Check each converted file against the text loader')
+    convert_parser.add_argument('--force', action='store_true', help='Reconvert up-to-date files')
+
+    verify_parser = subparsers.add_parser('verify', help='Check a converted file against its source')
+    verify_parser.add_argument('src', help='Text data file')
+    verify_parser.add_argument('dst', help='.cobin file')
+
+    info_parser = subparsers.add_parser('info', help='Show the header of a .cobin file')
+    info_parser.add_argument('path', help='.cobin file')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'info':
+        fields, metadata = read_binary_header(args.path)
+        print(json.dumps(dict(fields, **metadata), ensure_ascii=False, indent=2))
+        return
+
+    if args.command == 'verify':
+        problems = verify_roundtrip(args.src, args.dst)
+        for problem in problems:
+            print(f"✗ {problem}")
+        if problems:
+            sys.exit(1)
+        print("✓ 语义一致")
+        return
+
+    start = time.perf_counter()
+    records = convert_tree(args.src_root, args.dst_root, args.workers, not args.no_csr,
+                           args.max_memory_mb, args.spill_dir, args.verify, args.force)
+    failed = mismatched = 0
+    for record in records:
+        if record["error"]:
+            failed += 1
+            print(f"✗ {record['src']}: {record['error']}")
+        elif record["problems"]:
+            mismatched += 1
+            print(f"✗ {record['src']}: {'; '.join(record['problems'])}")
+    converted = sum(1 for r in records if r["mode"] in ("memory", "streaming"))
+    skipped = sum(1 for r in records if r["mode"] == "skipped")
+    pointers = sum(1 for r in records if r["mode"] == "lfs-pointer")
+    print(f"\n转换 {converted} 个文件，跳过 {skipped} 个（已是最新），"
+          f"{pointers} 个LFS指针未下载，失败 {failed} 个"
+          + (f"，校验不一致 {mismatched} 个" if args.verify else "")
+          + f"，耗时 {time.perf_counter() - start:.2f} 秒")
+    if failed or mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+可随机访问的分块压缩图格式
+把图转换为按源节点排序的有向弧列表（每条无向边在两个端点各存一次，与CSR顺序相同），
+切分为固定弧数的块并分别压缩。文件尾部的索引记录每个块的偏移、弧编号范围和源节点范围，
+读取任意弧区间或节点邻域时只解压涉及的块。
+
+文件格式: MAGIC | 压缩块... | JSON索引 | uint64 索引长度 | MAGIC
+
+用法示例:
+    python3 scripts/block_graph.py convert processed/graph_partitioning/compressed/large/citationCiteseer.txt.xz
+    python3 scripts/block_graph.py neighbors citationCiteseer.blk 42
+
+    from block_graph import BlockGraphReader
+    with BlockGraphReader("citationCiteseer.blk") as reader:
+        targets, weights = reader.neighbors(42)
+        arcs = reader.read_arcs(1000000, 1001000)
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import lzma
+import logging
+import argparse
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .unified_loader import (EdgeArrays, CSRGraph, GraphInstance, _open_binary, _read_header_block,
+                                 _iter_edge_blocks, _iter_canonical_edges, _external_dedup,
+                                 _rechunk_edges, _index_dtype, _header_int, atomic_write)
+except ImportError:
+    from unified_loader import (EdgeArrays, CSRGraph, GraphInstance, _open_binary, _read_header_block,
+                                _iter_edge_blocks, _iter_canonical_edges, _external_dedup,
+                                _rechunk_edges, _index_dtype, _header_int, atomic_write)
+
+logger = logging.getLogger(__name__)
+
+BLOCK_MAGIC = b"COGBLOCK"
+BLOCK_VERSION = 1
+BLOCK_SUFFIX = ".blk"
+DEFAULT_BLOCK_ARCS = 1 << 16
+_TRAILER = 8 + len(BLOCK_MAGIC)
+
+_CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+def _iter_symmetric_arcs(blocks: Iterator[Tuple[np.ndarray, ...]]) -> Iterator[Tuple[np.ndarray, ...]]:
+    """把 u < v 的边块展开为两个方向的弧"""
+    for u, v, w in blocks:
+        yield np.concatenate((u, v)), np.concatenate((v, u)), np.concatenate((w, w))
+
+
+def _encode_block(arcs: EdgeArrays, dtypes: Dict[str, str], compress) -> bytes:
+    # 源节点有序，存储差分以提高压缩率
+    src = np.diff(arcs.u, prepend=arcs.u[:1]).astype(dtypes["source"])
+    payload = b"".join((src.tobytes(),
+                        arcs.v.astype(dtypes["target"]).tobytes(),
+                        arcs.w.astype(dtypes["weight"]).tobytes()))
+    return compress(payload)
+
+
+def convert_to_blocks(path: str, output_path: Optional[str] = None,
+                      block_arcs: int = DEFAULT_BLOCK_ARCS, codec: str = "zlib",
+                      max_memory_edges: int = 1 << 25, spill_dir: Optional[str] = None) -> str:
+    """
+    把图数据文件转换为分块压缩格式
+
+    边从解压流中分块读取，经外部排序去重（与 iter_edges(dedup=True) 相同，
+    保留最后出现的权重）后按源节点顺序写入，内存占用不随文件大小增长。
+
+    Args:
+        path: 图数据文件路径（支持 .gz、.xz 和 .parts 分卷目录）
+        output_path: 输出文件路径，默认在源文件旁生成 <名称>.blk
+        block_arcs: 每块的弧数
+        codec: 块压缩方式，zlib（解压快）或 lzma（压缩率高）
+        max_memory_edges: 外部排序时内存中最多缓存的弧数
+        spill_dir: 外部排序临时文件目录
+
+    Returns:
+        str: 输出文件路径
+    """
+    if codec not in _CODECS:
+        raise ValueError(f"不支持的压缩方式: {codec}（可用: {', '.join(_CODECS)}）")
+    if block_arcs <= 0:
+        raise ValueError(f"block_arcs 必须为正数，得到: {block_arcs}")
+    compress = _CODECS[codec][0]
+
+    with _open_binary(path) as f:
+        meta, first_line = _read_header_block(f)
+        if first_line is None:
+            raise ValueError(f"文件 {path} 没有有效数据行")
+        parts = first_line.split()
+        n = _header_int(meta, "n")
+        if n is None:
+            n = int(parts[0])
+        name = meta.get("name", os.path.basename(path))
+        if output_path is None:
+            output_path = os.path.join(os.path.dirname(os.path.abspath(path)), name + BLOCK_SUFFIX)
+
+        dtypes = {"source": str(_index_dtype(n)), "target": str(_index_dtype(n)), "weight": "<i8"}
+        blocks = _external_dedup(_iter_symmetric_arcs(_iter_canonical_edges(_iter_edge_blocks(f))),
+                                 max_memory_edges, spill_dir)
+
+        index: Dict[str, List[int]] = {"offset": [], "nbytes": [], "count": [],
+                                       "first_source": [], "last_source": []}
+        num_arcs = 0
+        max_node = n - 1
+        with atomic_write(output_path) as out:
+            out.write(BLOCK_MAGIC)
+            for arcs in _rechunk_edges(blocks, block_arcs):
+                max_node = max(max_node, int(arcs.u[-1]), int(arcs.v.max()))
+                if max_node > np.iinfo(dtypes["source"]).max:
+                    raise ValueError(f"节点编号超出头部声明的范围: {max_node}")
+                data = _encode_block(arcs, dtypes, compress)
+                index["offset"].append(out.tell())
+                index["nbytes"].append(len(data))
+                index["count"].append(len(arcs))
+                index["first_source"].append(int(arcs.u[0]))
+                index["last_source"].append(int(arcs.u[-1]))
+                out.write(data)
+                num_arcs += len(arcs)
+
+            footer = {
+                "version": BLOCK_VERSION,
+                "name": name,
+                "n": max_node + 1,
+                "m": num_arcs // 2,
+                "num_arcs": num_arcs,
+                "meta": meta,
+                "codec": codec,
+                "block_arcs": block_arcs,
+                "dtypes": dtypes,
+                "blocks": index,
+            }
+            head = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+            out.write(head)
+            out.write(len(head).to_bytes(8, "little"))
+            out.write(BLOCK_MAGIC)
+
+    logger.info(f"转换完成: {output_path}（{num_arcs} 条弧，{len(index['offset'])} 个块）")
+    return output_path
+
+
+class BlockGraphReader:
+    """
+    分块压缩图文件的随机访问读取器
+
+    通过mmap读取文件，最近解压的若干个块保存在LRU缓存中。
+    弧编号对应CSR顺序：按源节点、再按目标节点升序，每条无向边出现两次。
+    """
+
+    def __init__(self, path: str, cache_blocks: int = 8):
+        """
+        Args:
+            path: 分块压缩图文件路径
+            cache_blocks: 缓存的已解压块数
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_footer()
+        except Exception:
+            self._mm.close()
+            raise
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]" = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def _read_footer(self):
+        mm = self._mm
+        if len(mm) < len(BLOCK_MAGIC) + _TRAILER or mm[:len(BLOCK_MAGIC)] != BLOCK_MAGIC \
+                or mm[-len(BLOCK_MAGIC):] != BLOCK_MAGIC:
+            raise ValueError(f"不是有效的分块压缩图文件: {self.path}")
+        head_len = int.from_bytes(mm[-_TRAILER:-len(BLOCK_MAGIC)], "little")
+        start = len(mm) - _TRAILER - head_len
+        footer = json.loads(mm[start:start + head_len].decode("utf-8"))
+        if footer.get("version") != BLOCK_VERSION:
+            raise ValueError(f"分块压缩图文件版本不匹配: {footer.get('version')}")
+
+        blocks = footer.pop("blocks")
+        self.header: Dict[str, Any] = footer
+        self.name: str = footer["name"]
+        self.n: int = footer["n"]
+        self.m: int = footer["m"]
+        self.num_arcs: int = footer["num_arcs"]
+        self.meta: Dict[str, str] = footer["meta"]
+        self._decompress = _CODECS[footer["codec"]][1]
+        self._dtypes = {key: np.dtype(value) for key, value in footer["dtypes"].items()}
+        self._offsets = np.asarray(blocks["offset"], dtype=np.int64)
+        self._nbytes = np.asarray(blocks["nbytes"], dtype=np.int64)
+        counts = np.asarray(blocks["count"], dtype=np.int64)
+        self._first_arc = np.concatenate(([0], np.cumsum(counts)))
+        self._first_source = np.asarray(blocks["first_source"], dtype=np.int64)
+        self._last_source = np.asarray(blocks["last_source"], dtype=np.int64)
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self._offsets)
+
+    def __len__(self) -> int:
+        return self.num_arcs
+
+    def __enter__(self) -> "BlockGraphReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._cache.clear()
+        self._mm.close()
+
+    def _block(self, i: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """解压第 i 个块，返回 (源节点, 目标节点, 权重)"""
+        cached = self._cache.get(i)
+        if cached is not None:
+            self._cache.move_to_end(i)
+            return cached
+
+        start = int(self._offsets[i])
+        payload = self._decompress(self._mm[start:start + int(self._nbytes[i])])
+        count = int(self._first_arc[i + 1] - self._first_arc[i])
+        src_t, dst_t, w_t = self._dtypes["source"], self._dtypes["target"], self._dtypes["weight"]
+        src = np.frombuffer(payload, dtype=src_t, count=count)
+        dst = np.frombuffer(payload, dtype=dst_t, count=count, offset=count * src_t.itemsize)
+        w = np.frombuffer(payload, dtype=w_t, count=count,
+                          offset=count * (src_t.itemsize + dst_t.itemsize))
+        src = np.cumsum(src, dtype=src_t)
+        src += self._first_source[i]
+
+        block = (src, dst, w)
+        self._cache[i] = block
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return block
+
+    def _gather(self, first_block: int, last_block: int, lo: int, hi: int) -> EdgeArrays:
+        """拼接 [first_block, last_block] 中的块并截取全局弧编号 [lo, hi)"""
+        parts = []
+        for i in range(first_block, last_block + 1):
+            src, dst, w = self._block(i)
+            base = int(self._first_arc[i])
+            s, e = max(lo - base, 0), min(hi - base, len(src))
+            parts.append((src[s:e], dst[s:e], w[s:e]))
+        if not parts:
+            empty = np.empty(0, dtype=self._dtypes["source"])
+            return EdgeArrays(empty, empty.copy(), np.empty(0, dtype=self._dtypes["weight"]))
+        return EdgeArrays(*(np.concatenate(cols) for cols in zip(*parts)))
+
+    def read_arcs(self, start: int, stop: int) -> EdgeArrays:
+        """
+        读取弧编号 [start, stop) 的弧，只解压涉及的块
+
+        Returns:
+            EdgeArrays: u 为源节点，v 为目标节点（不满足 u < v 的约定）
+        """
+        start, stop = max(start, 0), min(stop, self.num_arcs)
+        if start >= stop:
+            return self._gather(0, -1, 0, 0)
+        first = int(np.searchsorted(self._first_arc, start, side="right")) - 1
+        last = int(np.searchsorted(self._first_arc, stop, side="left")) - 1
+        return self._gather(first, last, start, stop)
+
+    def read_nodes(self, lo: int, hi: int) -> EdgeArrays:
+        """读取源节点在 [lo, hi) 中的所有弧"""
+        first = int(np.searchsorted(self._last_source, lo, side="left"))
+        last = int(np.searchsorted(self._first_source, hi, side="left")) - 1
+        if lo >= hi or first > last:
+            return self._gather(0, -1, 0, 0)
+        arcs = self._gather(first, last, int(self._first_arc[first]), int(self._first_arc[last + 1]))
+        s, e = np.searchsorted(arcs.u, (lo, hi), side="left")
+        return EdgeArrays(arcs.u[s:e], arcs.v[s:e], arcs.w[s:e])
+
+    def neighbors(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """节点的邻居数组及对应边权重（按邻居编号升序）"""
+        arcs = self.read_nodes(node, node + 1)
+        return arcs.v, arcs.w
+
+    def iter_blocks(self) -> Iterator[EdgeArrays]:
+        """按顺序逐块产生所有弧"""
+        for i in range(self.num_blocks):
+            yield EdgeArrays(*self._block(i))
+
+    def to_graph(self) -> GraphInstance:
+        """解压全部块，构建带CSR的 GraphInstance"""
+        arcs = self._gather(0, self.num_blocks - 1, 0, self.num_arcs)
+        indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arcs.u, minlength=self.n), out=indptr[1:])
+        forward = arcs.u < arcs.v
+        graph = GraphInstance(
+            name=self.name,
+            n=self.n,
+            m=self.m,
+            edges=None,
+            meta=self.meta,
+            edge_array=EdgeArrays(arcs.u[forward], arcs.v[forward], arcs.w[forward])
+        )
+        graph._csr = CSRGraph(indptr, arcs.v, arcs.w)
+        return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert graphs to a seekable block-compressed format and read ranges')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert a graph file')
+    convert_parser.add_argument('input', help='Graph data file (.txt/.gz/.xz/.parts)')
+    convert_parser.add_argument('-o', '--output', help='Output file (default: <name>.blk next to input)')
+    convert_parser.add_argument('--block-arcs', type=int, default=DEFAULT_BLOCK_ARCS,
+                                help=f'Arcs per block (default: {DEFAULT_BLOCK_ARCS})')
+    convert_parser.add_argument('--codec', choices=sorted(_CODECS), default='zlib', help='Block codec (default: zlib)')
+    convert_parser.add_argument('--spill-dir', help='Directory for external sort runs')
+
+    info_parser = subparsers.add_parser('info', help='Show file header')
+    info_parser.add_argument('file', help='Block-compressed graph file')
+
+    neighbors_parser = subparsers.add_parser('neighbors', help='Print neighbors of a node')
+    neighbors_parser.add_argument('file', help='Block-compressed graph file')
+    neighbors_parser.add_argument('node', type=int, help='0-based node id')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'convert':
+        convert_to_blocks(args.input, args.output, args.block_arcs, args.codec, spill_dir=args.spill_dir)
+        return
+
+    with BlockGraphReader(args.file) as reader:
+        if args.command == 'info':
+            print(f"图: {reader.name}")
+            print(f"节点数: {reader.n}, 边数: {reader.m}, 弧数: {reader.num_arcs}")
+            print(f"块数: {reader.num_blocks}, 压缩方式: {reader.header['codec']}")
+        else:
+            if not 0 <= args.node < reader.n:
+                print(f"节点编号超出范围: {args.node}", file=sys.stderr)
+                sys.exit(1)
+            targets, weights = reader.neighbors(args.node)
+            print(f"节点 {args.node} 的度数: {len(targets)}")
+            for t, w in zip(targets.tolist(), weights.tolist()):
+                print(f"{t} {w}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+数据集目录索引（catalog）
+为 processed/ 下的每个数据文件记录问题类型、名称、n、m、k、密度、压缩前后大小、
+压缩格式和校验和，保存为单个JSON索引文件，并提供按字段筛选的查询接口。
+
+重建索引是增量的：文件的mtime和大小都未变化时直接复用已有记录。
+
+用法示例:
+    python3 scripts/catalog.py build processed/
+    python3 scripts/catalog.py select problem=graph_coloring n__lt=500
+
+    from catalog import Catalog
+    catalog = Catalog.build("processed/")
+    for entry in catalog.select(problem="graph_coloring", n__lt=500):
+        print(entry.path, entry.n, entry.m)
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing as mp
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .unified_loader import (probe_header, find_data_files, uncompressed_size,
+                                 is_parts_dir, source_stat, atomic_write, BINARY_SUFFIX)
+    from .graph_cache import file_sha256
+    from .parse_gc import get_size_category
+except ImportError:
+    from unified_loader import (probe_header, find_data_files, uncompressed_size,
+                                is_parts_dir, source_stat, atomic_write, BINARY_SUFFIX)
+    from graph_cache import file_sha256
+    from parse_gc import get_size_category
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+CATALOG_FILE = "catalog.json"
+
+
+@dataclass
+class CatalogEntry:
+    """
+    单个数据文件的索引记录
+
+    tier 是文件所在的规模目录名。各解析脚本划分目录时使用的阈值并不一致
+    （parse_gc.py 按 n<1000 为tiny，parse_npp.py 按 n<=100 为tiny），
+    因此另外记录 size_category：对所有问题统一使用 get_size_category 按 n 计算。
+
+    n、m、k 取自文件头部，不解析数据主体。部分图着色文件头部的 m 是原始边行数
+    （正反方向各计一次），此时 density 会偏大，精确边数需要加载后查看 num_edges。
+    """
+    path: str
+    problem: Optional[str]
+    name: Optional[str]
+    n: Optional[int]
+    m: Optional[int]
+    k: Optional[int]
+    density: Optional[float]
+    tier: str
+    size_category: Optional[str]
+    compressed_bytes: int
+    uncompressed_bytes: Optional[int]
+    codec: str
+    sha256: str
+    mtime_ns: int
+    error: str = ""
+
+
+def _codec(path: str) -> str:
+    if is_parts_dir(path):
+        return "xz-parts"
+    if path.endswith(BINARY_SUFFIX):
+        return "binary"
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".xz"):
+        return "xz"
+    return "none"
+
+
+def _graph_density(n: Optional[int], m: Optional[int]) -> Optional[float]:
+    """无向简单图的边密度 2m / (n(n-1))"""
+    if n is None or m is None or n < 2:
+        return None
+    return 2.0 * m / (n * (n - 1))
+
+
+def scan_file(root: str, path: str) -> CatalogEntry:
+    """
+    为单个数据文件生成索引记录（只读取头部，不解析数据主体）
+
+    头部读取失败（例如文件仍是Git LFS指针）时，仍记录大小和校验和，
+    错误信息写入 error 字段。
+
+    Args:
+        root: 数据根目录，记录中的路径相对于该目录
+        path: 数据文件路径
+
+    Returns:
+        CatalogEntry: 索引记录
+    """
+    size, mtime_ns = source_stat(path)
+    entry = CatalogEntry(
+        path=os.path.relpath(path, root),
+        problem=None,
+        name=None,
+        n=None,
+        m=None,
+        k=None,
+        density=None,
+        tier=os.path.basename(os.path.dirname(path)),
+        size_category=None,
+        compressed_bytes=size,
+        uncompressed_bytes=None,
+        codec=_codec(path),
+        sha256=file_sha256(path),
+        mtime_ns=mtime_ns
+    )
+    try:
+        info = probe_header(path)
+        entry.uncompressed_bytes = uncompressed_size(path)
+    except Exception as e:
+        entry.error = str(e)
+        return entry
+
+    entry.problem = info.problem
+    entry.name = info.name
+    entry.n = info.n
+    entry.m = info.m
+    entry.k = info.k
+    entry.density = _graph_density(info.n, info.m)
+    if info.n is not None:
+        entry.size_category = get_size_category(info.n)
+    return entry
+
+
+def _scan_worker(args: Tuple[str, str]) -> CatalogEntry:
+    root, path = args
+    return scan_file(root, path)
+
+
+# 查询条件后缀到比较函数的映射，例如 n__lt=500
+_LOOKUPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "lt": lambda a, b: a < b,
+    "le": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "ge": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "contains": lambda a, b: b in a,
+}
+
+_FIELD_NAMES = {f.name for f in fields(CatalogEntry)}
+
+
+def _parse_condition(key: str) -> Tuple[str, str]:
+    field_name, _, op = key.partition("__")
+    op = op or "eq"
+    if field_name not in _FIELD_NAMES:
+        raise ValueError(f"未知的索引字段: {field_name}")
+    if op not in _LOOKUPS:
+        raise ValueError(f"未知的查询条件: {op}（可用: {', '.join(_LOOKUPS)}）")
+    return field_name, op
+
+
+class Catalog:
+    """
+    数据集索引
+
+    entries 以相对于数据根目录的路径为键。
+    """
+
+    def __init__(self, root: str, entries: Optional[Dict[str, CatalogEntry]] = None):
+        self.root = root
+        self.entries: Dict[str, CatalogEntry] = entries or {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        return iter(self.entries.values())
+
+    @staticmethod
+    def default_path(root: str) -> str:
+        return os.path.join(root, CATALOG_FILE)
+
+    @classmethod
+    def load(cls, path: str, root: Optional[str] = None) -> "Catalog":
+        """
+        读取索引文件
+
+        Args:
+            path: 索引文件路径
+            root: 数据根目录，默认为索引文件所在目录
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError(f"索引文件版本不匹配: {data.get('version')}")
+        root = root or os.path.dirname(os.path.abspath(path))
+        entries = {rec["path"]: CatalogEntry(**rec) for rec in data["entries"]}
+        return cls(root, entries)
+
+    def save(self, path: Optional[str] = None):
+        """把索引原子写入文件（默认 <root>/catalog.json）"""
+        path = path or self.default_path(self.root)
+        data = {
+            "version": CATALOG_VERSION,
+            "entries": [asdict(self.entries[key]) for key in sorted(self.entries)]
+        }
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def build(cls, root: str = "processed/", path: Optional[str] = None,
+              workers: int = 1, save: bool = True) -> "Catalog":
+        """
+        增量构建索引
+
+        已有索引中 mtime 和大小都未变化的文件直接复用记录，其余文件重新扫描；
+        已删除的文件从索引中移除。
+
+        Args:
+            root: 数据根目录
+            path: 索引文件路径，默认 <root>/catalog.json
+            workers: 扫描文件的进程数
+            save: 是否写回索引文件
+
+        Returns:
+            Catalog: 构建好的索引
+        """
+        path = path or cls.default_path(root)
+        old: Dict[str, CatalogEntry] = {}
+        if os.path.exists(path):
+            try:
+                old = cls.load(path, root).entries
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"无法读取已有索引，将完全重建: {path} ({e})")
+
+        entries: Dict[str, CatalogEntry] = {}
+        stale = []
+        for file_path in find_data_files(root):
+            rel = os.path.relpath(file_path, root)
+            size, mtime_ns = source_stat(file_path)
+            prev = old.get(rel)
+            if prev and prev.mtime_ns == mtime_ns and prev.compressed_bytes == size:
+                entries[rel] = prev
+            else:
+                stale.append(file_path)
+
+        jobs = [(root, file_path) for file_path in stale]
+        if workers > 1 and len(jobs) > 1:
+            with mp.Pool(min(workers, len(jobs))) as pool:
+                scanned = pool.map(_scan_worker, jobs, chunksize=8)
+        else:
+            scanned = [_scan_worker(job) for job in jobs]
+        for entry in scanned:
+            entries[entry.path] = entry
+
+        logger.info(f"索引共 {len(entries)} 个文件，重新扫描 {len(stale)} 个，"
+                    f"移除 {len(set(old) - set(entries))} 个")
+        catalog = cls(root, entries)
+        if save:
+            catalog.save(path)
+        return catalog
+
+    def select(self, include_errors: bool = False, **conditions) -> List[CatalogEntry]:
+        """
+        按条件筛选索引记录
+
+        条件写作 字段=值 或 字段__比较=值，比较方式有
+        eq, ne, lt, le, gt, ge, in, contains。字段值为None的记录不满足任何比较条件。
+
+        示例:
+            catalog.select(problem="graph_coloring", n__lt=500)
+            catalog.select(codec__in=("gzip", "xz"), density__gt=0.1)
+
+        Args:
+            include_errors: 是否包含头部读取失败的记录
+            **conditions: 筛选条件
+
+        Returns:
+            按路径排序的匹配记录列表
+        """
+        parsed = [(*_parse_condition(key), value) for key, value in conditions.items()]
+        result = []
+        for key in sorted(self.entries):
+            entry = self.entries[key]
+            if entry.error and not include_errors:
+                continue
+            for field_name, op, value in parsed:
+                actual = getattr(entry, field_name)
+                if actual is None or not _LOOKUPS[op](actual, value):
+                    break
+            else:
+                result.append(entry)
+        return result
+
+    def paths(self, **conditions) -> List[str]:
+        """返回匹配记录的文件路径（已拼接数据根目录），可直接传给 load_instance"""
+        return [os.path.join(self.root, entry.path) for entry in self.select(**conditions)]
+
+
+def _parse_cli_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the dataset catalog')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Build or incrementally update the catalog')
+    build_parser.add_argument('root', nargs='?', default='processed/', help='Dataset root directory (default: processed/)')
+    build_parser.add_argument('--output', help='Catalog file (default: <root>/catalog.json)')
+    build_parser.add_argument('--workers', type=int, default=mp.cpu_count(),
+                              help='Number of worker processes (default: number of CPUs)')
+
+    select_parser = subparsers.add_parser('select', help='Query the catalog')
+    select_parser.add_argument('conditions', nargs='*', help='Conditions such as problem=graph_coloring n__lt=500')
+    select_parser.add_argument('--root', default='processed/', help='Dataset root directory (default: processed/)')
+    select_parser.add_argument('--catalog', help='Catalog file (default: <root>/catalog.json)')
+    select_parser.add_argument('--json', action='store_true', help='Output one JSON object per line')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        catalog = Catalog.build(args.root, args.output, workers=args.workers)
+        failed = sum(1 for entry in catalog if entry.error)
+        print(f"索引已写入 {args.output or Catalog.default_path(args.root)}："
+              f"{len(catalog)} 个文件，头部读取失败 {failed} 个，"
+              f"耗时 {time.perf_counter() - start:.2f} 秒")
+        return
+
+    catalog_path = args.catalog or Catalog.default_path(args.root)
+    if not os.path.exists(catalog_path):
+        print(f"索引文件不存在，请先运行 build: {catalog_path}", file=sys.stderr)
+        sys.exit(1)
+    catalog = Catalog.load(catalog_path, args.root)
+
+    conditions = {}
+    for cond in args.conditions:
+        key, sep, value = cond.partition('=')
+        if not sep:
+            parser.error(f"条件格式应为 字段=值: {cond}")
+        conditions[key] = _parse_cli_value(value)
+
+    try:
+        matches = catalog.select(**conditions)
+    except ValueError as e:
+        parser.error(str(e))
+    for entry in matches:
+        if args.json:
+            print(json.dumps(asdict(entry), ensure_ascii=False))
+        else:
+            m = entry.m if entry.m is not None else '-'
+            k = entry.k if entry.k is not None else '-'
+            print(f"{entry.problem:<22} {entry.name:<32} n={entry.n:<10} m={m:<12} k={k:<4} {entry.path}")
+    print(f"\n匹配 {len(matches)} 个文件", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+图的批处理
+把多个 GraphInstance 拼接为一个块对角的大图（GNN 训练中的 mini-batch），
+节点和边按图依次编号，并记录每个节点所属的图。提供逆操作把批次拆回单个图或按图拆分节点输出，
+以及按规模分桶的批次采样器，使同一批次内的图大小相近。
+
+    from graph_batch import collate_graphs, split_batch, BucketBatchSampler
+
+    sampler = BucketBatchSampler.from_paths(paths, batch_size=32)
+    for indices in sampler:
+        batch = collate_graphs([load_instance(paths[i]) for i in indices])
+        logits = model(batch.edge_index(), batch.batch)     # 形状 (batch.n, k)
+        per_graph = batch.split_nodes(logits)              # 每个图一个 (n_i, k) 数组
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .unified_loader import (GraphInstance, EdgeArrays, CSRGraph, Header, probe_header,
+                                 _index_dtype)
+except ImportError:
+    from unified_loader import (GraphInstance, EdgeArrays, CSRGraph, Header, probe_header,
+                                _index_dtype)
+
+
+@dataclass
+class GraphBatch:
+    """
+    块对角拼接的图批次
+
+    第 i 个图的节点为 node_offsets[i]:node_offsets[i+1]，边为 edge_offsets[i]:edge_offsets[i+1]；
+    edges 中的节点编号已加上所在图的偏移（仍满足 u < v，每条无向边一次）。
+    """
+    names: List[str]
+    metas: List[Header]
+    num_nodes: np.ndarray      # int64, 每个图的节点数
+    num_edges: np.ndarray      # int64, 每个图的边数
+    node_offsets: np.ndarray   # int64, 长度 B+1
+    edge_offsets: np.ndarray   # int64, 长度 B+1
+    batch: np.ndarray          # 每个节点所属的图编号，长度 n
+    edges: EdgeArrays          # COO，全局节点编号
+    _csr: Optional[CSRGraph] = field(default=None, repr=False, compare=False)
+
+    @property
+    def num_graphs(self) -> int:
+        return len(self.names)
+
+    @property
+    def n(self) -> int:
+        return int(self.node_offsets[-1])
+
+    @property
+    def m(self) -> int:
+        return int(self.edge_offsets[-1])
+
+    def __len__(self) -> int:
+        return self.num_graphs
+
+    @property
+    def csr(self) -> CSRGraph:
+        """块对角CSR，首次访问时构建并缓存"""
+        if self._csr is None:
+            self._csr = CSRGraph.from_edge_arrays(self.edges, self.n)
+        return self._csr
+
+    def edge_index(self) -> np.ndarray:
+        """两个方向的弧组成的 (2, 2m) 数组（源节点, 目标节点），按CSR顺序排列"""
+        csr = self.csr
+        src = np.repeat(np.arange(self.n, dtype=csr.indices.dtype), csr.degrees())
+        return np.stack((src, csr.indices))
+
+    def edge_batch(self) -> np.ndarray:
+        """每条边（edges 中的顺序）所属的图编号"""
+        return np.repeat(np.arange(self.num_graphs, dtype=np.int64), self.num_edges)
+
+    def split_nodes(self, values: np.ndarray) -> List[np.ndarray]:
+        """把按节点排列的数组（第一维长度为 n）拆分为每个图一段（视图）"""
+        if len(values) != self.n:
+            raise ValueError(f"数组长度 {len(values)} 与批次节点数 {self.n} 不一致")
+        return np.split(values, self.node_offsets[1:-1])
+
+    def split_edges(self, values: np.ndarray) -> List[np.ndarray]:
+        """把按边排列的数组（第一维长度为 m，与 edges 顺序一致）拆分为每个图一段（视图）"""
+        if len(values) != self.m:
+            raise ValueError(f"数组长度 {len(values)} 与批次边数 {self.m} 不一致")
+        return np.split(values, self.edge_offsets[1:-1])
+
+
+def _node_count(graph: GraphInstance) -> int:
+    """节点数；边引用了超出头部 n 的节点时按实际最大编号扩展（与 CSRGraph 一致）"""
+    edges = graph.edge_array
+    if len(edges) == 0:
+        return graph.n
+    return max(graph.n, int(max(edges.u.max(), edges.v.max())) + 1)
+
+
+def collate_graphs(graphs: Sequence[GraphInstance]) -> GraphBatch:
+    """
+    把一组图拼接为块对角批次
+
+    所有图都已构建CSR时直接拼接各自的CSR数组，否则在首次访问 batch.csr 时由拼接后的边数组构建。
+
+    Args:
+        graphs: GraphInstance 列表
+
+    Returns:
+        GraphBatch: 批次，节点编号按图依次偏移
+    """
+    if not graphs:
+        raise ValueError("graphs 不能为空")
+    parts = [g.edge_array for g in graphs]
+    num_nodes = np.fromiter((_node_count(g) for g in graphs), dtype=np.int64, count=len(graphs))
+    num_edges = np.fromiter((len(e) for e in parts), dtype=np.int64, count=len(graphs))
+    node_offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+    np.cumsum(num_nodes, out=node_offsets[1:])
+    edge_offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+    np.cumsum(num_edges, out=edge_offsets[1:])
+    total_nodes = int(node_offsets[-1])
+
+    idx_dtype = _index_dtype(total_nodes - 1)
+    shift = np.repeat(node_offsets[:-1], num_edges).astype(idx_dtype, copy=False)
+    u = np.concatenate([e.u for e in parts]).astype(idx_dtype, copy=False) + shift
+    v = np.concatenate([e.v for e in parts]).astype(idx_dtype, copy=False) + shift
+    w = np.concatenate([e.w for e in parts])
+    batch_ids = np.repeat(np.arange(len(graphs), dtype=np.int64), num_nodes)
+
+    result = GraphBatch(
+        names=[g.name for g in graphs],
+        metas=[g.meta for g in graphs],
+        num_nodes=num_nodes,
+        num_edges=num_edges,
+        node_offsets=node_offsets,
+        edge_offsets=edge_offsets,
+        batch=batch_ids,
+        edges=EdgeArrays(u, v, w),
+    )
+    if all(g._csr is not None and g._csr.n == n for g, n in zip(graphs, num_nodes.tolist())):
+        result._csr = _concat_csr([g._csr for g in graphs], node_offsets, idx_dtype)
+    return result
+
+
+def _concat_csr(csrs: List[CSRGraph], node_offsets: np.ndarray, idx_dtype: np.dtype) -> CSRGraph:
+    """拼接各图的CSR数组：indptr 按弧数偏移，indices 按节点数偏移"""
+    arcs = np.fromiter((len(c.indices) for c in csrs), dtype=np.int64, count=len(csrs))
+    arc_offsets = np.concatenate(([0], np.cumsum(arcs)))
+    indptr = np.concatenate([c.indptr[:-1] + arc_offsets[i] for i, c in enumerate(csrs)]
+                            + [arc_offsets[-1:]])
+    indices = np.concatenate([c.indices for c in csrs]).astype(idx_dtype, copy=False)
+    indices = indices + np.repeat(node_offsets[:-1], arcs).astype(idx_dtype, copy=False)
+    weights = np.concatenate([c.weights for c in csrs])
+    return CSRGraph(indptr, indices, weights)
+
+
+def split_batch(batch: GraphBatch) -> List[GraphInstance]:
+    """
+    collate_graphs 的逆操作：把批次拆回单个图
+
+    返回的图的边数组是批次数组的切片再减去节点偏移（新数组），节点编号从0开始。
+    """
+    graphs = []
+    edges = batch.edges
+    for i in range(batch.num_graphs):
+        s, e = int(batch.edge_offsets[i]), int(batch.edge_offsets[i + 1])
+        offset = int(batch.node_offsets[i])
+        n = int(batch.num_nodes[i])
+        graphs.append(GraphInstance(
+            name=batch.names[i],
+            n=n,
+            m=e - s,
+            edges=None,
+            meta=batch.metas[i],
+            edge_array=EdgeArrays.from_arrays(edges.u[s:e] - offset, edges.v[s:e] - offset, edges.w[s:e]),
+        ))
+    return graphs
+
+
+class BucketBatchSampler:
+    """
+    按规模分桶的批次采样器
+
+    规模按 size_ratio 的对数刻度分桶（默认每个桶内最大与最小规模相差不超过2倍），
+    桶内打乱后切分为批次，再打乱所有批次的顺序。每次迭代产生一个批次的下标列表，
+    可直接作为 PyTorch DataLoader 的 batch_sampler 使用。
+    """
+
+    def __init__(self, sizes: Sequence[int], batch_size: int, size_ratio: float = 2.0,
+                 max_batch_size: Optional[int] = None, shuffle: bool = True,
+                 drop_last: bool = False, seed: int = 0):
+        """
+        Args:
+            sizes: 每个实例的规模（如节点数或边数）
+            batch_size: 每批次最多的实例数
+            size_ratio: 同一个桶内规模的最大比值，必须大于1
+            max_batch_size: 每批次规模之和的上限（如节点总数），单个实例超过上限时单独成批
+            shuffle: 是否打乱桶内顺序和批次顺序
+            drop_last: 是否丢弃各桶中不足 batch_size 的最后一个批次
+            seed: 随机种子，与 set_epoch 设置的轮次共同决定打乱顺序
+        """
+        if batch_size <= 0:
+            raise ValueError(f"batch_size 必须为正数，得到: {batch_size}")
+        if size_ratio <= 1:
+            raise ValueError(f"size_ratio 必须大于1，得到: {size_ratio}")
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+        keys = np.floor(np.log(np.maximum(self.sizes, 1)) / math.log(size_ratio)).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        self.buckets: List[np.ndarray] = [b for b in np.split(order, bounds) if len(b)]
+
+    @classmethod
+    def from_paths(cls, paths: Sequence[str], batch_size: int, key: str = "n",
+                   **kwargs) -> "BucketBatchSampler":
+        """
+        由数据文件的头部信息确定规模（不加载数据）
+
+        Args:
+            paths: 数据文件路径
+            batch_size: 每批次最多的实例数
+            key: 作为规模的头部字段，"n" 或 "m"
+        """
+        sizes = []
+        for path in paths:
+            value = getattr(probe_header(path), key)
+            if value is None:
+                raise ValueError(f"文件头部缺少 {key}: {path}")
+            sizes.append(value)
+        return cls(sizes, batch_size, **kwargs)
+
+    def set_epoch(self, epoch: int):
+        """设置轮次，使每轮的打乱顺序不同且可复现"""
+        self.epoch = epoch
+
+    def _batches(self) -> List[List[int]]:
+        rng = np.random.default_rng((self.seed, self.epoch))
+        batches = []
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = rng.permutation(bucket)
+            current: List[int] = []
+            total = 0
+            for index, size in zip(bucket.tolist(), self.sizes[bucket].tolist()):
+                full = len(current) >= self.batch_size or (
+                    self.max_batch_size is not None and current and total + size > self.max_batch_size)
+                if full:
+                    batches.append(current)
+                    current, total = [], 0
+                current.append(index)
+                total += size
+            if current and not (self.drop_last and len(current) < self.batch_size):
+                batches.append(current)
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._batches())
+
+    def __len__(self) -> int:
+        return len(self._batches())
+
+    def bucket_ranges(self) -> List[Dict[str, int]]:
+        """各桶的实例数和规模范围"""
+        return [{"count": len(b), "min": int(self.sizes[b].min()), "max": int(self.sizes[b].max())}
+                for b in self.buckets]
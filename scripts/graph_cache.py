@@ -0,0 +1,278 @@
+"""
+图数据二进制旁路缓存
+首次解析后把边数组和CSR数组写入二进制缓存文件，之后通过mmap零拷贝加载
+
+缓存文件以源文件内容的SHA-256命名，源文件变化后自然失效；
+缓存目录总大小超过上限时按最近使用时间（LRU）淘汰。
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple, Any
+
+import numpy as np
+
+try:
+    from .unified_loader import is_parts_dir, part_files, source_stat, atomic_write
+except ImportError:
+    from unified_loader import is_parts_dir, part_files, source_stat, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件格式: MAGIC | uint64 头部长度 | JSON头部 | 按64字节对齐的原始数组
+CACHE_MAGIC = b"COGCACHE"
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".bin"
+_ALIGN = 64
+_INDEX_FILE = "index.json"
+_HASH_BLOCK = 1 << 20
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "co-benchmark")
+DEFAULT_MAX_BYTES = 4 << 30  # 4GB
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的SHA-256，分卷目录按拼接顺序对所有分卷计算"""
+    h = hashlib.sha256()
+    for source in (part_files(path) if is_parts_dir(path) else [path]):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_sidecar(path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """
+    把头部信息和数组写入二进制缓存文件（先写临时文件再原子替换）
+
+    Args:
+        path: 输出文件路径
+        header: 可JSON序列化的头部信息
+        arrays: 数组名到数组的映射
+    """
+    layout = {}
+    header = dict(header, version=CACHE_VERSION, arrays=layout)
+    for name, arr in arrays.items():
+        layout[name] = {"dtype": arr.dtype.newbyteorder("<").str, "shape": list(arr.shape), "offset": 0}
+
+    # 数组偏移量的位数会影响头部长度，反复计算直到偏移量稳定
+    while True:
+        head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        offset = _align(len(CACHE_MAGIC) + 8 + len(head))
+        changed = False
+        for name, arr in arrays.items():
+            if layout[name]["offset"] != offset:
+                layout[name]["offset"] = offset
+                changed = True
+            offset = _align(offset + arr.nbytes)
+        if not changed:
+            break
+
+    with atomic_write(path) as f:
+        f.write(CACHE_MAGIC)
+        f.write(len(head).to_bytes(8, "little"))
+        f.write(head)
+        for name, arr in arrays.items():
+            f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(arr, dtype=layout[name]["dtype"]).tobytes())
+
+
+def read_sidecar(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    通过mmap读取二进制缓存文件，返回的数组直接引用映射内存（只读）
+
+    Args:
+        path: 缓存文件路径
+
+    Returns:
+        (header, arrays): 头部信息和数组映射
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    try:
+        if mm[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError(f"不是有效的缓存文件: {path}")
+        head_len = int.from_bytes(mm[len(CACHE_MAGIC):len(CACHE_MAGIC) + 8], "little")
+        start = len(CACHE_MAGIC) + 8
+        header = json.loads(mm[start:start + head_len].decode("utf-8"))
+        if header.get("version") != CACHE_VERSION:
+            raise ValueError(f"缓存文件版本不匹配: {header.get('version')}")
+
+        for name, spec in header.pop("arrays").items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(mm, dtype=dtype, count=count,
+                                         offset=spec["offset"]).reshape(spec["shape"])
+    except Exception:
+        # 文件损坏或被截断：先释放已创建的数组视图，再关闭映射
+        arrays.clear()
+        mm.close()
+        raise
+    return header, arrays
+
+
+class SidecarCache:
+    """
+    以源文件内容哈希为键的二进制缓存目录
+
+    为了避免每次都重新计算哈希，目录中的 index.json 记录了
+    (真实路径, mtime, 大小) 到内容哈希的映射；源文件的mtime或大小变化时重新计算。
+    索引在内存中保留一份副本，只有 index.json 被修改（例如其他进程写入）时才重新读取；
+    淘汰缓存文件时同时删除源文件已不存在的索引项。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 缓存目录，默认 ~/.cache/co-benchmark
+            max_bytes: 缓存目录中缓存文件的总大小上限（字节）
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 内存中的索引副本，index.json 的 (mtime_ns, 大小) 未变化时不重新读取
+        self._index: Optional[Dict[str, Any]] = None
+        self._index_stamp: Optional[Tuple[int, int]] = None
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, _INDEX_FILE)
+
+    def _index_file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._index_path())
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load_index(self) -> Dict[str, Any]:
+        stamp = self._index_file_stamp()
+        if self._index is not None and stamp == self._index_stamp:
+            return self._index
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        self._index, self._index_stamp = index, stamp
+        return index
+
+    def _save_index(self, index: Dict[str, Any]):
+        with atomic_write(self._index_path(), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        self._index, self._index_stamp = index, self._index_file_stamp()
+
+    def _prune_index(self) -> int:
+        """删除源文件已不存在的索引项，返回删除的项数"""
+        index = self._load_index()
+        stale = [source for source in index if not os.path.exists(source)]
+        for source in stale:
+            del index[source]
+        if stale:
+            self._save_index(index)
+        return len(stale)
+
+    def source_key(self, source_path: str) -> str:
+        """返回源文件的内容哈希，stat信息未变化时复用已记录的哈希"""
+        real = os.path.realpath(source_path)
+        size, mtime_ns = source_stat(real)
+        index = self._load_index()
+        entry = index.get(real)
+        if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+            return entry["sha256"]
+
+        digest = file_sha256(real)
+        index[real] = {"mtime_ns": mtime_ns, "size": size, "sha256": digest}
+        self._save_index(index)
+        return digest
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def get(self, source_path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """
+        读取源文件对应的缓存
+
+        Returns:
+            命中时返回 (header, arrays)，未命中或缓存损坏时返回None
+        """
+        path = self.entry_path(self.source_key(source_path))
+        if not os.path.exists(path):
+            return None
+        try:
+            result = read_sidecar(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"缓存文件损坏，已删除: {path} ({e})")
+            self._remove(path)
+            return None
+        # 更新修改时间作为LRU的使用时间
+        os.utime(path)
+        return result
+
+    def put(self, source_path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        """写入源文件对应的缓存，并在超出容量时淘汰最久未使用的文件"""
+        key = self.source_key(source_path)
+        total = sum(arr.nbytes for arr in arrays.values())
+        if total > self.max_bytes:
+            logger.info(f"数据大小超过缓存上限，跳过缓存: {source_path}")
+            return
+        write_sidecar(self.entry_path(key), dict(header, source_sha256=key), arrays)
+        self.evict()
+
+    def entries(self):
+        """按最近使用时间从旧到新返回 (路径, 大小, mtime) 列表"""
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime))
+        result.sort(key=lambda e: e[2])
+        return result
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        淘汰最久未使用的缓存文件，直到总大小不超过上限
+
+        Returns:
+            删除的文件数
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"缓存淘汰了 {removed} 个文件")
+        self._prune_index()
+        return removed
+
+    def clear(self):
+        """清空缓存目录"""
+        self.evict(0)
+        if os.path.exists(self._index_path()):
+            os.remove(self._index_path())
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+小实例打包格式（.cobundle）
+tiny/small 目录中有数百个只有几百字节的压缩文件，逐个打开、解压和解析tar头部的开销远大于数据本身。
+打包文件把一个目录中的所有实例（解压后的文本）存入单个文件，文件尾部的索引按实例名称记录
+偏移和长度，按名称读取任意实例只需一次字典查找。
+
+文件格式: MAGIC | 数据区 | JSON索引 | uint64 索引长度 | MAGIC
+
+数据区有两种组织方式:
+    分帧（默认）: 每个实例单独压缩为一帧，只解压被读取的实例
+    整体（solid）: 所有实例拼接后整体压缩，压缩率更高，首次读取时解压一次并保留在内存中
+
+用法示例:
+    python3 scripts/instance_bundle.py pack processed/ --tiers tiny small
+    python3 scripts/instance_bundle.py list processed/number_partitioning/compressed/small.cobundle
+
+    from instance_bundle import BundleReader
+    with BundleReader("processed/number_partitioning/compressed/small.cobundle") as bundle:
+        instance = bundle.load("n015d10e00")
+        for name, instance in bundle.items():
+            ...
+"""
+
+import io
+import os
+import sys
+import json
+import mmap
+import zlib
+import lzma
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from . import load_stats as _load_stats
+    from .unified_loader import (GraphInstance, NPPInstance, LoadStats, parse_instance_bytes,
+                                 find_data_files, is_lfs_pointer, _open_binary, _read_header_block,
+                                 atomic_write, PARTS_SUFFIX)
+except ImportError:
+    import load_stats as _load_stats
+    from unified_loader import (GraphInstance, NPPInstance, LoadStats, parse_instance_bytes,
+                                find_data_files, is_lfs_pointer, _open_binary, _read_header_block,
+                                atomic_write, PARTS_SUFFIX)
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAGIC = b"COBUNDLE"
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = ".cobundle"
+DEFAULT_TIERS = ("tiny", "small")
+_TRAILER = 8 + len(BUNDLE_MAGIC)
+
+_CODECS = {
+    "none": (bytes, bytes),
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+Instance = Union[GraphInstance, NPPInstance]
+
+
+def _member_name(path: str, meta: Dict[str, str]) -> str:
+    """实例在打包文件中的名称：头部的 name 字段，缺失时取去掉扩展名的文件名"""
+    if meta.get("name"):
+        return meta["name"]
+    name = os.path.basename(path.rstrip(os.sep))
+    for suffix in (PARTS_SUFFIX, ".gz", ".xz", ".txt"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def pack_files(paths: List[str], output_path: str, codec: str = "zlib",
+               solid: bool = False) -> Dict[str, int]:
+    """
+    把一组数据文件打包为一个 .cobundle 文件
+
+    Args:
+        paths: 数据文件路径（支持 .txt/.gz/.xz）
+        output_path: 输出文件路径
+        codec: 压缩方式，none、zlib（解压快）或 lzma（压缩率高）
+        solid: 是否把所有实例拼接后整体压缩
+
+    Returns:
+        dict: members（打包的实例数）、raw_bytes（解压后总字节数）、bytes（输出文件大小）
+    """
+    if codec not in _CODECS:
+        raise ValueError(f"不支持的压缩方式: {codec}（可用: {', '.join(_CODECS)}）")
+    compress = _CODECS[codec][0]
+
+    members: Dict[str, Dict[str, Any]] = {}
+    frames: List[bytes] = []
+    position = 0
+    for path in paths:
+        with _open_binary(path) as f:
+            data = f.read()
+        meta, _ = _read_header_block(io.BytesIO(data))
+        name = _member_name(path, meta)
+        if name in members:
+            raise ValueError(f"实例名称重复: {name}（{members[name]['source']} 和 {path}）")
+        frame = data if solid else compress(data)
+        members[name] = {"offset": position, "nbytes": len(frame), "raw_nbytes": len(data),
+                         "source": os.path.basename(path), "meta": meta}
+        frames.append(frame)
+        position += len(frame)
+
+    payload = b"".join(frames)
+    raw_bytes = sum(member["raw_nbytes"] for member in members.values())
+    if solid:
+        payload = compress(payload)
+    footer = {
+        "version": BUNDLE_VERSION,
+        "codec": codec,
+        "solid": solid,
+        "raw_bytes": raw_bytes,
+        "data_nbytes": len(payload),
+        "members": members,
+    }
+    head = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    with atomic_write(output_path) as out:
+        out.write(BUNDLE_MAGIC)
+        out.write(payload)
+        out.write(head)
+        out.write(len(head).to_bytes(8, "little"))
+        out.write(BUNDLE_MAGIC)
+
+    size = os.path.getsize(output_path)
+    logger.info(f"打包完成: {output_path}（{len(members)} 个实例，{raw_bytes} -> {size} 字节）")
+    return {"members": len(members), "raw_bytes": raw_bytes, "bytes": size}
+
+
+class BundleReader:
+    """
+    打包文件的读取器
+
+    通过mmap读取文件，按名称定位实例为 O(1)。分帧格式每次读取只解压对应的帧；
+    整体压缩格式在首次读取时解压整个数据区，之后直接切片。可在多个线程中共享。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_footer()
+        except Exception:
+            self._mm.close()
+            raise
+        self._payload: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _read_footer(self):
+        mm = self._mm
+        if len(mm) < len(BUNDLE_MAGIC) + _TRAILER or mm[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC \
+                or mm[-len(BUNDLE_MAGIC):] != BUNDLE_MAGIC:
+            raise ValueError(f"不是有效的打包文件: {self.path}")
+        head_len = int.from_bytes(mm[-_TRAILER:-len(BUNDLE_MAGIC)], "little")
+        start = len(mm) - _TRAILER - head_len
+        footer = json.loads(mm[start:start + head_len].decode("utf-8"))
+        if footer.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"打包文件版本不匹配: {footer.get('version')}")
+
+        self._members: Dict[str, Dict[str, Any]] = footer.pop("members")
+        self.header: Dict[str, Any] = footer
+        self.codec: str = footer["codec"]
+        self.solid: bool = footer["solid"]
+        self._decompress = _CODECS[self.codec][1]
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._members
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def names(self) -> List[str]:
+        """所有实例名称（按打包顺序）"""
+        return list(self._members)
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._payload = None
+        self._mm.close()
+
+    def _member(self, name: str) -> Dict[str, Any]:
+        member = self._members.get(name)
+        if member is None:
+            raise KeyError(f"打包文件 {self.path} 中没有实例: {name}")
+        return member
+
+    def info(self, name: str) -> Dict[str, str]:
+        """实例的文本头部（problem、n、m 等），不需要解压"""
+        return dict(self._member(name)["meta"])
+
+    def source(self, name: str) -> str:
+        """实例打包前的源文件名"""
+        return self._member(name)["source"]
+
+    def _solid_payload(self) -> bytes:
+        with self._lock:
+            if self._payload is None:
+                start = len(BUNDLE_MAGIC)
+                self._payload = self._decompress(self._mm[start:start + self.header["data_nbytes"]])
+            return self._payload
+
+    def read_bytes(self, name: str) -> bytes:
+        """实例的完整文本内容（已解压）"""
+        member = self._member(name)
+        offset = member["offset"]
+        if self.solid:
+            return self._solid_payload()[offset:offset + member["raw_nbytes"]]
+        start = len(BUNDLE_MAGIC) + offset
+        return self._decompress(self._mm[start:start + member["nbytes"]])
+
+    def load(self, name: str, stats: Optional[LoadStats] = None) -> Instance:
+        """
+        按名称加载实例
+
+        Args:
+            name: 实例名称（见 names()）
+            stats: 分阶段统计对象，None 表示不统计（设置了全局钩子时自动创建）
+        """
+        member = self._member(name)
+        stats = _load_stats.resolve(stats)
+        with _load_stats.measure(stats, f"{self.path}:{name}"):
+            with _load_stats.stage(stats, _load_stats.STAGE_DECOMPRESS, member["raw_nbytes"]):
+                data = self.read_bytes(name)
+            if stats is not None:
+                stats.bytes_decompressed += len(data)
+            return parse_instance_bytes(data, name, stats)
+
+    def items(self) -> Iterator[Tuple[str, Instance]]:
+        """按打包顺序产生 (名称, 实例)"""
+        for name in self._members:
+            yield name, self.load(name)
+
+
+def bundle_path_for(directory: str, src_root: str, dst_root: str) -> str:
+    """规模目录对应的打包文件路径，例如 <dst_root>/number_partitioning/compressed/small.cobundle"""
+    rel = os.path.relpath(os.path.abspath(directory), os.path.abspath(src_root))
+    return os.path.join(dst_root, rel + BUNDLE_SUFFIX)
+
+
+def pack_tree(src_root: str, dst_root: Optional[str] = None, tiers: Tuple[str, ...] = DEFAULT_TIERS,
+              codec: str = "zlib", solid: bool = False) -> List[str]:
+    """
+    把数据目录中指定规模的每个目录打包为一个文件
+
+    Git LFS 指针文件（尚未 git lfs pull）不打包；目录中没有可用文件时不生成打包文件。
+
+    Args:
+        src_root: 数据集根目录（如 processed/）
+        dst_root: 输出根目录，默认与 src_root 相同（打包文件与规模目录并列）
+        tiers: 要打包的规模目录名
+        codec: 压缩方式
+        solid: 是否整体压缩
+
+    Returns:
+        生成的打包文件路径列表
+    """
+    dst_root = src_root if dst_root is None else dst_root
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for path in find_data_files(src_root):
+        directory = os.path.dirname(path.rstrip(os.sep))
+        if os.path.basename(directory) in tiers:
+            groups[directory].append(path)
+
+    outputs = []
+    for directory, paths in sorted(groups.items()):
+        usable = []
+        pointers = 0
+        for path in sorted(paths):
+            if path.endswith(PARTS_SUFFIX):
+                logger.warning(f"跳过分卷目录: {path}")
+                continue
+            if is_lfs_pointer(path):
+                pointers += 1
+                continue
+            usable.append(path)
+        if pointers:
+            logger.warning(f"{directory}: 跳过 {pointers} 个LFS指针文件（请先运行 git lfs pull）")
+        if not usable:
+            logger.warning(f"{directory} 中没有可打包的文件")
+            continue
+        output_path = bundle_path_for(directory, src_root, dst_root)
+        pack_files(usable, output_path, codec, solid)
+        outputs.append(output_path)
+    return outputs
+
+
+def verify_bundle(bundle_path: str, src_root: str, dst_root: str) -> int:
+    """逐个比较打包文件中的实例文本与源文件解压后的内容，返回不一致的实例数"""
+    directory = os.path.join(src_root, os.path.relpath(bundle_path, dst_root)[:-len(BUNDLE_SUFFIX)])
+    mismatches = 0
+    with BundleReader(bundle_path) as bundle:
+        for name in bundle:
+            source = os.path.join(directory, bundle.source(name))
+            with _open_binary(source) as f:
+                expected = f.read()
+            if bundle.read_bytes(name) != expected:
+                logger.error(f"内容不一致: {bundle_path}:{name}（源文件 {source}）")
+                mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack small instances into indexed bundle files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = subparsers.add_parser('pack', help='Pack tier directories of a dataset tree')
+    pack_parser.add_argument('src_root', help='Dataset root (e.g. processed/)')
+    pack_parser.add_argument('dst_root', nargs='?', help='Output root (default: next to tier directories)')
+    pack_parser.add_argument('--tiers', nargs='+', default=list(DEFAULT_TIERS),
+                             help=f'Tier directories to pack (default: {" ".join(DEFAULT_TIERS)})')
+    pack_parser.add_argument('--codec', choices=sorted(_CODECS), default='zlib', help='Codec (default: zlib)')
+    pack_parser.add_argument('--solid', action='store_true',
+                             help='Compress all members as one stream (smaller, decompressed once on first read)')
+    pack_parser.add_argument('--verify', action='store_true',
+                             help='Compare every member with its source file after packing')
+
+    list_parser = subparsers.add_parser('list', help='List members of a bundle')
+    list_parser.add_argument('file', help='Bundle file')
+
+    extract_parser = subparsers.add_parser('extract', help='Print the text of one member')
+    extract_parser.add_argument('file', help='Bundle file')
+    extract_parser.add_argument('name', help='Instance name')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'pack':
+        outputs = pack_tree(args.src_root, args.dst_root, tuple(args.tiers), args.codec, args.solid)
+        mismatches = 0
+        if args.verify:
+            mismatches = sum(verify_bundle(path, args.src_root, args.dst_root or args.src_root)
+                             for path in outputs)
+        print(f"生成 {len(outputs)} 个打包文件" + (f"，校验不一致 {mismatches} 个实例" if args.verify else ""))
+        if mismatches:
+            sys.exit(1)
+        return
+
+    with BundleReader(args.file) as bundle:
+        if args.command == 'list':
+            print(f"打包文件: {args.file}（{len(bundle)} 个实例，压缩方式: {bundle.codec}"
+                  f"{'，整体压缩' if bundle.solid else ''}）")
+            for name in bundle:
+                meta = bundle.info(name)
+                print(f"  {name:<32}{meta.get('problem', '-'):<22}n={meta.get('n', '-')}")
+        else:
+            if args.name not in bundle:
+                print(f"打包文件中没有实例: {args.name}", file=sys.stderr)
+                sys.exit(1)
+            sys.stdout.buffer.write(bundle.read_bytes(args.name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+共享内存实例服务
+同一节点上的多个训练/采样进程共享一份实例数据：服务进程把每个实例只加载一次，
+以边数组、CSR数组或数值数组（int64或uint64分段）的形式放入 multiprocessing.shared_memory，
+客户端按名称只读映射 /dev/shm 中的共享内存块，不复制数据。
+
+控制通道为本地Unix套接字，每行一个JSON请求/响应。服务按连接记录引用计数，
+客户端断开时自动释放其持有的引用；总大小超过上限时按LRU淘汰引用计数为0的实例。
+
+用法示例:
+    python3 scripts/instance_server.py --socket /tmp/co-bench.sock --max-mb 8192
+
+    from instance_server import InstanceClient
+    with InstanceClient("/tmp/co-bench.sock") as client:
+        graph = client.acquire("processed/graph_partitioning/compressed/large/citationCiteseer.txt.xz")
+        ...
+        client.release("processed/graph_partitioning/compressed/large/citationCiteseer.txt.xz")
+"""
+
+import os
+import sys
+import json
+import mmap
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Tuple, Union
+
+import numpy as np
+
+try:
+    from .unified_loader import (GraphInstance, NPPInstance, EdgeArrays, CSRGraph, InstanceCache,
+                                 load_instance)
+    from .limb_array import LimbArray
+except ImportError:
+    from unified_loader import (GraphInstance, NPPInstance, EdgeArrays, CSRGraph, InstanceCache,
+                                load_instance)
+    from limb_array import LimbArray
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/tmp/co-bench-instances.sock"
+DEFAULT_MAX_BYTES = 4 << 30  # 4GB
+_SHM_DIR = "/dev/shm"
+
+Instance = Union[GraphInstance, NPPInstance]
+ArraySpec = Tuple[str, str, Tuple[int, ...]]  # (共享内存名, dtype, shape)
+
+
+@dataclass
+class _Entry:
+    """服务端的一个共享实例"""
+    path: str
+    kind: str
+    info: Dict[str, Any]
+    segments: Dict[str, shared_memory.SharedMemory]
+    arrays: Dict[str, ArraySpec]
+    nbytes: int
+    refs: int = 0
+
+    def descriptor(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "info": self.info, "arrays": self.arrays}
+
+
+def _export_instance(path: str, instance: Instance) -> _Entry:
+    """把实例数组复制到共享内存块"""
+    if isinstance(instance, GraphInstance):
+        edges, csr = instance.edge_array, instance.csr
+        kind = "graph"
+        info = {"name": instance.name, "n": instance.n, "m": instance.m, "meta": instance.meta}
+        arrays = {"u": edges.u, "v": edges.v, "w": edges.w,
+                  "indptr": csr.indptr, "indices": csr.indices, "weights": csr.weights}
+    else:
+        kind = "npp"
+        info = {"name": instance.name, "n": instance.n, "meta": instance.meta}
+        values = instance.value_array
+        if isinstance(values, np.ndarray):
+            arrays = {"values": values}
+        else:
+            arrays = {"limbs": values.limbs}
+            if values.negative is not None:
+                arrays["negative"] = values.negative
+
+    segments, specs = {}, {}
+    try:
+        for key, arr in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            segments[key] = shm
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            specs[key] = (shm.name, arr.dtype.str, tuple(arr.shape))
+    except BaseException:
+        _unlink_segments(segments)
+        raise
+    nbytes = sum(arr.nbytes for arr in arrays.values())
+    return _Entry(path=path, kind=kind, info=info, segments=segments, arrays=specs, nbytes=nbytes)
+
+
+def _unlink_segments(segments: Dict[str, shared_memory.SharedMemory]):
+    for shm in segments.values():
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class InstanceServer:
+    """
+    共享内存实例表
+
+    以 (真实路径, mtime, 大小) 为键，同一文件并发请求时只加载一次。
+    可以直接在进程内调用 acquire/release，也可以通过 serve 提供Unix套接字服务。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 loader: Callable[[str], Instance] = load_instance):
+        """
+        Args:
+            max_bytes: 共享内存总大小上限（字节），超出后淘汰未被引用的实例
+            loader: 加载函数，默认 load_instance
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loader = loader
+        self._entries: "OrderedDict[Tuple[str, int, int], _Entry]" = OrderedDict()
+        self._loading: Dict[Tuple[str, int, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str) -> Tuple[Tuple[str, int, int], Dict[str, Any]]:
+        """
+        增加实例的引用计数，必要时先加载
+
+        Returns:
+            (键, 描述信息): 描述信息包含实例元数据和各数组的共享内存名
+        """
+        key = InstanceCache.key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refs += 1
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, entry.descriptor()
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # 加载过程不持有全局锁；同一文件的并发请求在 load_lock 上等待
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    self.hits += 1
+                    return key, entry.descriptor()
+            try:
+                entry = _export_instance(path, self._loader(path))
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+            entry.refs = 1
+            with self._lock:
+                self._entries[key] = entry
+                self._loading.pop(key, None)
+                self.nbytes += entry.nbytes
+                self.misses += 1
+                self._evict()
+            logger.info(f"已加载到共享内存: {path}（{entry.nbytes} 字节）")
+            return key, entry.descriptor()
+
+    def release(self, key: Tuple[str, int, int]):
+        """减少实例的引用计数"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refs <= 0:
+                raise ValueError(f"实例未被引用: {key[0]}")
+            entry.refs -= 1
+            self._evict()
+
+    def _evict(self):
+        # 调用方持有 self._lock
+        for key in list(self._entries):
+            if self.nbytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs > 0:
+                continue
+            del self._entries[key]
+            self.nbytes -= entry.nbytes
+            self.evictions += 1
+            _unlink_segments(entry.segments)
+            logger.info(f"淘汰共享实例: {entry.path}")
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中、未命中、淘汰次数以及各实例的引用计数"""
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "entries": [{"path": e.path, "bytes": e.nbytes, "refs": e.refs}
+                            for e in self._entries.values()],
+            }
+
+    def close(self):
+        """释放所有共享内存块"""
+        with self._lock:
+            for entry in self._entries.values():
+                _unlink_segments(entry.segments)
+            self._entries.clear()
+            self.nbytes = 0
+
+    def serve(self, socket_path: str = DEFAULT_SOCKET):
+        """在Unix套接字上提供服务，直到收到 shutdown 请求或被中断"""
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _ControlServer(socket_path, _ControlHandler)
+        server.instances = self
+        logger.info(f"实例服务已启动: {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.close()
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    instances: InstanceServer
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接；连接断开时释放该连接持有的全部引用"""
+
+    def handle(self):
+        instances: InstanceServer = self.server.instances
+        held: Counter = Counter()
+        paths: Dict[str, Tuple[str, int, int]] = {}
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    if op == "acquire":
+                        path = os.path.abspath(request["path"])
+                        key, descriptor = instances.acquire(path)
+                        held[key] += 1
+                        paths[path] = key
+                        response = {"ok": True, **descriptor}
+                    elif op == "release":
+                        path = os.path.abspath(request["path"])
+                        key = paths.get(path)
+                        if key is None or held[key] <= 0:
+                            raise ValueError(f"当前连接未持有该实例: {path}")
+                        instances.release(key)
+                        held[key] -= 1
+                        response = {"ok": True}
+                    elif op == "stats":
+                        response = {"ok": True, **instances.stats()}
+                    elif op == "shutdown":
+                        self._send({"ok": True})
+                        threading.Thread(target=self.server.shutdown, daemon=True).start()
+                        return
+                    else:
+                        raise ValueError(f"未知的请求: {op}")
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                self._send(response)
+        finally:
+            for key, count in held.items():
+                for _ in range(count):
+                    try:
+                        instances.release(key)
+                    except ValueError:
+                        pass
+
+    def _send(self, response: Dict[str, Any]):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+def _attach(spec: ArraySpec) -> np.ndarray:
+    """只读映射 /dev/shm 中的共享内存块（不经过 resource_tracker，客户端退出不会删除它）"""
+    name, dtype, shape = spec
+    dtype = np.dtype(dtype)
+    count = int(np.prod(shape, dtype=np.int64))
+    fd = os.open(os.path.join(_SHM_DIR, name.lstrip("/")), os.O_RDONLY)
+    try:
+        mm = mmap.mmap(fd, max(count * dtype.itemsize, 1), access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    return np.frombuffer(mm, dtype=dtype, count=count).reshape(shape)
+
+
+class InstanceClient:
+    """
+    实例服务的客户端
+
+    acquire 返回的图实例的边数组和CSR数组、数值划分实例的 value_array
+    直接映射共享内存（只读，不复制）。
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def _request(self, **request) -> Dict[str, Any]:
+        with self._lock:
+            self._file.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("实例服务已断开连接")
+        response = json.loads(line)
+        if not response.pop("ok"):
+            raise RuntimeError(response["error"])
+        return response
+
+    def acquire(self, path: str) -> Instance:
+        """获取实例（服务端引用计数加一）；相对路径按客户端的工作目录解析"""
+        response = self._request(op="acquire", path=os.path.abspath(path))
+        info = response["info"]
+        arrays = {key: _attach(spec) for key, spec in response["arrays"].items()}
+        if response["kind"] == "graph":
+            graph = GraphInstance(
+                name=info["name"],
+                n=info["n"],
+                m=info["m"],
+                edges=None,
+                meta=info["meta"],
+                edge_array=EdgeArrays(arrays["u"], arrays["v"], arrays["w"])
+            )
+            graph._csr = CSRGraph(arrays["indptr"], arrays["indices"], arrays["weights"])
+            return graph
+        if "limbs" in arrays:
+            values = LimbArray(arrays["limbs"], arrays.get("negative"))
+        else:
+            values = arrays["values"]
+        return NPPInstance(name=info["name"], n=info["n"], values=None, meta=info["meta"],
+                           value_array=values)
+
+    def release(self, path: str):
+        """释放实例（服务端引用计数减一）；释放后已映射的数组仍然有效"""
+        self._request(op="release", path=os.path.abspath(path))
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request(op="stats")
+
+    def shutdown_server(self):
+        """请求服务进程退出"""
+        self._request(op="shutdown")
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "InstanceClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve dataset instances from shared memory')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Unix socket path (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES >> 20,
+                        help=f'Shared memory budget in MB (default: {DEFAULT_MAX_BYTES >> 20})')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if not os.path.isdir(_SHM_DIR):
+        print(f"当前系统没有 {_SHM_DIR}，无法提供共享内存服务", file=sys.stderr)
+        sys.exit(1)
+
+    server = InstanceServer(max_bytes=args.max_mb << 20)
+    try:
+        server.serve(args.socket)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
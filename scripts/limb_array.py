@@ -0,0 +1,281 @@
+"""
+定宽大整数数组
+把一组大整数的绝对值保存为 (n, L) 的 uint64 "limb" 矩阵（低位在前），负数另用布尔数组标记，
+加、减、比较、排序和求和都按列向量化，适合 hard 数值划分实例中的上千位整数。
+"""
+
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+_LIMB_BITS = 64
+_LIMB_BYTES = 8
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+Operand = Union["LimbArray", int]
+
+
+def limbs_for_bits(bits: int) -> int:
+    """容纳 bits 位整数所需的limb数（至少为1）"""
+    return max(1, -(-bits // _LIMB_BITS))
+
+
+class LimbArray:
+    """
+    大整数数组
+
+    limbs[i, j] 是第 i 个整数绝对值的第 j 个64位分段，limbs[:, 0] 为最低位。
+    negative 为 None 表示所有整数都非负，否则 negative[i] 标记第 i 个整数为负数
+    （零总是非负）。运算结果的宽度会按需扩展（加法进位）。
+    """
+
+    def __init__(self, limbs: np.ndarray, negative: Optional[np.ndarray] = None):
+        if limbs.ndim != 2 or limbs.dtype != np.uint64:
+            raise ValueError(f"limbs 必须是二维uint64数组，得到: {limbs.dtype} {limbs.shape}")
+        if negative is not None:
+            if negative.shape != limbs.shape[:1]:
+                raise ValueError(f"negative 的形状应为 ({limbs.shape[0]},)，得到: {negative.shape}")
+            negative = negative.astype(bool, copy=False)
+            zero = ~(limbs != 0).any(axis=1)
+            if (negative & zero).any():
+                negative = negative & ~zero
+            if not negative.any():
+                negative = None
+        self.limbs = limbs
+        self.negative = negative
+
+    @classmethod
+    def from_ints(cls, values: Iterable[int], num_limbs: Optional[int] = None) -> "LimbArray":
+        """
+        由Python整数序列构造
+
+        Args:
+            values: 整数序列
+            num_limbs: limb数，默认按最大绝对值的位数确定
+        """
+        values = list(values)
+        negative = np.array([v < 0 for v in values], dtype=bool)
+        magnitudes = [abs(v) for v in values]
+        if num_limbs is None:
+            num_limbs = limbs_for_bits(max((v.bit_length() for v in magnitudes), default=1))
+        width = num_limbs * _LIMB_BYTES
+        try:
+            raw = b"".join(v.to_bytes(width, "little") for v in magnitudes)
+        except OverflowError as e:
+            raise ValueError(f"数值超出 {num_limbs} 个limb的宽度") from e
+        limbs = np.frombuffer(raw, dtype="<u8").reshape(len(values), num_limbs)
+        return cls(limbs.astype(np.uint64, copy=True), negative)
+
+    def to_ints(self) -> List[int]:
+        """转换为Python整数列表"""
+        data = np.ascontiguousarray(self.limbs, dtype="<u8")
+        width = data.shape[1] * _LIMB_BYTES
+        raw = data.tobytes()
+        ints = [int.from_bytes(raw[i:i + width], "little") for i in range(0, len(raw), width)]
+        if self.negative is not None:
+            for i in np.flatnonzero(self.negative).tolist():
+                ints[i] = -ints[i]
+        return ints
+
+    def __len__(self) -> int:
+        return self.limbs.shape[0]
+
+    @property
+    def num_limbs(self) -> int:
+        return self.limbs.shape[1]
+
+    @property
+    def signs(self) -> np.ndarray:
+        """各整数是否为负数（布尔数组，没有负数时为全False）"""
+        if self.negative is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.negative
+
+    @property
+    def nbytes(self) -> int:
+        return self.limbs.nbytes + (0 if self.negative is None else self.negative.nbytes)
+
+    def __repr__(self) -> str:
+        return f"LimbArray(n={len(self)}, limbs={self.num_limbs})"
+
+    def __getitem__(self, index) -> Union["LimbArray", int]:
+        if isinstance(index, (int, np.integer)):
+            value = int.from_bytes(self.limbs[index].astype("<u8").tobytes(), "little")
+            return -value if self.negative is not None and self.negative[index] else value
+        return LimbArray(self.limbs[index], None if self.negative is None else self.negative[index])
+
+    def __neg__(self) -> "LimbArray":
+        return LimbArray(self.limbs, ~self.signs)
+
+    def bit_lengths(self) -> np.ndarray:
+        """各整数绝对值的位数"""
+        nonzero = self.limbs != 0
+        # 最高非零limb的下标；全零时位数为0
+        top = self.num_limbs - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+        top_limb = self.limbs[np.arange(len(self)), top]
+        top_bits = np.zeros(len(self), dtype=np.int64)
+        remaining = top_limb.copy()
+        for shift in (32, 16, 8, 4, 2, 1):
+            big = remaining >= np.uint64(1 << shift)
+            top_bits += np.where(big, shift, 0)
+            remaining = np.where(big, remaining >> np.uint64(shift), remaining)
+        top_bits += (remaining > 0)
+        return np.where(nonzero.any(axis=1), top * _LIMB_BITS + top_bits, 0)
+
+    def fits_int64(self) -> bool:
+        """是否所有整数的绝对值都小于 2^63"""
+        return bool((self.limbs[:, 1:] == 0).all() and (self.limbs[:, 0] < np.uint64(1 << 63)).all())
+
+    def to_int64(self) -> np.ndarray:
+        """转换为int64数组，数值超出范围时抛出 OverflowError"""
+        if not self.fits_int64():
+            raise OverflowError("数值超出int64范围")
+        values = self.limbs[:, 0].astype(np.int64)
+        return values if self.negative is None else np.where(self.negative, -values, values)
+
+    def is_zero(self) -> np.ndarray:
+        return ~(self.limbs != 0).any(axis=1)
+
+    def _coerce(self, other: Operand) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """把两个操作数转换为宽度一致、可广播的 (a_limbs, a_neg, b_limbs, b_neg)"""
+        if not isinstance(other, LimbArray):
+            other = LimbArray.from_ints([other])
+        width = max(self.num_limbs, other.num_limbs)
+        a, b = np.broadcast_arrays(_widen(self.limbs, width), _widen(other.limbs, width))
+        a_neg, b_neg = np.broadcast_arrays(self.signs, other.signs)
+        return a, a_neg, b, b_neg
+
+    def add(self, other: Operand) -> "LimbArray":
+        """逐元素相加，最高位有进位时结果增加一个limb"""
+        a, a_neg, b, b_neg = self._coerce(other)
+        total = _magnitude_add(a, b)
+        if not (a_neg.any() or b_neg.any()):
+            return LimbArray(total)
+        # 异号时用较大的绝对值减去较小的绝对值，符号取绝对值较大的一方
+        a_larger = _magnitude_compare(a, b) >= 0
+        big = np.where(a_larger[:, None], a, b)
+        small = np.where(a_larger[:, None], b, a)
+        diff = _widen(_magnitude_sub(big, small), total.shape[1])
+        same = a_neg == b_neg
+        limbs = np.where(same[:, None], total, diff)
+        negative = np.where(same, a_neg, np.where(a_larger, a_neg, b_neg))
+        return LimbArray(limbs, negative)
+
+    def sub(self, other: Operand) -> "LimbArray":
+        """逐元素相减"""
+        if not isinstance(other, LimbArray):
+            other = LimbArray.from_ints([other])
+        return self.add(-other)
+
+    def compare(self, other: Operand) -> np.ndarray:
+        """逐元素比较，返回 -1、0、1 组成的int8数组"""
+        a, a_neg, b, b_neg = self._coerce(other)
+        result = _magnitude_compare(a, b)
+        # 同为负数时绝对值越大越小；异号时负数较小
+        result = np.where(a_neg & b_neg, -result, result)
+        result = np.where(a_neg & ~b_neg, -1, np.where(~a_neg & b_neg, 1, result))
+        return result.astype(np.int8)
+
+    def __add__(self, other: Operand) -> "LimbArray":
+        return self.add(other)
+
+    def __sub__(self, other: Operand) -> "LimbArray":
+        return self.sub(other)
+
+    def __lt__(self, other: Operand) -> np.ndarray:
+        return self.compare(other) < 0
+
+    def __le__(self, other: Operand) -> np.ndarray:
+        return self.compare(other) <= 0
+
+    def __gt__(self, other: Operand) -> np.ndarray:
+        return self.compare(other) > 0
+
+    def __ge__(self, other: Operand) -> np.ndarray:
+        return self.compare(other) >= 0
+
+    def argsort(self) -> np.ndarray:
+        """升序排序的下标（稳定排序）"""
+        limbs = self.limbs
+        keys: Tuple[np.ndarray, ...]
+        if self.negative is None:
+            keys = ()
+        else:
+            # 负数按绝对值降序（按位取反后升序），并整体排在非负数之前
+            limbs = np.where(self.negative[:, None], ~limbs, limbs)
+            keys = (~self.negative,)
+        # lexsort 以最后一个键为主键，最高位limb在最后
+        return np.lexsort(tuple(limbs[:, j] for j in range(self.num_limbs)) + keys)
+
+    def sort(self) -> "LimbArray":
+        """返回升序排列的新数组"""
+        return self[self.argsort()]
+
+    def argmax(self) -> int:
+        return int(self.argsort()[-1]) if len(self) else -1
+
+    def sum(self) -> int:
+        """所有元素之和（Python整数）"""
+        if self.negative is None:
+            return _magnitude_sum(self.limbs)
+        return _magnitude_sum(self.limbs[~self.negative]) - _magnitude_sum(self.limbs[self.negative])
+
+
+def _magnitude_add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    out = np.empty(a.shape, dtype=np.uint64)
+    carry = np.zeros(a.shape[0], dtype=np.uint64)
+    for j in range(a.shape[1]):
+        s = a[:, j] + b[:, j]
+        c1 = s < a[:, j]
+        s += carry
+        c2 = s < carry
+        out[:, j] = s
+        carry = (c1 | c2).astype(np.uint64)
+    if carry.any():
+        out = np.concatenate((out, carry[:, None]), axis=1)
+    return out
+
+
+def _magnitude_sub(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """逐行计算 a - b，要求每行 a >= b"""
+    out = np.empty(a.shape, dtype=np.uint64)
+    borrow = np.zeros(a.shape[0], dtype=np.uint64)
+    for j in range(a.shape[1]):
+        d = a[:, j] - b[:, j]
+        b1 = a[:, j] < b[:, j]
+        b2 = d < borrow
+        out[:, j] = d - borrow
+        borrow = (b1 | b2).astype(np.uint64)
+    return out
+
+
+def _magnitude_compare(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    result = np.zeros(a.shape[0], dtype=np.int8)
+    undecided = np.ones(a.shape[0], dtype=bool)
+    for j in range(a.shape[1] - 1, -1, -1):
+        gt = undecided & (a[:, j] > b[:, j])
+        lt = undecided & (a[:, j] < b[:, j])
+        result[gt] = 1
+        result[lt] = -1
+        undecided &= ~(gt | lt)
+        if not undecided.any():
+            break
+    return result
+
+
+def _magnitude_sum(limbs: np.ndarray) -> int:
+    # 每个limb拆成高低32位按列求和，n < 2^32 时uint64累加不会溢出
+    low = (limbs & _MASK32).sum(axis=0, dtype=np.uint64).tolist()
+    high = (limbs >> np.uint64(32)).sum(axis=0, dtype=np.uint64).tolist()
+    total = 0
+    for j in range(limbs.shape[1] - 1, -1, -1):
+        total = (total << _LIMB_BITS) + low[j] + (high[j] << 32)
+    return total
+
+
+def _widen(limbs: np.ndarray, width: int) -> np.ndarray:
+    """在高位补零扩展到 width 个limb"""
+    if limbs.shape[1] >= width:
+        return limbs
+    pad = np.zeros((limbs.shape[0], width - limbs.shape[1]), dtype=np.uint64)
+    return np.concatenate((limbs, pad), axis=1)
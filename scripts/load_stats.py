@@ -0,0 +1,297 @@
+"""
+加载过程的分阶段统计
+记录一次加载中各阶段（读取解压、分词、去重、校验等）的耗时、字节数和内存峰值，
+用于定位加载慢的原因。默认关闭，关闭时加载器只在阶段边界做一次 None 判断。
+
+    from load_stats import LoadStats, collect_stats
+    from unified_loader import load_instance, batch_load_instances
+
+    stats = LoadStats()
+    load_instance(path, stats=stats)
+    print(stats.format())
+
+    with collect_stats() as agg:            # 全局钩子，汇总所有加载（含多进程批量加载）
+        batch_load_instances(paths, workers=4)
+    print(agg.total.format())
+"""
+
+import io
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# 各阶段名称，按加载流程排列
+STAGE_CACHE = "cache"
+STAGE_HEADER = "header"
+STAGE_MMAP = "mmap"
+STAGE_DECOMPRESS = "decompress"
+STAGE_TOKENIZE = "tokenize"
+STAGE_PARSE = "parse"
+STAGE_DEDUP = "dedup"
+STAGE_VALIDATE = "validate"
+STAGE_DENSE = "dense"
+
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageStats:
+    """单个阶段的累计统计"""
+    seconds: float = 0.0
+    calls: int = 0
+    bytes: int = 0
+    peak_bytes: int = 0  # 仅 trace_memory=True 时记录，相对加载开始时的内存占用
+
+    def merge(self, other: "StageStats"):
+        self.seconds += other.seconds
+        self.calls += other.calls
+        self.bytes += other.bytes
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+
+
+@dataclass
+class LoadStats:
+    """
+    一次或多次加载的统计信息
+
+    各阶段耗时是独占时间：阶段嵌套时（例如分词过程中从解压流读取数据），
+    内层阶段的耗时不计入外层阶段，因此各阶段耗时之和不超过总耗时。
+    trace_memory=True 时使用 tracemalloc 记录内存峰值，开销较大，
+    且 tracemalloc 是进程级的，多线程同时加载时峰值会互相混入。
+    """
+    path: Optional[str] = None
+    kind: Optional[str] = None          # "graph" / "npp"
+    cache: Optional[str] = None         # 命中的缓存: "memory" / "sidecar"
+    loads: int = 0
+    total_seconds: float = 0.0
+    bytes_decompressed: int = 0
+    lines_parsed: int = 0               # 有效数据行数（边数或数字个数）
+    duplicates_removed: int = 0
+    self_loops_removed: int = 0
+    peak_bytes: int = 0
+    trace_memory: bool = False
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    _stack: List[List[Any]] = field(default_factory=list, repr=False, compare=False)
+    _depth: int = field(default=0, repr=False, compare=False)
+    _mem_base: int = field(default=0, repr=False, compare=False)
+
+    @contextmanager
+    def measure(self, path: str) -> Iterator["LoadStats"]:
+        """统计一次完整的加载，成功结束后交给全局钩子；嵌套调用时只有最外层生效"""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            self._mem_base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.path = path
+        self._depth = 1
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            self.loads += 1
+            self._depth = 0
+            if self.trace_memory:
+                self.peak_bytes = max(self.peak_bytes, self._traced_peak())
+                if started_tracing:
+                    tracemalloc.stop()
+        emit(self)
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0) -> Iterator[None]:
+        """计时一个阶段（独占时间），nbytes 为该阶段处理的字节数"""
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        entry = [name, now]
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            stage = self._charge(entry, now)
+            stage.calls += 1
+            stage.bytes += nbytes
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def _charge(self, entry: List[Any], now: float) -> StageStats:
+        """把 entry 自上次计时以来的时间和内存峰值计入对应阶段"""
+        stage = self.stages.get(entry[0])
+        if stage is None:
+            stage = self.stages[entry[0]] = StageStats()
+        stage.seconds += now - entry[1]
+        entry[1] = now
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = self._traced_peak()
+            stage.peak_bytes = max(stage.peak_bytes, peak)
+            self.peak_bytes = max(self.peak_bytes, peak)
+            tracemalloc.reset_peak()
+        return stage
+
+    def _traced_peak(self) -> int:
+        return max(0, tracemalloc.get_traced_memory()[1] - self._mem_base)
+
+    def merge(self, other: "LoadStats"):
+        """把另一份统计累加到当前对象"""
+        self.loads += other.loads
+        self.total_seconds += other.total_seconds
+        self.bytes_decompressed += other.bytes_decompressed
+        self.lines_parsed += other.lines_parsed
+        self.duplicates_removed += other.duplicates_removed
+        self.self_loops_removed += other.self_loops_removed
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+        for name, stage in other.stages.items():
+            self.stages.setdefault(name, StageStats()).merge(stage)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: value for key, value in asdict(self).items() if not key.startswith("_")}
+        data.pop("trace_memory")
+        return data
+
+    def format(self) -> str:
+        """格式化为便于阅读的表格"""
+        title = self.path if self.loads == 1 and self.path else f"{self.loads} 次加载"
+        lines = [f"加载统计: {title}"]
+        if self.cache:
+            lines.append(f"  命中缓存: {self.cache}")
+        lines.append(f"  总耗时: {self.total_seconds:.3f}s  解压字节: {self.bytes_decompressed}  "
+                     f"数据行: {self.lines_parsed}  重复边: {self.duplicates_removed}  "
+                     f"自环: {self.self_loops_removed}")
+        if self.trace_memory or self.peak_bytes > 0:
+            lines.append(f"  内存峰值: {self.peak_bytes / 2**20:.1f} MB")
+        show_peak = self.trace_memory or self.peak_bytes > 0
+        lines.append(f"  {'stage':<12}{'seconds':>10}{'share':>8}{'calls':>8}{'bytes':>14}"
+                     + (f"{'peak MB':>10}" if show_peak else ""))
+        total = self.total_seconds or 1.0
+        for name, stage in self.stages.items():
+            lines.append(f"  {name:<12}{stage.seconds:>10.4f}{stage.seconds / total:>8.1%}"
+                         f"{stage.calls:>8}{stage.bytes:>14}"
+                         + (f"{stage.peak_bytes / 2**20:>10.1f}" if show_peak else ""))
+        return "\n".join(lines)
+
+
+def measure(stats: Optional[LoadStats], path: str):
+    """stats 为 None 时返回空的上下文管理器"""
+    if stats is None:
+        return _NULL_STAGE
+    return stats.measure(path)
+
+
+def stage(stats: Optional[LoadStats], name: str, nbytes: int = 0):
+    """stats 为 None 时返回空的上下文管理器，供加载器在关闭统计时零开销调用"""
+    if stats is None:
+        return _NULL_STAGE
+    return stats.stage(name, nbytes)
+
+
+class TimedReader(io.RawIOBase):
+    """包装解压流，把读取时间计入 decompress 阶段并统计解压后的字节数"""
+
+    def __init__(self, raw: io.BufferedIOBase, stats: LoadStats):
+        self._raw = raw
+        self._stats = stats
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        with self._stats.stage(STAGE_DECOMPRESS):
+            n = self._raw.readinto(b)
+        self._stats.bytes_decompressed += n
+        self._stats.stages[STAGE_DECOMPRESS].bytes += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+# 全局统计钩子：设置后每次加载都会创建 LoadStats，加载结束时把它传给钩子
+StatsHook = Callable[[LoadStats], None]
+_stats_hook: Optional[StatsHook] = None
+
+
+def set_stats_hook(hook: Optional[StatsHook]) -> Optional[StatsHook]:
+    """
+    设置全局统计钩子，返回之前的钩子
+
+    钩子对象若有 trace_memory 属性且为 True，自动创建的 LoadStats 会记录内存峰值。
+    batch_load_instances 多进程加载时，工作进程的统计会传回主进程再交给钩子。
+    """
+    global _stats_hook
+    previous = _stats_hook
+    _stats_hook = hook
+    return previous
+
+
+def get_stats_hook() -> Optional[StatsHook]:
+    return _stats_hook
+
+
+def resolve(stats: Optional[LoadStats]) -> Optional[LoadStats]:
+    """调用方未传入 stats 但设置了全局钩子时，创建新的统计对象"""
+    if stats is None and _stats_hook is not None:
+        return LoadStats(trace_memory=getattr(_stats_hook, "trace_memory", False))
+    return stats
+
+
+def emit(stats: Optional[LoadStats]):
+    """加载结束后把统计交给全局钩子"""
+    hook = _stats_hook
+    if stats is not None and hook is not None:
+        hook(stats)
+
+
+class StatsAggregator:
+    """线程安全的统计汇总器，可作为全局钩子使用"""
+
+    def __init__(self, trace_memory: bool = False, keep_files: bool = True):
+        """
+        Args:
+            trace_memory: 是否记录内存峰值
+            keep_files: 是否保留每次加载的统计（files 列表）
+        """
+        self.trace_memory = trace_memory
+        self.keep_files = keep_files
+        self.total = LoadStats(trace_memory=trace_memory)
+        self.files: List[LoadStats] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, stats: LoadStats):
+        with self._lock:
+            self.total.merge(stats)
+            if self.keep_files:
+                self.files.append(stats)
+
+    def slowest(self, count: int = 10) -> List[LoadStats]:
+        """耗时最长的若干次加载"""
+        with self._lock:
+            return sorted(self.files, key=lambda s: s.total_seconds, reverse=True)[:count]
+
+
+@contextmanager
+def collect_stats(trace_memory: bool = False, keep_files: bool = True) -> Iterator[StatsAggregator]:
+    """在 with 块内安装统计汇总器作为全局钩子，退出时恢复之前的钩子"""
+    aggregator = StatsAggregator(trace_memory, keep_files)
+    previous = set_stats_hook(aggregator)
+    try:
+        yield aggregator
+    finally:
+        set_stats_hook(previous)
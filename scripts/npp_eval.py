@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+数值划分的批量评估与差分基线
+对一个或一批（B×n）分配方案同时计算各部分之和与最大最小部分之差（目标值），
+int64 能容纳总和时用整数矩阵乘法，否则把数值拆成32位分段后逐段求和再组合为Python整数
+（hard 实例中的上千位整数，LimbArray 表示）。
+
+基线为 Karmarkar–Karp 差分法（k=2）及其 k 路推广 largest differencing method（LDM），
+用堆实现，复杂度 O(n log n * k)。基线结果按源文件内容哈希缓存为小的JSON文件，
+与图数据的二进制缓存位于同一目录，每次训练不必重新计算。
+
+用法示例:
+    python3 scripts/npp_eval.py processed/number_partitioning/compressed/small/*.txt.xz
+
+    from unified_loader import load_npp_txt
+    from npp_eval import NPPEvaluator, cached_baseline
+
+    instance = load_npp_txt(path)
+    evaluator = NPPEvaluator(instance, k=2)
+    result = evaluator(assignments)                 # assignments: (B, n)，值为 0..k-1
+    baseline = cached_baseline(path, k=2)           # 首次计算，之后读取缓存
+    reward = -result.ratio(baseline.difference)
+"""
+
+import os
+import sys
+import json
+import heapq
+import time
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    from .unified_loader import NPPInstance, load_npp_txt, load_instance, atomic_write, CACHE_DIR_ENV
+    from .graph_cache import SidecarCache, DEFAULT_CACHE_DIR
+except ImportError:
+    from unified_loader import NPPInstance, load_npp_txt, load_instance, atomic_write, CACHE_DIR_ENV
+    from graph_cache import SidecarCache, DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# 每个分块最多处理的 (方案数 × 数字个数) 元素个数，限制中间矩阵的内存
+_CHUNK_ELEMENTS = 1 << 24
+_INT64_MAX = np.iinfo(np.int64).max
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+# 基线缓存文件: <缓存目录>/<源文件SHA-256>.npp.json
+BASELINE_SUFFIX = ".npp.json"
+BASELINE_VERSION = 1
+
+
+@dataclass
+class NPPResult:
+    """
+    分配方案的评估结果
+
+    输入为单个方案（一维数组）时各字段为标量形状，输入为 (B, n) 时第一维为 B。
+    走大整数路径时数组的 dtype 为 object（元素为Python整数）。
+    """
+    part_sums: np.ndarray      # 各部分之和，形状 (..., k)
+    difference: np.ndarray     # max(part_sums) - min(part_sums)
+
+    def ratio(self, baseline: int) -> np.ndarray:
+        """目标值与基线之比（float64），基线为0时按1计算，用于奖励归一化"""
+        denom = max(int(baseline), 1)
+        if self.difference.dtype == object:
+            flat = [d / denom for d in self.difference.ravel().tolist()]
+            return np.array(flat, dtype=np.float64).reshape(self.difference.shape)
+        return self.difference / denom
+
+
+class NPPEvaluator:
+    """
+    绑定一个数值划分实例的批量评估器
+
+    构造时确定求和路径：所有数值的绝对值之和不超过 int64 范围时直接做整数矩阵乘法，
+    否则把每个数的绝对值拆成若干32位分段，逐段求和（n < 2^32 时各段之和不会溢出uint64），
+    含负数时非负数与负数分别求和后相减。
+    """
+
+    def __init__(self, instance: NPPInstance, k: int = 2):
+        """
+        Args:
+            instance: 数值划分实例（load_npp_txt / load_instance 的结果）
+            k: 部分数（数据文件头部的 k 字段为0，默认按二划分评估）
+        """
+        if k < 2:
+            raise ValueError(f"部分数必须至少为2，得到: {k}")
+        self.instance = instance
+        self.k = k
+        values = instance.value_array
+        self.n = len(values)
+        self.bigint = True
+        negative = None
+        if isinstance(values, np.ndarray):
+            # 绝对值之和不超过 int64 时任何部分之和都不会溢出（np.abs(-2^63) 转为uint64后仍正确）
+            magnitudes = np.abs(values).astype(np.uint64)
+            self.total = int(values.sum(dtype=object)) if self.n else 0
+            if int(magnitudes.sum(dtype=object)) <= _INT64_MAX:
+                self.bigint = False
+                self._values = np.ascontiguousarray(values, dtype=np.int64)
+            else:
+                limbs = magnitudes[:, None]
+                negative = values < 0
+        else:
+            self.total = values.sum()
+            limbs = values.limbs
+            negative = values.negative
+        if self.bigint:
+            # 每个64位limb拆成低、高32位两段，第 j 段的权重为 2^(32j)
+            chunks = np.empty((self.n, 2 * limbs.shape[1]), dtype=np.uint64)
+            chunks[:, 0::2] = limbs & _MASK32
+            chunks[:, 1::2] = limbs >> np.uint64(32)
+            self._chunks = chunks
+            # 含负数时分别对非负数和负数的绝对值求和
+            self._negative = negative if negative is not None and negative.any() else None
+
+    @classmethod
+    def from_path(cls, path: str, k: int = 2) -> "NPPEvaluator":
+        """由数值划分数据文件直接构建（使用 load_npp_txt）"""
+        return cls(load_npp_txt(path), k)
+
+    def _validate(self, assignments: np.ndarray) -> np.ndarray:
+        a = np.asarray(assignments)
+        if a.dtype == bool:
+            a = a.astype(np.int8)
+        if a.ndim not in (1, 2) or a.shape[-1] != self.n:
+            raise ValueError(f"分配方案的形状应为 ({self.n},) 或 (B, {self.n})，得到: {a.shape}")
+        if not np.issubdtype(a.dtype, np.integer):
+            raise ValueError(f"分配方案必须是整数或布尔数组，得到: {a.dtype}")
+        if a.size and (a.min() < 0 or a.max() >= self.k):
+            raise ValueError(f"部分编号必须在 [0, {self.k}) 范围内，"
+                             f"得到 [{int(a.min())}, {int(a.max())}]")
+        return a
+
+    def part_sums(self, assignments: np.ndarray) -> np.ndarray:
+        """各部分之和，形状 (..., k)"""
+        a = self._validate(assignments)
+        return self._part_sums(np.atleast_2d(a)).reshape(a.shape[:-1] + (self.k,))
+
+    def _part_sums(self, a: np.ndarray) -> np.ndarray:
+        rows = a.shape[0]
+        sums = np.empty((rows, self.k), dtype=object if self.bigint else np.int64)
+        step = max(1, _CHUNK_ELEMENTS // max(self.n, 1))
+        for start in range(0, rows, step):
+            block = a[start:start + step]
+            # 最后一个部分之和由总和减去其余部分得到
+            for p in range(self.k - 1):
+                sums[start:start + step, p] = self._masked_sum(block == p)
+        sums[:, -1] = self.total - sums[:, :-1].sum(axis=1)
+        return sums
+
+    def _masked_sum(self, mask: np.ndarray) -> np.ndarray:
+        if not self.bigint:
+            return mask.astype(np.int64) @ self._values
+        if self._negative is None:
+            return self._chunk_sum(mask)
+        return self._chunk_sum(mask & ~self._negative) - self._chunk_sum(mask & self._negative)
+
+    def _chunk_sum(self, mask: np.ndarray) -> np.ndarray:
+        chunk_sums = mask.astype(np.uint64) @ self._chunks
+        total = np.zeros(len(mask), dtype=object)
+        for j in range(chunk_sums.shape[1]):
+            total += chunk_sums[:, j].astype(object) << (32 * j)
+        return total
+
+    def difference(self, assignments: np.ndarray) -> np.ndarray:
+        """最大与最小部分之差"""
+        return self(assignments).difference
+
+    def __call__(self, assignments: np.ndarray) -> NPPResult:
+        """
+        评估一个或一批分配方案
+
+        Args:
+            assignments: 形状 (n,) 或 (B, n) 的整数数组，值为部分编号 0..k-1；
+                k=2 时也可以是布尔数组
+
+        Returns:
+            NPPResult
+        """
+        a = self._validate(assignments)
+        sums = self._part_sums(np.atleast_2d(a))
+        diff = sums.max(axis=1) - sums.min(axis=1)
+        shape = a.shape[:-1]
+        return NPPResult(part_sums=sums.reshape(shape + (self.k,)), difference=diff.reshape(shape))
+
+
+def evaluate_npp(instance: NPPInstance, assignments: np.ndarray, k: int = 2) -> NPPResult:
+    """
+    评估分配方案的便捷函数（每次调用都会重新准备数值数组，反复评估时请使用 NPPEvaluator）
+    """
+    return NPPEvaluator(instance, k)(assignments)
+
+
+@dataclass
+class DifferencingResult:
+    """差分法的结果，数值均为Python整数"""
+    k: int
+    difference: int
+    part_sums: List[int]
+    assignment: np.ndarray     # 长度 n 的部分编号
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "difference": _encode_int(self.difference),
+                "part_sums": [_encode_int(s) for s in self.part_sums],
+                "assignment": self.assignment.tolist(), "seconds": self.seconds}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DifferencingResult":
+        return cls(k=data["k"], difference=_decode_int(data["difference"]),
+                   part_sums=[_decode_int(s) for s in data["part_sums"]],
+                   assignment=np.array(data["assignment"], dtype=np.int64), seconds=data["seconds"])
+
+
+def _encode_int(value: int) -> Union[int, str]:
+    """超出int64的整数写为十六进制字符串（十进制转换受 sys.set_int_max_str_digits 限制）"""
+    return value if value <= _INT64_MAX else hex(value)
+
+
+def _decode_int(value: Union[int, str]) -> int:
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def _as_ints(values: Union[NPPInstance, Sequence[int], np.ndarray]) -> List[int]:
+    if isinstance(values, NPPInstance):
+        return list(values.values)
+    if isinstance(values, np.ndarray):
+        return values.tolist()
+    if hasattr(values, "to_ints"):
+        return values.to_ints()
+    return [int(v) for v in values]
+
+
+def largest_differencing(values: Union[NPPInstance, Sequence[int], np.ndarray],
+                         k: int = 2) -> DifferencingResult:
+    """
+    Largest differencing method（Karmarkar & Karp 1982；k 路推广见 Michiels 等 2003）
+
+    每个堆元素是一个 k 元组（各部分之和降序排列，减去最小值后末位为0）及各部分的成员链表。
+    每次取出差值（首位）最大的两个元组，把一个的最大部分与另一个的最小部分合并，
+    依此类推，归一化后放回堆中，直到只剩一个元组。k=2 时即 Karmarkar–Karp 差分法。
+
+    Args:
+        values: 数值划分实例、整数序列、int64 数组或 LimbArray
+        k: 部分数
+
+    Returns:
+        DifferencingResult
+    """
+    if k < 2:
+        raise ValueError(f"部分数必须至少为2，得到: {k}")
+    start = time.perf_counter()
+    nums = _as_ints(values)
+    n = len(nums)
+    # 各部分的成员用单向链表表示：next_member[i] 是同一部分中 i 之后的下标（-1 为结尾），
+    # 部分记为 (首, 尾) 下标对，空部分为 None；合并两个部分只需 O(1) 地连接链表
+    next_member = [-1] * n
+    # (-差值, 序号, 各部分之和, 各部分的 (首, 尾))；序号使比较不涉及列表并保证结果确定
+    heap = [(-x, i, [x] + [0] * (k - 1), [(i, i)] + [None] * (k - 1))
+            for i, x in enumerate(nums)]
+    heapq.heapify(heap)
+    counter = n
+    while len(heap) > 1:
+        _, _, sums_a, parts_a = heapq.heappop(heap)
+        _, _, sums_b, parts_b = heapq.heappop(heap)
+        # a 的第 i 大部分与 b 的第 i 小部分合并
+        merged = [(sums_a[i] + sums_b[k - 1 - i], _concat(parts_a[i], parts_b[k - 1 - i], next_member))
+                  for i in range(k)]
+        merged.sort(key=lambda item: item[0], reverse=True)
+        low = merged[-1][0]
+        sums = [s - low for s, _ in merged]
+        heapq.heappush(heap, (-sums[0], counter, sums, [part for _, part in merged]))
+        counter += 1
+
+    assignment = np.zeros(n, dtype=np.int64)
+    part_sums = [0] * k
+    if heap:
+        _, _, _, parts = heap[0]
+        for p, part in enumerate(parts):
+            i = part[0] if part is not None else -1
+            while i >= 0:
+                assignment[i] = p
+                part_sums[p] += nums[i]
+                i = next_member[i]
+    return DifferencingResult(k=k, difference=max(part_sums) - min(part_sums), part_sums=part_sums,
+                              assignment=assignment, seconds=time.perf_counter() - start)
+
+
+def _concat(a: Optional[Tuple[int, int]], b: Optional[Tuple[int, int]],
+            next_member: List[int]) -> Optional[Tuple[int, int]]:
+    """连接两个以 (首, 尾) 表示的成员链表"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    next_member[a[1]] = b[0]
+    return a[0], b[1]
+
+
+def karmarkar_karp(values: Union[NPPInstance, Sequence[int], np.ndarray]) -> DifferencingResult:
+    """二划分的 Karmarkar–Karp 差分法（largest_differencing 的 k=2 情形）"""
+    return largest_differencing(values, 2)
+
+
+def default_cache_dir() -> str:
+    """基线缓存目录：环境变量 CO_BENCH_CACHE_DIR，其次为图数据二进制缓存的默认目录"""
+    return os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+
+
+class BaselineCache:
+    """
+    差分基线的JSON旁路缓存
+
+    每个源文件一个 <SHA-256>.npp.json，按 "ldm_k<k>" 记录各部分数的结果；
+    内容哈希由 SidecarCache 计算（stat信息未变化时复用 index.json 中的记录），
+    源文件变化后自然失效。文件很小，不参与二进制缓存的容量淘汰。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._sidecar = SidecarCache(cache_dir or default_cache_dir())
+        self.cache_dir = self._sidecar.cache_dir
+
+    def entry_path(self, source_path: str) -> str:
+        return os.path.join(self.cache_dir, self._sidecar.source_key(source_path) + BASELINE_SUFFIX)
+
+    def _read(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"基线缓存文件损坏，将重新计算: {path} ({e})")
+            return {}
+        return data if data.get("version") == BASELINE_VERSION else {}
+
+    def get(self, source_path: str, k: int = 2) -> Optional[DifferencingResult]:
+        """读取缓存的基线，未命中时返回None"""
+        entry = self._read(self.entry_path(source_path)).get("results", {}).get(f"ldm_k{k}")
+        return DifferencingResult.from_dict(entry) if entry is not None else None
+
+    def put(self, source_path: str, result: DifferencingResult, name: Optional[str] = None):
+        """写入基线（与同一文件已有的其他 k 的结果合并，先写临时文件再原子替换）"""
+        path = self.entry_path(source_path)
+        data = self._read(path) or {"version": BASELINE_VERSION, "results": {}}
+        if name is not None:
+            data["name"] = name
+        data["results"][f"ldm_k{result.k}"] = result.to_dict()
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+def cached_baseline(path: str, k: int = 2, cache: Optional[BaselineCache] = None,
+                    instance: Optional[NPPInstance] = None) -> DifferencingResult:
+    """
+    读取或计算数据文件的差分基线
+
+    Args:
+        path: 数值划分数据文件
+        k: 部分数
+        cache: 基线缓存，默认使用 default_cache_dir() 下的缓存
+        instance: 已加载的实例，未命中缓存时用于计算，省去重新加载
+
+    Returns:
+        DifferencingResult
+    """
+    cache = cache or BaselineCache()
+    try:
+        hit = cache.get(path, k)
+    except OSError as e:
+        logger.warning(f"读取基线缓存失败: {e}")
+        hit = None
+    if hit is not None:
+        return hit
+    if instance is None:
+        instance = load_npp_txt(path)
+    result = largest_differencing(instance, k)
+    try:
+        cache.put(path, result, instance.name)
+    except OSError as e:
+        logger.warning(f"写入基线缓存失败: {e}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Karmarkar-Karp / largest differencing baselines for number '
+                                                 'partitioning files (cached per instance)')
+    parser.add_argument('files', nargs='+', help='Number partitioning data files')
+    parser.add_argument('-k', type=int, default=2, help='Number of parts (default: 2)')
+    parser.add_argument('--cache-dir', help=f'Baseline cache directory (default: ${CACHE_DIR_ENV} or '
+                                             '~/.cache/co-benchmark)')
+    parser.add_argument('--no-cache', action='store_true', help='Always recompute, do not read or write the cache')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logging.getLogger("unified_loader").setLevel(logging.WARNING)
+
+    cache = None if args.no_cache else BaselineCache(args.cache_dir)
+    hits = 0
+    start = time.perf_counter()
+    for path in args.files:
+        try:
+            instance = load_instance(path)
+        except (OSError, ValueError) as e:
+            print(f"跳过 {path}: {e}", file=sys.stderr)
+            continue
+        if not isinstance(instance, NPPInstance):
+            print(f"跳过 {path}: 不是数值划分数据文件", file=sys.stderr)
+            continue
+        result = None if cache is None else cache.get(path, args.k)
+        hit = result is not None
+        if not hit:
+            result = largest_differencing(instance, args.k)
+            if cache is not None:
+                cache.put(path, result, instance.name)
+        hits += hit
+        check = NPPEvaluator(instance, args.k)(result.assignment)
+        if int(check.difference) != result.difference:
+            print(f"错误: {instance.name} 的评估结果与差分法不一致", file=sys.stderr)
+            sys.exit(1)
+        print(f"{instance.name}: n={instance.n}，差值 {result.difference}"
+              f"（{'缓存' if hit else f'计算 {result.seconds * 1000:.1f} ms'}）")
+    print(f"共 {len(args.files)} 个文件，缓存命中 {hits} 个，总耗时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
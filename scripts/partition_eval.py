@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+图划分目标函数的批量评估
+对一个或一批（B×n）划分方案同时计算割边权重、各分区节点数和不平衡度，
+全部通过对边数组的向量化gather完成，适合强化学习中每一步评估大量候选方案。
+
+不平衡度按 DIMACS10 / KaHIP 的定义: max_i |V_i| / ceil(n / k) - 1，
+分区数 k 默认取文件头部的 k 字段。
+
+用法示例:
+    python3 scripts/partition_eval.py processed/graph_partitioning/compressed/tiny/dolphins.txt.xz dolphins.part
+
+    from partition_eval import PartitionEvaluator
+    evaluator = PartitionEvaluator(graph)          # k 取头部的 k
+    result = evaluator(assignments)                # assignments: (B, n) 整数数组
+    reward = -result.cut - 100 * np.maximum(result.imbalance - 0.03, 0)
+"""
+
+import sys
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .unified_loader import GraphInstance, load_instance, _header_int
+except ImportError:
+    from unified_loader import GraphInstance, load_instance, _header_int
+
+logger = logging.getLogger(__name__)
+
+# 每个分块最多处理的 (方案数 × 边数) 元素个数，限制中间布尔矩阵的内存
+_CHUNK_ELEMENTS = 1 << 24
+# 分区数不超过该值时逐个分区比较计数，比带行偏移的 bincount 快
+_COMPARE_MAX_K = 4
+
+
+@dataclass
+class PartitionResult:
+    """
+    划分方案的评估结果
+
+    输入为单个方案（一维数组）时各字段为标量形状，输入为 (B, n) 时第一维为 B。
+    """
+    cut: np.ndarray            # 割边权重之和
+    cut_edges: np.ndarray      # 割边条数
+    part_sizes: np.ndarray     # 各分区节点数，形状 (..., k)
+    imbalance: np.ndarray      # max(part_sizes) / ceil(n / k) - 1
+
+    def feasible(self, epsilon: float = 0.03) -> np.ndarray:
+        """不平衡度是否不超过 epsilon（DIMACS10 挑战中常用 0、0.01、0.03、0.05）"""
+        return self.imbalance <= epsilon
+
+
+def partition_count(graph: GraphInstance, k: Optional[int] = None) -> int:
+    """分区数：优先使用参数，其次为文件头部的 k 字段"""
+    if k is None:
+        k = _header_int(graph.meta, "k")
+    if k is None:
+        raise ValueError(f"图 {graph.name} 的头部没有 k 字段，请显式指定分区数")
+    if k < 2:
+        raise ValueError(f"分区数必须至少为2，得到: {k}")
+    return k
+
+
+class PartitionEvaluator:
+    """
+    绑定一个图的批量评估器
+
+    构造时准备好连续的边数组，之后可对不同的划分方案反复调用，
+    适合在训练循环中每一步评估多个候选方案。
+    """
+
+    def __init__(self, graph: GraphInstance, k: Optional[int] = None):
+        """
+        Args:
+            graph: 图实例
+            k: 分区数，默认取头部的 k 字段
+        """
+        self.graph = graph
+        self.n = graph.n
+        self.k = partition_count(graph, k)
+        edges = graph.edge_array
+        self._u = np.ascontiguousarray(edges.u)
+        self._v = np.ascontiguousarray(edges.v)
+        self._w = np.ascontiguousarray(edges.w, dtype=np.int64)
+        # 无权图直接统计割边条数，省去乘以权重
+        self._unit_weights = bool(len(self._w) == 0 or (self._w == 1).all())
+        self.target_size = -(-self.n // self.k)
+
+    def _validate(self, assignments: np.ndarray) -> np.ndarray:
+        a = np.asarray(assignments)
+        if a.ndim not in (1, 2) or a.shape[-1] != self.n:
+            raise ValueError(f"划分方案的形状应为 ({self.n},) 或 (B, {self.n})，得到: {a.shape}")
+        if not np.issubdtype(a.dtype, np.integer):
+            raise ValueError(f"划分方案必须是整数数组，得到: {a.dtype}")
+        if a.size and (a.min() < 0 or a.max() >= self.k):
+            raise ValueError(f"分区编号必须在 [0, {self.k}) 范围内，"
+                             f"得到 [{int(a.min())}, {int(a.max())}]")
+        return a
+
+    def part_sizes(self, assignments: np.ndarray) -> np.ndarray:
+        """各分区的节点数，形状 (..., k)"""
+        a = self._validate(assignments)
+        return self._part_sizes(np.atleast_2d(a)).reshape(a.shape[:-1] + (self.k,))
+
+    def _part_sizes(self, a: np.ndarray) -> np.ndarray:
+        rows = a.shape[0]
+        if self.k <= _COMPARE_MAX_K:
+            return np.stack([np.count_nonzero(a == p, axis=1) for p in range(self.k)], axis=1)
+        # 每行的分区编号加上行偏移后一次 bincount
+        flat = (a.astype(np.int64) + (np.arange(rows, dtype=np.int64) * self.k)[:, None]).ravel()
+        return np.bincount(flat, minlength=rows * self.k).reshape(rows, self.k)
+
+    def cut(self, assignments: np.ndarray) -> np.ndarray:
+        """割边权重之和"""
+        a = self._validate(assignments)
+        return self._cut(np.atleast_2d(a))[0].reshape(a.shape[:-1])
+
+    def _cut(self, a: np.ndarray):
+        """返回 (割边权重, 割边条数)，按方案分块以限制 (B, m) 中间矩阵的大小"""
+        rows = a.shape[0]
+        m = len(self._u)
+        cut = np.zeros(rows, dtype=np.int64)
+        count = np.zeros(rows, dtype=np.int64)
+        step = max(1, _CHUNK_ELEMENTS // max(m, 1))
+        for start in range(0, rows, step):
+            block = a[start:start + step]
+            crossing = np.take(block, self._u, axis=1) != np.take(block, self._v, axis=1)
+            count[start:start + step] = np.count_nonzero(crossing, axis=1)
+            if not self._unit_weights:
+                cut[start:start + step] = crossing @ self._w
+        if self._unit_weights:
+            cut = count.copy()
+        return cut, count
+
+    def __call__(self, assignments: np.ndarray) -> PartitionResult:
+        """
+        评估一个或一批划分方案
+
+        Args:
+            assignments: 形状 (n,) 或 (B, n) 的整数数组，值为分区编号 0..k-1
+
+        Returns:
+            PartitionResult
+        """
+        a = self._validate(assignments)
+        batch = np.atleast_2d(a)
+        cut, count = self._cut(batch)
+        sizes = self._part_sizes(batch)
+        imbalance = sizes.max(axis=1) / self.target_size - 1.0
+        shape = a.shape[:-1]
+        return PartitionResult(cut=cut.reshape(shape), cut_edges=count.reshape(shape),
+                               part_sizes=sizes.reshape(shape + (self.k,)),
+                               imbalance=imbalance.reshape(shape))
+
+
+def evaluate_partition(graph: GraphInstance, assignments: np.ndarray,
+                       k: Optional[int] = None) -> PartitionResult:
+    """
+    评估划分方案的便捷函数（每次调用都会重新准备边数组，反复评估时请使用 PartitionEvaluator）
+
+    Args:
+        graph: 图实例
+        assignments: 形状 (n,) 或 (B, n) 的整数数组
+        k: 分区数，默认取头部的 k 字段
+    """
+    return PartitionEvaluator(graph, k)(assignments)
+
+
+def read_partition_file(path: str) -> np.ndarray:
+    """读取 METIS/KaHIP 格式的划分文件（每行一个分区编号，第 i 行对应节点 i）"""
+    return np.loadtxt(path, dtype=np.int64, ndmin=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a graph partition (cut weight and balance)')
+    parser.add_argument('graph', help='Graph data file')
+    parser.add_argument('partition', help='Partition file, one 0-based block id per line (METIS/KaHIP format)')
+    parser.add_argument('-k', type=int, help='Number of blocks (default: k from the file header)')
+    parser.add_argument('--epsilon', type=float, default=0.03, help='Allowed imbalance (default: 0.03)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    graph = load_instance(args.graph)
+    try:
+        result = evaluate_partition(graph, read_partition_file(args.partition), args.k)
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"图: {graph.name}（n={graph.n}, m={graph.m}）")
+    print(f"割边权重: {int(result.cut)}，割边条数: {int(result.cut_edges)}")
+    print(f"各分区节点数: {result.part_sizes.tolist()}")
+    print(f"不平衡度: {float(result.imbalance):.4f}"
+          f"（{'满足' if result.feasible(args.epsilon) else '超出'} epsilon={args.epsilon}）")
+
+
+if __name__ == "__main__":
+    main()
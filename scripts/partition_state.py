@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+图划分的增量移动状态
+在 GraphInstance 的CSR表示上维护划分方案、每个节点到各分区的连接权重、割边权重和分区大小，
+单个节点移动只更新该节点及其邻居，代价为 O(deg(v) * k)，不需要重新计算整个割（O(m)）。
+节点按"最佳移动增益"存入其最佳目标分区的增益桶（FM算法的桶结构），取得增益最大的可行移动只需 O(k)；
+所有移动都可以撤销，或回滚到之前的检查点。
+
+用法示例:
+    python3 scripts/partition_state.py benchmark            # luxembourg.osm 和 citationCiteseer
+    python3 scripts/partition_state.py benchmark graph.txt.xz -k 4 --moves 5000
+
+    from partition_state import PartitionState, fm_pass
+    state = PartitionState(graph)                  # 随机平衡初始划分，k 取头部的 k
+    v, target, gain = state.best_move(state.max_part_size(0.03))
+    state.move(v, target)
+    state.undo()
+    fm_pass(state, epsilon=0.03)                   # 一轮FM局部搜索
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .unified_loader import GraphInstance, load_instance
+    from .partition_eval import PartitionEvaluator, partition_count
+except ImportError:
+    from unified_loader import GraphInstance, load_instance
+    from partition_eval import PartitionEvaluator, partition_count
+
+logger = logging.getLogger(__name__)
+
+# 增益桶数组的最大长度（2 * 最大加权度数 + 1），超过时说明边权重过大，不适合桶结构
+_MAX_BUCKETS = 1 << 24
+_NO_PART = np.iinfo(np.int64).min
+
+DEFAULT_BENCHMARK_GRAPHS = (
+    "processed/graph_partitioning/compressed/large/luxembourg.osm.txt.xz",
+    "processed/graph_partitioning/compressed/large/citationCiteseer.txt.xz",
+)
+
+
+class GainBuckets:
+    """
+    按增益分桶的节点集合，分为多个队列（每个目标分区一个）
+
+    每个 (队列, 增益) 对应一个双向链表，插入、删除和更新为 O(1)，取某个队列的最大增益时
+    从上次的最大桶向下查找。每个节点最多属于一个队列，各队列共用链表数组。
+    链表使用Python列表保存（单元素访问比NumPy数组快）。
+    """
+
+    def __init__(self, n: int, max_gain: int, num_queues: int = 1):
+        if 2 * max_gain + 1 > _MAX_BUCKETS:
+            raise ValueError(f"增益范围过大（最大加权度数 {max_gain}），无法使用增益桶")
+        self.offset = max_gain
+        self.head = [[-1] * (2 * max_gain + 1) for _ in range(num_queues)]
+        self.top = [-1] * num_queues
+        self.next = [-1] * n
+        self.prev = [-1] * n
+        self.gain: List[Optional[int]] = [None] * n   # None 表示不在桶中
+        self.queue = [0] * n
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, v: int) -> bool:
+        return self.gain[v] is not None
+
+    def insert(self, v: int, gain: int, queue: int = 0):
+        head = self.head[queue]
+        b = gain + self.offset
+        h = head[b]
+        self.next[v] = h
+        self.prev[v] = -1
+        if h != -1:
+            self.prev[h] = v
+        head[b] = v
+        self.gain[v] = gain
+        self.queue[v] = queue
+        if b > self.top[queue]:
+            self.top[queue] = b
+        self.size += 1
+
+    def remove(self, v: int):
+        g = self.gain[v]
+        if g is None:
+            return
+        p, nx = self.prev[v], self.next[v]
+        if p != -1:
+            self.next[p] = nx
+        else:
+            self.head[self.queue[v]][g + self.offset] = nx
+        if nx != -1:
+            self.prev[nx] = p
+        self.gain[v] = None
+        self.size -= 1
+
+    def update(self, v: int, gain: int, queue: int = 0):
+        if self.gain[v] != gain or self.queue[v] != queue:
+            self.remove(v)
+            self.insert(v, gain, queue)
+
+    def max_gain(self, queue: int = 0) -> Optional[int]:
+        """队列中的最大增益，队列为空时返回 None"""
+        head, top = self.head[queue], self.top[queue]
+        while top >= 0 and head[top] == -1:
+            top -= 1
+        self.top[queue] = top
+        return None if top < 0 else top - self.offset
+
+    def peek(self, queue: int = 0) -> Optional[int]:
+        """队列中增益最大的一个节点（不移除），队列为空时返回 None"""
+        if self.max_gain(queue) is None:
+            return None
+        return self.head[queue][self.top[queue]]
+
+    def iter_from_max(self, queue: int = 0) -> Iterator[Tuple[int, int]]:
+        """按增益从大到小产生队列中的 (节点, 增益)"""
+        if self.max_gain(queue) is None:
+            return
+        head = self.head[queue]
+        for b in range(self.top[queue], -1, -1):
+            v = head[b]
+            while v != -1:
+                yield v, b - self.offset
+                v = self.next[v]
+
+
+class PartitionState:
+    """
+    可增量更新的图划分状态
+
+    conn[v, p] 为节点 v 到分区 p 中邻居的边权重之和，v 的内部度数为 conn[v, assignment[v]]，
+    外部度数为其余各列之和。把 v 移到分区 p 使割边权重减少 conn[v, p] - conn[v, assignment[v]]（增益）。
+    conn 占用 n * k * 8 字节内存。
+    """
+
+    def __init__(self, graph: GraphInstance, assignment: Optional[np.ndarray] = None,
+                 k: Optional[int] = None, seed: int = 0):
+        """
+        Args:
+            graph: 图实例
+            assignment: 初始划分方案（长度 n 的整数数组），默认为随机的平衡划分
+            k: 分区数，默认取头部的 k 字段
+            seed: 随机初始划分的种子
+        """
+        self.graph = graph
+        self.k = partition_count(graph, k)
+        csr = graph.csr
+        self.n = csr.n
+        self.indptr = csr.indptr
+        self.indices = csr.indices
+        self.weights = csr.weights.astype(np.int64, copy=False)
+
+        if assignment is None:
+            assignment = np.random.default_rng(seed).permutation(self.n) % self.k
+        assignment = np.array(assignment, dtype=np.int64)
+        if assignment.shape != (self.n,):
+            raise ValueError(f"划分方案的长度应为 {self.n}，得到: {assignment.shape}")
+        if self.n and (assignment.min() < 0 or assignment.max() >= self.k):
+            raise ValueError(f"分区编号必须在 [0, {self.k}) 范围内")
+        self.assignment = assignment
+
+        degrees = np.diff(self.indptr)
+        sources = np.repeat(np.arange(self.n, dtype=np.int64), degrees)
+        flat = sources * self.k + assignment[self.indices]
+        self.conn = np.bincount(flat, weights=self.weights,
+                                minlength=self.n * self.k).astype(np.int64).reshape(self.n, self.k)
+        self.part_sizes = np.bincount(assignment, minlength=self.k).astype(np.int64)
+        crossing = assignment[sources] != assignment[self.indices]
+        self.cut = int(self.weights[crossing].sum()) // 2
+
+        weighted_degrees = np.bincount(sources, weights=self.weights, minlength=self.n)
+        max_gain = int(weighted_degrees.max()) if self.n else 0
+        self.buckets = GainBuckets(self.n, max_gain, self.k)
+        self.target = [0] * self.n
+        self.locked = bytearray(self.n)
+        self._history: List[Tuple[int, int, int]] = []
+        self._refresh(np.arange(self.n, dtype=np.int64))
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    @property
+    def imbalance(self) -> float:
+        """max |V_i| / ceil(n / k) - 1"""
+        return float(self.part_sizes.max()) / -(-self.n // self.k) - 1.0
+
+    def max_part_size(self, epsilon: float = 0.03) -> int:
+        """不平衡度不超过 epsilon 时每个分区允许的最大节点数"""
+        return int((1.0 + epsilon) * -(-self.n // self.k))
+
+    def gain(self, v: int, target: int) -> int:
+        """把 v 移到 target 分区使割边权重减少的量（负数表示割变大）"""
+        return int(self.conn[v, target] - self.conn[v, self.assignment[v]])
+
+    def best_gain(self, v: int) -> Tuple[int, int]:
+        """v 的最佳移动 (目标分区, 增益)"""
+        t = self.target[v]
+        return t, self.gain(v, t)
+
+    def best_move(self, max_part_size: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        """
+        增益最大且目标分区未满的移动
+
+        节点按最佳目标分区分队列存放，只比较未满分区各自队列的最大增益，代价为 O(k)。
+        最佳目标分区已满的节点不会被选中（即使它到其他分区的移动可行），
+        与 KaFFPa 等k路FM实现一致，返回的移动不一定是全局最优的可行移动。
+
+        Args:
+            max_part_size: 移动后目标分区允许的最大节点数，None 表示不限制
+
+        Returns:
+            (节点, 目标分区, 增益)，没有可行移动时返回 None
+        """
+        best = None
+        buckets = self.buckets
+        sizes = self.part_sizes.tolist()
+        for part in range(self.k):
+            if max_part_size is not None and sizes[part] >= max_part_size:
+                continue
+            g = buckets.max_gain(part)
+            if g is not None and (best is None or g > best[2]):
+                best = (buckets.peek(part), part, g)
+        return best
+
+    # ------------------------------------------------------------------
+    # 移动、锁定和撤销
+    # ------------------------------------------------------------------
+
+    def move(self, v: int, target: Optional[int] = None, lock: bool = False) -> int:
+        """
+        把节点 v 移到 target 分区（默认为其最佳目标），返回割边权重的减少量
+
+        Args:
+            v: 节点编号
+            target: 目标分区
+            lock: 移动后锁定该节点（从增益桶中移除，直到 unlock_all）
+        """
+        if target is None:
+            target = self.target[v]
+        source = int(self.assignment[v])
+        if target == source or not 0 <= target < self.k:
+            raise ValueError(f"无效的目标分区 {target}（节点 {v} 当前在分区 {source}）")
+        self._history.append((v, source, self.locked[v]))
+        if lock:
+            self.locked[v] = 1
+            self.buckets.remove(v)
+        return self._apply(v, source, target)
+
+    def _apply(self, v: int, source: int, target: int) -> int:
+        s, e = self.indptr[v], self.indptr[v + 1]
+        nbrs = self.indices[s:e]
+        w = self.weights[s:e]
+        delta = int(self.conn[v, target] - self.conn[v, source])
+        self.cut -= delta
+        self.assignment[v] = target
+        # CSR中邻居不重复，可以直接按下标更新
+        self.conn[nbrs, source] -= w
+        self.conn[nbrs, target] += w
+        self.part_sizes[source] -= 1
+        self.part_sizes[target] += 1
+        self._refresh(np.append(nbrs, v))
+        return delta
+
+    def _refresh(self, nodes: np.ndarray):
+        """重新计算 nodes 的最佳目标分区和增益，并更新增益桶"""
+        rows = self.conn[nodes]
+        own = self.assignment[nodes]
+        arange = np.arange(len(nodes))
+        internal = rows[arange, own]
+        rows[arange, own] = _NO_PART
+        targets = rows.argmax(axis=1)
+        gains = rows[arange, targets] - internal
+        target, locked, buckets = self.target, self.locked, self.buckets
+        for x, g, t in zip(nodes.tolist(), gains.tolist(), targets.tolist()):
+            target[x] = t
+            if not locked[x]:
+                buckets.update(x, g, t)
+
+    def lock(self, v: int):
+        """锁定节点：不再出现在 best_move 的结果中"""
+        self.locked[v] = 1
+        self.buckets.remove(v)
+
+    def unlock_all(self):
+        """解锁所有节点并放回增益桶"""
+        locked = [v for v in range(self.n) if self.locked[v]]
+        self.locked = bytearray(self.n)
+        for v in locked:
+            self.buckets.insert(v, self.gain(v, self.target[v]), self.target[v])
+
+    def checkpoint(self) -> int:
+        """当前的撤销位置，供 rollback 使用"""
+        return len(self._history)
+
+    def undo(self) -> int:
+        """撤销最近一次移动（恢复节点的锁定状态），返回割边权重的减少量"""
+        if not self._history:
+            raise IndexError("没有可撤销的移动")
+        v, source, was_locked = self._history.pop()
+        self.locked[v] = was_locked
+        if was_locked:
+            self.buckets.remove(v)
+        return self._apply(v, int(self.assignment[v]), source)
+
+    def rollback(self, checkpoint: int):
+        """撤销 checkpoint 之后的所有移动"""
+        while len(self._history) > checkpoint:
+            self.undo()
+
+    def clear_history(self):
+        """丢弃撤销记录（不改变当前状态）"""
+        self._history.clear()
+
+    def verify(self) -> List[str]:
+        """从头重新计算所有量并与增量维护的结果比较，返回不一致的描述（用于调试）"""
+        fresh = PartitionState(self.graph, self.assignment, self.k)
+        problems = []
+        if fresh.cut != self.cut:
+            problems.append(f"割边权重: 增量 {self.cut}，重新计算 {fresh.cut}")
+        if not np.array_equal(fresh.part_sizes, self.part_sizes):
+            problems.append("分区大小不一致")
+        if not np.array_equal(fresh.conn, self.conn):
+            problems.append("节点到分区的连接权重不一致")
+        for v in range(self.n):
+            if not self.locked[v] and self.buckets.gain[v] != fresh.buckets.gain[v]:
+                problems.append(f"节点 {v} 的增益: 增量 {self.buckets.gain[v]}，"
+                                f"重新计算 {fresh.buckets.gain[v]}")
+                break
+        return problems
+
+
+def fm_pass(state: PartitionState, epsilon: float = 0.03, max_moves: Optional[int] = None,
+            patience: int = 200) -> int:
+    """
+    一轮 Fiduccia-Mattheyses 局部搜索
+
+    反复执行增益最大的可行移动并锁定被移动的节点（允许负增益移动），连续 patience 次移动
+    没有得到更好的可行解时停止，最后回滚到这一轮中割边权重最小的可行状态。
+
+    Returns:
+        割边权重的减少量
+    """
+    limit = state.max_part_size(epsilon)
+    start_cut = state.cut
+    best_cut = state.cut if state.part_sizes.max() <= limit else None
+    best_point = state.checkpoint()
+    moves = since_best = 0
+    while max_moves is None or moves < max_moves:
+        move = state.best_move(limit)
+        if move is None:
+            break
+        v, target, _ = move
+        state.move(v, target, lock=True)
+        moves += 1
+        if state.part_sizes.max() <= limit and (best_cut is None or state.cut < best_cut):
+            best_cut = state.cut
+            best_point = state.checkpoint()
+            since_best = 0
+        else:
+            since_best += 1
+            if since_best >= patience:
+                break
+    state.rollback(best_point)
+    state.unlock_all()
+    state.clear_history()
+    return start_cut - state.cut
+
+
+def benchmark(path: str, k: Optional[int] = None, moves: int = 2000, recompute_moves: int = 50,
+              seed: int = 0) -> dict:
+    """
+    比较增量更新与每步完整重新计算割边的耗时
+
+    随机选取 moves 次移动（随机节点移到随机的其他分区）分别用增量状态执行，
+    再对前 recompute_moves 次移动用 PartitionEvaluator 完整重新计算，最后运行一轮FM。
+    """
+    graph = load_instance(path)
+    rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    state = PartitionState(graph, k=k, seed=seed)
+    build_s = time.perf_counter() - start
+    nodes = rng.integers(0, state.n, moves)
+    shifts = rng.integers(1, state.k, moves)
+
+    start = time.perf_counter()
+    for v, shift in zip(nodes.tolist(), shifts.tolist()):
+        state.move(v, (int(state.assignment[v]) + shift) % state.k)
+    incremental_s = (time.perf_counter() - start) / moves
+    final_cut = state.cut
+    start = time.perf_counter()
+    state.rollback(0)
+    undo_s = (time.perf_counter() - start) / moves
+
+    evaluator = PartitionEvaluator(graph, state.k)
+    assignment = state.assignment.copy()
+    count = min(recompute_moves, moves)
+    start = time.perf_counter()
+    for v, shift in zip(nodes[:count].tolist(), shifts[:count].tolist()):
+        assignment[v] = (assignment[v] + shift) % state.k
+        evaluator(assignment)
+    recompute_s = (time.perf_counter() - start) / max(count, 1)
+
+    # 校验：增量结果与完整重新计算一致
+    check = state.assignment.copy()
+    for v, shift in zip(nodes.tolist(), shifts.tolist()):
+        check[v] = (check[v] + shift) % state.k
+    expected_cut = int(evaluator(check).cut)
+
+    start = time.perf_counter()
+    initial_cut = state.cut
+    improvement = fm_pass(state)
+    fm_s = time.perf_counter() - start
+
+    return {
+        "name": graph.name, "n": graph.n, "m": graph.m, "k": state.k,
+        "build_s": build_s, "incremental_us": incremental_s * 1e6, "undo_us": undo_s * 1e6,
+        "recompute_us": recompute_s * 1e6, "speedup": recompute_s / incremental_s,
+        "consistent": final_cut == expected_cut,
+        "fm_initial_cut": initial_cut, "fm_cut": state.cut, "fm_improvement": improvement,
+        "fm_s": fm_s, "imbalance": state.imbalance,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental partition state: benchmark against full recomputation')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('benchmark', help='Time incremental moves vs full cut recomputation')
+    bench_parser.add_argument('graphs', nargs='*', help='Graph files (default: luxembourg.osm and citationCiteseer)')
+    bench_parser.add_argument('-k', type=int, help='Number of blocks (default: k from the file header)')
+    bench_parser.add_argument('--moves', type=int, default=2000, help='Random moves to time (default: 2000)')
+    bench_parser.add_argument('--recompute-moves', type=int, default=50,
+                              help='Moves timed with full recomputation (default: 50)')
+    bench_parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logging.getLogger("unified_loader").setLevel(logging.WARNING)
+
+    graphs = args.graphs or [p for p in DEFAULT_BENCHMARK_GRAPHS if os.path.exists(p)]
+    if not graphs:
+        print("未找到默认的测试图，请在仓库根目录运行或指定图文件", file=sys.stderr)
+        sys.exit(1)
+    for path in graphs:
+        r = benchmark(path, args.k, args.moves, args.recompute_moves, args.seed)
+        print(f"{r['name']}（n={r['n']}, m={r['m']}, k={r['k']}）")
+        print(f"  构建状态: {r['build_s']:.3f}s")
+        print(f"  增量移动: {r['incremental_us']:.1f} µs/次，撤销: {r['undo_us']:.1f} µs/次")
+        print(f"  完整重新计算: {r['recompute_us']:.1f} µs/次，加速 {r['speedup']:.0f} 倍")
+        print(f"  与完整重新计算一致: {'是' if r['consistent'] else '否'}")
+        print(f"  一轮FM: 割 {r['fm_initial_cut']} -> {r['fm_cut']}，耗时 {r['fm_s']:.2f}s，"
+              f"不平衡度 {r['imbalance']:.4f}")
+        if not r["consistent"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
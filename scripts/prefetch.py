@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+实例预取迭代器
+在后台线程池中提前解压和解析后续实例，使数据加载与训练计算重叠。
+lzma/zlib 解压和NumPy解析期间会释放GIL，因此线程池可以真正并行。
+
+同时支持普通迭代和 async for：
+
+    from prefetch import InstancePrefetcher, prefetch_split
+
+    for instance in prefetch_split("splits/train.txt", ahead=8, workers=4):
+        train_step(instance)
+
+    async for instance in prefetch_split("splits/train.txt", max_bytes=2 << 30):
+        await train_step(instance)
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, List, Optional, Tuple, Union
+
+try:
+    from .unified_loader import (GraphInstance, NPPInstance, load_instance, load_dataset_split,
+                                 instance_nbytes, estimate_instance_nbytes)
+except ImportError:
+    from unified_loader import (GraphInstance, NPPInstance, load_instance, load_dataset_split,
+                                instance_nbytes, estimate_instance_nbytes)
+
+logger = logging.getLogger(__name__)
+
+Instance = Union[GraphInstance, NPPInstance]
+
+
+class InstancePrefetcher:
+    """
+    按输入顺序产生实例的预取迭代器
+
+    最多保持 ahead 个实例在加载中或已加载待取用；设置 max_bytes 时，提交加载任务前按头部
+    估算实例大小并预留预算，加载中（按估算）和已加载待取用（按实际大小）的实例总大小
+    将超过上限时暂停提交（至少保留一个）。
+    加载失败的文件记录在 failed_files 中并跳过，与 batch_load_instances 一致。
+    """
+
+    def __init__(self, paths: Iterable[str], ahead: int = 4, workers: int = 2,
+                 max_bytes: Optional[int] = None,
+                 loader: Callable[[str], Instance] = load_instance,
+                 skip_errors: bool = True):
+        """
+        Args:
+            paths: 数据文件路径序列
+            ahead: 提前加载的实例数
+            workers: 线程池大小
+            max_bytes: 加载中和已加载待取用实例的内存上限（字节），None 表示不限制
+            loader: 加载函数，默认 load_instance
+            skip_errors: False 时加载失败直接抛出异常
+        """
+        if ahead < 1:
+            raise ValueError(f"ahead 必须至少为1，得到: {ahead}")
+        self.ahead = ahead
+        self.max_bytes = max_bytes
+        self.skip_errors = skip_errors
+        self.failed_files: List[Tuple[str, str]] = []
+        self._loader = loader
+        self._paths = iter(paths)
+        self._exhausted = False
+        # (路径, 加载任务, 提交时预留的估算字节数)
+        self._pending: Deque[Tuple[str, Future, int]] = deque()
+        # 因预算不足暂缓提交的下一个文件及其估算大小
+        self._deferred: Optional[Tuple[str, int]] = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def _load(self, path: str) -> Tuple[Instance, int]:
+        instance = self._loader(path)
+        return instance, instance_nbytes(instance)
+
+    def _estimate(self, path: str) -> int:
+        if self.max_bytes is None:
+            return 0
+        try:
+            return estimate_instance_nbytes(path)
+        except Exception as e:
+            # 无法估算（如LFS指针）时不预留，加载任务会报告具体错误
+            logger.debug(f"无法估算实例大小 {path}: {e}")
+            return 0
+
+    def _reserved_bytes(self) -> int:
+        """已提交任务占用的预算：加载完成的按实际大小，加载中的按提交时的估算"""
+        total = 0
+        for _, future, estimate in self._pending:
+            if not future.done():
+                total += estimate
+            elif not future.cancelled() and future.exception() is None:
+                total += future.result()[1]
+        return total
+
+    def _fill(self):
+        while not self._exhausted and len(self._pending) < self.ahead:
+            if self._deferred is None:
+                path = next(self._paths, None)
+                if path is None:
+                    self._exhausted = True
+                    break
+                self._deferred = (path, self._estimate(path))
+            path, estimate = self._deferred
+            if (self.max_bytes is not None and self._pending
+                    and self._reserved_bytes() + estimate > self.max_bytes):
+                break
+            self._deferred = None
+            self._pending.append((path, self._executor.submit(self._load, path), estimate))
+
+    def _handle_error(self, path: str, error: Exception):
+        if not self.skip_errors:
+            self.close()
+            raise error
+        logger.error(f"加载文件失败 {path}: {error}")
+        self.failed_files.append((path, str(error)))
+
+    def __iter__(self) -> "InstancePrefetcher":
+        return self
+
+    def __next__(self) -> Instance:
+        while True:
+            self._fill()
+            if not self._pending:
+                self.close()
+                raise StopIteration
+            path, future, _ = self._pending.popleft()
+            try:
+                instance, _ = future.result()
+            except Exception as e:
+                self._handle_error(path, e)
+                continue
+            # 立即补充加载任务，使下一个实例在调用方处理当前实例时开始加载
+            self._fill()
+            return instance
+
+    def __aiter__(self) -> "InstancePrefetcher":
+        return self
+
+    async def __anext__(self) -> Instance:
+        while True:
+            self._fill()
+            if not self._pending:
+                self.close()
+                raise StopAsyncIteration
+            path, future, _ = self._pending.popleft()
+            try:
+                instance, _ = await asyncio.wrap_future(future)
+            except Exception as e:
+                self._handle_error(path, e)
+                continue
+            self._fill()
+            return instance
+
+    def close(self):
+        """取消尚未开始的加载任务并关闭线程池"""
+        self._exhausted = True
+        for _, future, _ in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._deferred = None
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self) -> "InstancePrefetcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def prefetch_split(split_file: str, base_path: str = "processed/", **kwargs) -> InstancePrefetcher:
+    """
+    对 load_dataset_split 读取的划分文件创建预取迭代器
+
+    划分文件中的相对路径若不存在，则按 create_dataset_split 的约定拼接 base_path。
+
+    Args:
+        split_file: 划分文件路径
+        base_path: 数据根目录
+        **kwargs: 传给 InstancePrefetcher 的参数（ahead, workers, max_bytes 等）
+
+    Returns:
+        InstancePrefetcher: 预取迭代器
+    """
+    paths = [path if os.path.isabs(path) or os.path.exists(path) else os.path.join(base_path, path)
+             for path in load_dataset_split(split_file)]
+    return InstancePrefetcher(paths, **kwargs)
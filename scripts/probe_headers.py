@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+数据集头部信息探测脚本
+并行读取 processed/ 下所有数据文件的头部，只解压到第一个有效数据行
+"""
+
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+from dataclasses import asdict
+from typing import Any, Dict, List, Tuple
+
+try:
+    from .unified_loader import probe_header, find_data_files
+except ImportError:
+    from unified_loader import probe_header, find_data_files
+
+
+def probe_worker(path: str) -> Tuple[str, Dict[str, Any], str]:
+    """
+    探测单个文件的工作函数（用于多进程）
+    
+    Returns:
+        (path, info, error): 文件路径、头部信息字典、错误信息（成功时为空）
+    """
+    start = time.perf_counter()
+    try:
+        info = asdict(probe_header(path))
+    except Exception as e:
+        return path, {}, str(e)
+    info['probe_ms'] = (time.perf_counter() - start) * 1000
+    return path, info, ''
+
+
+def probe_corpus(root: str, workers: int = 4) -> List[Tuple[str, Dict[str, Any], str]]:
+    """
+    并行探测目录下所有数据文件的头部
+    
+    Args:
+        root: 数据根目录
+        workers: 工作进程数
+        
+    Returns:
+        按路径排序的 (path, info, error) 列表
+    """
+    files = find_data_files(root)
+    if workers <= 1:
+        return [probe_worker(path) for path in files]
+    with mp.Pool(workers) as pool:
+        return list(pool.imap(probe_worker, files, chunksize=8))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe dataset headers without decompressing file bodies')
+    parser.add_argument('root', nargs='?', default='processed/', help='Dataset root directory (default: processed/)')
+    parser.add_argument('--workers', type=int, default=mp.cpu_count(),
+                       help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--json', action='store_true', help='Output one JSON object per line')
+    
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    results = probe_corpus(args.root, args.workers)
+    elapsed = time.perf_counter() - start
+    
+    failed = 0
+    for path, info, error in results:
+        if error:
+            failed += 1
+        if args.json:
+            record = {'path': path, 'error': error} if error else info
+            print(json.dumps(record, ensure_ascii=False))
+        elif error:
+            print(f"✗ {path}: {error}")
+        else:
+            m = info['m'] if info['m'] is not None else '-'
+            k = info['k'] if info['k'] is not None else '-'
+            print(f"{info['problem']:<22} {info['name']:<32} n={info['n']:<10} m={m:<12} k={k:<4} {path}")
+    
+    if not args.json:
+        total = len(results)
+        per_file = elapsed / total * 1000 if total else 0
+        print(f"\n共探测 {total} 个文件，失败 {failed} 个，耗时 {elapsed:.2f} 秒（平均 {per_file:.1f} 毫秒/文件）",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,57 @@
 支持图划分、图着色和数值划分问题
 """
 
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Iterator, Dict, Any, Union
+from dataclasses import dataclass, field
+from typing import IO, List, Tuple, Optional, Iterator, Dict, Any, Union, Callable
 import io
 import os
+import sys
+import json
+import mmap
+import struct
 import gzip
 import lzma
+import queue
+import functools
+import tempfile
+import contextlib
 import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时使用纯Python解析路径
+    np = None
+
+try:
+    from . import load_stats as _load_stats
+    from .load_stats import LoadStats, StatsAggregator, collect_stats, set_stats_hook
+except ImportError:
+    import load_stats as _load_stats
+    from load_stats import LoadStats, StatsAggregator, collect_stats, set_stats_hook
+
+__all__ = [
+    # 数据结构
+    "Header", "EdgeArrays", "CSRGraph", "GraphInstance", "NPPInstance", "HeaderInfo",
+    # 加载
+    "load_instance", "load_graph_txt", "load_npp_txt", "iter_edges", "parse_instance_bytes",
+    "batch_load_instances", "parse_header", "probe_header", "uncompressed_size",
+    "instance_nbytes", "estimate_instance_nbytes",
+    # 数据文件
+    "find_data_files", "load_dataset_split", "create_dataset_split", "is_parts_dir", "part_files",
+    "source_stat", "is_lfs_pointer", "is_tar_xz", "atomic_write", "PARTS_SUFFIX", "DATA_SUFFIXES", "SIZE_TIERS",
+    # 缓存与配置
+    "configure_cache", "configure_memory_cache", "memory_cache_stats", "configure_dense_adjacency",
+    "InstanceCache", "CACHE_DIR_ENV", "DEFAULT_MEMORY_CACHE_BYTES", "DEFAULT_DENSE_THRESHOLD",
+    "DEFAULT_DENSE_MAX_NODES",
+    # 二进制实例格式（.cobin）
+    "is_binary_file", "read_binary_header", "read_binary_instance", "BINARY_MAGIC", "BINARY_VERSION",
+    "BINARY_SUFFIX", "BINARY_HEADER", "BINARY_KIND_GRAPH", "BINARY_KIND_NPP", "BINARY_FLAG_CSR",
+    "BINARY_FLAG_BIGINT", "BINARY_FLAG_SORTED", "BINARY_FLAG_SIGNED",
+    # 分阶段统计（从 load_stats 转出）
+    "LoadStats", "StatsAggregator", "collect_stats", "set_stats_hook",
+]
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -28,21 +72,378 @@ def _iter_lines(fp: io.TextIOBase) -> Iterator[str]:
         yield line
 
 
+def _parse_header_line(ln: str, h: Header):
+    """解析单行 "# key: value" 注释并写入头部字典"""
+    kv = ln[1:].strip().split(":", 1)
+    if len(kv) == 2:
+        h[kv[0].strip().lower()] = kv[1].strip()
+
+
 def parse_header(raw: str) -> Header:
     """解析文件头部信息"""
     h: Header = {}
     for ln in raw.splitlines():
         if ln.startswith("#"):
-            kv = ln[1:].strip().split(":", 1)
-            if len(kv) == 2:
-                h[kv[0].strip().lower()] = kv[1].strip()
+            _parse_header_line(ln, h)
     return h
 
 
+def _read_header_block(fp: Union[io.TextIOBase, io.BufferedIOBase]) -> Tuple[Header, Optional[str]]:
+    """
+    读取文件开头的注释头部，遇到第一个有效数据行即停止
+    
+    Args:
+        fp: 文本或二进制文件对象，读取后停在第一个有效数据行之后
+        
+    Returns:
+        (meta, first_line): 头部信息和第一个有效数据行（文件无数据时为None）
+    """
+    h: Header = {}
+    for line in fp:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            _parse_header_line(line, h)
+            continue
+        return h, line
+    return h, None
+
+
+_TAR_BLOCK = 512
+_STREAM_BUFFER_SIZE = 1 << 20
+
+
+def _tar_size(field: bytes) -> int:
+    """解析tar头部的size字段，兼容八进制和GNU base-256编码"""
+    if field[0] & 0x80:
+        return int.from_bytes(field[1:], "big")
+    field = field.split(b"\0", 1)[0].strip()
+    return int(field, 8) if field else 0
+
+
+def _is_tar_header(block: bytes) -> bool:
+    """通过ustar魔数和校验和判断是否为tar头部块"""
+    if len(block) < _TAR_BLOCK or block[257:262] != b"ustar":
+        return False
+    try:
+        expected = int(block[148:156].split(b"\0", 1)[0].strip() or b"0", 8)
+    except ValueError:
+        return False
+    return sum(block[:148]) + 8 * 32 + sum(block[156:_TAR_BLOCK]) == expected
+
+
+def _parse_pax(payload: bytes) -> Header:
+    """解析PAX扩展头部记录（"长度 键=值\\n"）"""
+    records: Header = {}
+    pos = 0
+    while pos < len(payload):
+        sp = payload.find(b" ", pos)
+        if sp < 0:
+            break
+        length = int(payload[pos:sp])
+        if length <= 0:
+            break
+        key, _, value = payload[sp + 1:pos + length - 1].partition(b"=")
+        records[key.decode("utf-8")] = value.decode("utf-8")
+        pos += length
+    return records
+
+
+class _XzTarStream(io.RawIOBase):
+    """
+    流式读取 .xz 文件的数据负载
+
+    使用 lzma 增量解压，自行解析 tar/PAX 头部并定位到第一个普通文件成员，
+    之后只输出该成员的内容。如果解压后的数据不是tar归档，则原样输出。
+    内存占用只与缓冲区大小有关，与文件大小无关。
+    """
+
+    def __init__(self, path: str):
+        self._fp = lzma.open(path, "rb")
+        self._pending = b""
+        self._remaining: Optional[int] = None  # None 表示不限长度（非tar数据）
+        self.member_size: Optional[int] = None
+        try:
+            self._locate_member(path)
+        except Exception:
+            self._fp.close()
+            raise
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._fp.read(size)
+        if len(data) != size:
+            raise EOFError(f"压缩数据被截断: 期望 {size} 字节, 实际 {len(data)} 字节")
+        return data
+
+    def _skip_payload(self, size: int) -> bytes:
+        padded = (size + _TAR_BLOCK - 1) // _TAR_BLOCK * _TAR_BLOCK
+        return self._read_exact(padded)[:size]
+
+    def _locate_member(self, path: str):
+        block = self._fp.read(_TAR_BLOCK)
+        if not _is_tar_header(block):
+            # 普通xz压缩文本，没有tar封装
+            self._pending = block
+            return
+
+        pax: Header = {}
+        while True:
+            if len(block) < _TAR_BLOCK or not block.strip(b"\0"):
+                raise ValueError(f"tar归档中没有数据文件: {path}")
+            if not _is_tar_header(block):
+                raise ValueError(f"无效的tar头部: {path}")
+
+            size = int(pax.get("size", _tar_size(block[124:136])))
+            typeflag = block[156:157]
+
+            if typeflag == b"x":
+                pax = _parse_pax(self._skip_payload(size))
+            elif typeflag in (b"0", b"\0", b"7"):
+                self._remaining = size
+                self.member_size = size
+                return
+            else:
+                # 全局PAX头部、GNU长文件名、目录、链接等直接跳过
+                self._skip_payload(size)
+                pax = {}
+            block = self._fp.read(_TAR_BLOCK)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast("B")
+        if self._pending:
+            n = min(len(view), len(self._pending))
+            view[:n] = self._pending[:n]
+            self._pending = self._pending[n:]
+            if self._remaining is not None:
+                self._remaining -= n
+            return n
+
+        want = len(view)
+        if self._remaining is not None:
+            want = min(want, self._remaining)
+        if want == 0:
+            return 0
+
+        data = self._fp.read(want)
+        n = len(data)
+        view[:n] = data
+        if self._remaining is not None:
+            if n == 0:
+                raise EOFError(f"tar成员数据被截断: 仍缺少 {self._remaining} 字节")
+            self._remaining -= n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._fp.close()
+        super().close()
+
+
+# split_large_files.py 生成的分卷目录: <文件名>.parts/<文件名>.partaa.xz ...
+PARTS_SUFFIX = ".parts"
+_PREFETCH_CHUNKS = 16
+
+
+def is_parts_dir(path: str) -> bool:
+    return path.endswith(PARTS_SUFFIX) and os.path.isdir(path)
+
+
+def part_files(path: str) -> List[str]:
+    """
+    返回分卷目录中按拼接顺序排列的分卷文件
+    
+    split 生成的后缀（aa, ab, ..., zaaa, ...）按字典序排列即为原始顺序。
+    """
+    prefix = os.path.basename(path.rstrip(os.sep))[:-len(PARTS_SUFFIX)] + ".part"
+    names = sorted(name for name in os.listdir(path)
+                   if name.startswith(prefix) and name.endswith(".xz"))
+    if not names:
+        raise ValueError(f"分卷目录中没有分卷文件: {path}")
+    return [os.path.join(path, name) for name in names]
+
+
+def source_stat(path: str) -> Tuple[int, int]:
+    """返回数据源的 (大小, mtime_ns)，分卷目录取所有分卷的总大小和最新修改时间"""
+    if is_parts_dir(path):
+        stats = [os.stat(part) for part in part_files(path)]
+        return sum(st.st_size for st in stats), max(st.st_mtime_ns for st in stats)
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class _PartsStream(io.RawIOBase):
+    """
+    把分卷目录中的各个 .xz 分卷按顺序解压，作为一个连续的流输出
+    
+    后台线程提前解压后续数据（包括下一个分卷），通过有界队列交给读取方，
+    解压与解析并行进行，内存占用不超过 prefetch 个缓冲区。
+    分卷中保存的是 split_large_files.py 先解压再切分的原始文本。
+    """
+    
+    def __init__(self, path: str, prefetch: int = _PREFETCH_CHUNKS):
+        self._parts = part_files(path)
+        for part in self._parts:
+            _check_lfs_pointer(part)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._pending = memoryview(b"")
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, name=f"parts-prefetch:{path}",
+                                        daemon=True)
+        self._thread.start()
+    
+    def _put(self, item) -> bool:
+        # 带超时地等待队列空位，读取方关闭流后及时退出
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _produce(self):
+        try:
+            for part in self._parts:
+                with lzma.open(part, "rb") as fp:
+                    while True:
+                        data = fp.read(_STREAM_BUFFER_SIZE)
+                        if not data:
+                            break
+                        if not self._put(data):
+                            return
+            self._put(None)
+        except BaseException as e:
+            self._put(e)
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast("B")
+        while not self._pending:
+            if self._finished:
+                return 0
+            item = self._queue.get()
+            if item is None:
+                self._finished = True
+                return 0
+            if isinstance(item, BaseException):
+                self._finished = True
+                raise item
+            self._pending = memoryview(item)
+        
+        n = min(len(view), len(self._pending))
+        view[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+
+# 新建文件的默认权限：mkstemp 创建的临时文件为 0600，替换前按 umask 放宽为与 open() 一致
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = "wb", encoding: Optional[str] = None) -> Iterator[IO]:
+    """
+    先写同一目录下的临时文件，成功后原子替换目标文件；出错时删除临时文件
+    
+    Args:
+        path: 目标文件路径（所在目录必须已存在）
+        mode: 写入模式，"wb" 或 "w"
+        encoding: 文本模式的编码
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+_LFS_POINTER_PREFIX = b"version https://git-lfs"
+
+
+def is_lfs_pointer(path: str) -> bool:
+    """文件是否为尚未通过 git lfs pull 下载的Git LFS指针（分卷目录返回False）"""
+    if is_parts_dir(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(_LFS_POINTER_PREFIX)) == _LFS_POINTER_PREFIX
+
+
+def is_tar_xz(path: str) -> bool:
+    """xz 文件解压后是否为tar封装（检查第一个块是否为合法的tar头部）"""
+    with lzma.open(path, 'rb') as f:
+        return _is_tar_header(f.read(_TAR_BLOCK))
+
+
+def _check_lfs_pointer(path: str):
+    """压缩文件尚未通过 git lfs pull 下载时给出明确的错误"""
+    if is_lfs_pointer(path):
+        raise ValueError(f"文件是Git LFS指针，请先运行 git lfs pull: {path}")
+
+
+def _open_binary(path: str) -> io.BufferedIOBase:
+    """
+    以二进制流方式打开文件，透明处理gzip、xz（含tar封装）压缩和 .parts 分卷目录
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        解压后的二进制流
+    """
+    if is_parts_dir(path):
+        return io.BufferedReader(_PartsStream(path), buffer_size=_STREAM_BUFFER_SIZE)
+    if path.endswith(('.gz', '.xz')):
+        _check_lfs_pointer(path)
+    
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    elif path.endswith('.xz'):
+        return io.BufferedReader(_XzTarStream(path), buffer_size=_STREAM_BUFFER_SIZE)
+    else:
+        return open(path, 'rb')
+
+
+def _open_instrumented(path: str, stats: Optional[LoadStats]) -> io.BufferedIOBase:
+    """打开二进制流；启用统计时包装解压流，记录读取解压耗时和解压后的字节数"""
+    f = _open_binary(path)
+    if stats is None:
+        return f
+    return io.BufferedReader(_load_stats.TimedReader(f, stats), buffer_size=_STREAM_BUFFER_SIZE)
+
+
+def _read_header_instrumented(f: io.BufferedIOBase,
+                              stats: Optional[LoadStats]) -> Tuple[Header, Optional[str]]:
+    with _load_stats.stage(stats, _load_stats.STAGE_HEADER):
+        return _read_header_block(f)
+
+
 def _open_file(path: str) -> io.TextIOBase:
     """
     智能打开文件，支持普通文件、gzip和xz压缩格式
     
+    xz文件在进程内流式解压并跳过tar头部，不会一次性读入整个文件。
+    
     Args:
         path: 文件路径
         
@@ -51,193 +452,1199 @@ def _open_file(path: str) -> io.TextIOBase:
     """
     if path.endswith('.gz'):
         return gzip.open(path, 'rt', encoding='utf-8')
-    elif path.endswith('.xz'):
-        # 对于xz文件，需要特殊处理以跳过tar头部
-        import subprocess
-        try:
-            # 尝试使用tar命令提取内容
-            result = subprocess.run(
-                ['bash', '-c', f'xz -dc "{path}" | tar -xOf - 2>/dev/null'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return io.StringIO(result.stdout)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            # 如果tar命令失败，回退到常规方法
-            return lzma.open(path, 'rt', encoding='utf-8')
+    elif path.endswith('.xz') or is_parts_dir(path):
+        return io.TextIOWrapper(_open_binary(path), encoding='utf-8')
     else:
         return open(path, 'r', encoding='utf-8')
 
 
+def _index_dtype(max_value: int) -> "np.dtype":
+    """选择能容纳 max_value 的最小有符号整数类型（int32 或 int64）"""
+    return np.dtype(np.int32) if max_value <= np.iinfo(np.int32).max else np.dtype(np.int64)
+
+
+@dataclass
+class EdgeArrays:
+    """
+    边列表的数组表示（0-based，每条无向边只存一次且 u < v）
+    
+    与元组列表相比每条边只占 8~24 字节，节点索引在可能时使用int32。
+    """
+    u: "np.ndarray"
+    v: "np.ndarray"
+    w: "np.ndarray"
+    
+    def __len__(self) -> int:
+        return len(self.u)
+    
+    @classmethod
+    def from_arrays(cls, u: "np.ndarray", v: "np.ndarray", w: "np.ndarray") -> "EdgeArrays":
+        """由任意整数数组构造，并压缩到合适的整数类型"""
+        max_node = int(max(u.max(), v.max())) if len(u) else 0
+        idx_dtype = _index_dtype(max_node)
+        w_dtype = _index_dtype(int(np.abs(w).max())) if len(w) else np.dtype(np.int32)
+        return cls(u.astype(idx_dtype, copy=False),
+                   v.astype(idx_dtype, copy=False),
+                   w.astype(w_dtype, copy=False))
+    
+    @classmethod
+    def from_edges(cls, edges: List[Tuple[int, int, int]]) -> "EdgeArrays":
+        """由 (u, v, w) 元组列表构造"""
+        if np is None:
+            raise ImportError("NumPy 未安装，无法构建数组表示")
+        arr = np.array(edges, dtype=np.int64).reshape(-1, 3)
+        return cls.from_arrays(arr[:, 0], arr[:, 1], arr[:, 2])
+    
+    def tolist(self) -> List[Tuple[int, int, int]]:
+        """转换为 (u, v, w) 元组列表"""
+        return list(zip(self.u.tolist(), self.v.tolist(), self.w.tolist()))
+
+
+@dataclass
+class CSRGraph:
+    """
+    无向图的CSR（压缩稀疏行）表示
+    
+    每条无向边在两个端点处各存一次，节点 i 的邻居为
+    indices[indptr[i]:indptr[i+1]]，按邻居编号升序排列。
+    """
+    indptr: "np.ndarray"   # int64, 长度 n+1
+    indices: "np.ndarray"  # 邻居节点，长度 2m
+    weights: "np.ndarray"  # 对应边权重，长度 2m
+    
+    @property
+    def n(self) -> int:
+        return len(self.indptr) - 1
+    
+    @classmethod
+    def from_edge_arrays(cls, edges: EdgeArrays, n: int) -> "CSRGraph":
+        """由边数组构建CSR，n 小于实际最大节点编号时自动扩展"""
+        src = np.concatenate((edges.u, edges.v))
+        dst = np.concatenate((edges.v, edges.u))
+        wts = np.concatenate((edges.w, edges.w))
+        n_rows = max(n, int(src.max()) + 1) if len(src) else n
+        
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, dst[order], wts[order])
+    
+    def degrees(self) -> "np.ndarray":
+        """各节点的度数"""
+        return np.diff(self.indptr)
+    
+    def neighbors(self, node: int) -> "np.ndarray":
+        """节点的邻居数组（视图，不复制）"""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+    
+    def neighbor_weights(self, node: int) -> "np.ndarray":
+        """节点各邻边的权重数组（视图，不复制）"""
+        return self.weights[self.indptr[node]:self.indptr[node + 1]]
+
+
 @dataclass
 class GraphInstance:
-    """图实例数据结构"""
+    """
+    图实例数据结构
+    
+    边可以以元组列表 edges 或数组 edge_array 的形式给出，另一种表示在首次访问时
+    才构建并缓存。csr 属性提供按需构建的CSR邻接表示。
+    """
     name: str
     n: int
     m: int
-    edges: List[Tuple[int, int, int]]  # 0-based, (u, v, w)
+    edges: Optional[List[Tuple[int, int, int]]]  # 0-based, (u, v, w)
     meta: Header
+    # 使用 default_factory 避免生成类属性，否则 __getattr__ 无法接管懒构建
+    edge_array: Optional[EdgeArrays] = field(default_factory=lambda: None, repr=False, compare=False)
+    _csr: Optional[CSRGraph] = field(default=None, init=False, repr=False, compare=False)
+    _dense: Any = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """验证数据完整性"""
+        if self.edges is None and self.edge_array is None:
+            raise ValueError("edges 和 edge_array 至少需要提供一个")
+        # 缺失的表示从实例字典中移除，由 __getattr__ 在首次访问时构建
+        if self.edges is None:
+            del self.__dict__["edges"]
+        if self.edge_array is None:
+            del self.__dict__["edge_array"]
+        
         if self.n <= 0:
             raise ValueError(f"节点数必须为正数，得到: {self.n}")
         if self.m < 0:
             raise ValueError(f"边数不能为负数，得到: {self.m}")
-        if len(self.edges) != self.m:
-            logger.warning(f"边数不匹配: 头部声明 {self.m}, 实际 {len(self.edges)}")
+        actual = self.num_edges
+        if actual != self.m:
+            logger.warning(f"边数不匹配: 头部声明 {self.m}, 实际 {actual}")
+    
+    def __getattr__(self, name: str):
+        # 只在属性不存在时调用，用于懒构建另一种边表示
+        if name == "edges" and "edge_array" in self.__dict__:
+            self.edges = self.__dict__["edge_array"].tolist()
+            return self.edges
+        if name == "edge_array" and "edges" in self.__dict__:
+            self.edge_array = EdgeArrays.from_edges(self.__dict__["edges"])
+            return self.edge_array
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    @property
+    def num_edges(self) -> int:
+        """实际边数（不触发表示转换）"""
+        if "edge_array" in self.__dict__:
+            return len(self.__dict__["edge_array"])
+        return len(self.__dict__["edges"])
+    
+    @property
+    def csr(self) -> CSRGraph:
+        """CSR邻接表示，首次访问时构建并缓存"""
+        if self._csr is None:
+            if np is None:
+                raise ImportError("NumPy 未安装，无法构建CSR表示")
+            self._csr = CSRGraph.from_edge_arrays(self.edge_array, self.n)
+        return self._csr
+    
+    @property
+    def density(self) -> float:
+        """边密度 2m / (n(n-1))，按去重后的实际边数计算"""
+        pairs = self.n * (self.n - 1)
+        return 2 * self.num_edges / pairs if pairs else 0.0
+    
+    @property
+    def dense(self):
+        """位压缩邻接矩阵（DenseAdjacency），稠密图由加载器构建，其他图首次访问时构建"""
+        if self._dense is None:
+            if np is None:
+                raise ImportError("NumPy 未安装，无法构建位压缩邻接矩阵")
+            self._dense = _import_dense_adjacency().DenseAdjacency.from_edge_arrays(self.edge_array, self.n)
+        return self._dense
+    
+    @property
+    def is_dense(self) -> bool:
+        """是否已构建位压缩邻接矩阵"""
+        return self._dense is not None
+    
+    @property
+    def adjacency(self):
+        """邻接查询使用的表示：已构建位矩阵时为 DenseAdjacency，否则为 CSRGraph"""
+        return self._dense if self._dense is not None else self.csr
+
+
+def _import_limb_array():
+    try:
+        from . import limb_array
+    except ImportError:
+        import limb_array
+    return limb_array
+
+
+def _import_dense_adjacency():
+    try:
+        from . import dense_adjacency
+    except ImportError:
+        import dense_adjacency
+    return dense_adjacency
+
+
+# 去重后的边密度不低于该值时加载器自动构建位压缩邻接矩阵。位矩阵占 n²/8 字节，
+# 密度超过约 1/64 时已小于CSR；默认阈值只对明显的稠密图启用，避免额外的构建开销
+DEFAULT_DENSE_THRESHOLD = 0.25
+# 节点数上限，超过时不自动构建（16384 个节点的位矩阵为 32MB）
+DEFAULT_DENSE_MAX_NODES = 1 << 14
+_dense_threshold: Optional[float] = DEFAULT_DENSE_THRESHOLD
+_dense_max_nodes = DEFAULT_DENSE_MAX_NODES
+
+
+def configure_dense_adjacency(threshold: Optional[float] = DEFAULT_DENSE_THRESHOLD,
+                              max_nodes: int = DEFAULT_DENSE_MAX_NODES):
+    """
+    配置加载器自动构建位压缩邻接矩阵（graph.dense）的条件
+    
+    Args:
+        threshold: 密度阈值，None 表示不自动构建（仍可通过 graph.dense 按需构建）
+        max_nodes: 节点数上限
+    """
+    global _dense_threshold, _dense_max_nodes
+    if threshold is not None and not 0 <= threshold <= 1:
+        raise ValueError(f"密度阈值必须在 [0, 1] 范围内，得到: {threshold}")
+    _dense_threshold = threshold
+    _dense_max_nodes = max_nodes
+
+
+def _attach_dense(graph: GraphInstance, stats: Optional[LoadStats] = None) -> GraphInstance:
+    """密度超过阈值时为图实例构建位压缩邻接矩阵"""
+    if (np is None or _dense_threshold is None or graph._dense is not None
+            or graph.n > _dense_max_nodes or graph.density < _dense_threshold):
+        return graph
+    with _load_stats.stage(stats, _load_stats.STAGE_DENSE):
+        graph._dense = _import_dense_adjacency().DenseAdjacency.from_edge_arrays(graph.edge_array, graph.n)
+    logger.info(f"密度 {graph.density:.3f}，使用位压缩邻接矩阵（{graph._dense.nbytes} 字节）")
+    return graph
+
+
+def _values_to_array(values: List[int]):
+    """把数值列表转换为int64数组，超出int64范围时转换为 LimbArray"""
+    if np is None:
+        raise ImportError("NumPy 未安装，无法构建数组表示")
+    try:
+        return np.array(values, dtype=np.int64)
+    except OverflowError:
+        return _import_limb_array().LimbArray.from_ints(values)
+
+
+@dataclass
+class NPPInstance:
+    """
+    数值划分实例数据结构
+    
+    数值可以以Python整数列表 values 或数组 value_array 的形式给出，另一种表示在首次访问时
+    才构建并缓存。value_array 在所有数值都能用int64表示时为int64数组，
+    否则为按64位分段存储的 LimbArray（hard实例中的上千位整数）。
+    """
+    name: str
+    n: int
+    values: Optional[List[int]]
+    meta: Header
+    # 与 GraphInstance.edge_array 相同，使用 default_factory 以便 __getattr__ 接管懒构建
+    value_array: Any = field(default_factory=lambda: None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """验证数据完整性"""
+        if self.values is None and self.value_array is None:
+            raise ValueError("values 和 value_array 至少需要提供一个")
+        if self.values is None:
+            del self.__dict__["values"]
+        if self.value_array is None:
+            del self.__dict__["value_array"]
+        
+        if self.n <= 0:
+            raise ValueError(f"数字个数必须为正数，得到: {self.n}")
+        count = len(self.__dict__.get("values", self.__dict__.get("value_array")))
+        if count != self.n:
+            logger.warning(f"数字个数不匹配: 头部声明 {self.n}, 实际 {count}")
+        if self._has_nonpositive():
+            logger.warning("数值划分问题中存在非正整数")
+    
+    def __getattr__(self, name: str):
+        # 只在属性不存在时调用，用于懒构建另一种数值表示
+        if name == "values" and "value_array" in self.__dict__:
+            arr = self.__dict__["value_array"]
+            self.values = arr.tolist() if isinstance(arr, np.ndarray) else arr.to_ints()
+            return self.values
+        if name == "value_array" and "values" in self.__dict__:
+            self.value_array = _values_to_array(self.__dict__["values"])
+            return self.value_array
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    def _has_nonpositive(self) -> bool:
+        if "values" in self.__dict__:
+            return any(v <= 0 for v in self.__dict__["values"])
+        arr = self.__dict__["value_array"]
+        if isinstance(arr, np.ndarray):
+            return bool((arr <= 0).any())
+        return arr.negative is not None or bool(arr.is_zero().any())
+
+
+# 图数据二进制缓存（默认关闭，通过 configure_cache 或环境变量 CO_BENCH_CACHE_DIR 启用）
+CACHE_DIR_ENV = "CO_BENCH_CACHE_DIR"
+_sidecar_cache = None
+_sidecar_cache_configured = False
+
+
+def _import_graph_cache():
+    try:
+        from . import graph_cache
+    except ImportError:
+        import graph_cache
+    return graph_cache
+
+
+def configure_cache(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                    enabled: bool = True):
+    """
+    配置图数据的二进制缓存
+    
+    启用后，load_graph_txt 和 load_instance 首次解析图文件时把边数组和CSR数组写入
+    缓存目录，之后直接通过mmap加载。缓存以源文件内容哈希为键，源文件变化后自动失效。
+    
+    Args:
+        cache_dir: 缓存目录，默认 ~/.cache/co-benchmark
+        max_bytes: 缓存目录总大小上限（字节），超出后按LRU淘汰，默认4GB
+        enabled: False 表示关闭缓存
+    """
+    global _sidecar_cache, _sidecar_cache_configured
+    _sidecar_cache_configured = True
+    if not enabled:
+        _sidecar_cache = None
+        return
+    if np is None:
+        raise ImportError("NumPy 未安装，无法启用二进制缓存")
+    
+    graph_cache = _import_graph_cache()
+    if max_bytes is None:
+        max_bytes = graph_cache.DEFAULT_MAX_BYTES
+    _sidecar_cache = graph_cache.SidecarCache(cache_dir, max_bytes)
+    logger.info(f"启用二进制缓存: {_sidecar_cache.cache_dir}")
+
+
+def _get_sidecar_cache():
+    """返回当前的缓存对象，首次调用时检查环境变量"""
+    if not _sidecar_cache_configured:
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        if cache_dir and np is not None:
+            configure_cache(cache_dir)
+        else:
+            configure_cache(enabled=False)
+    return _sidecar_cache
+
+
+def _load_cached_graph(path: str, stats: Optional[LoadStats] = None) -> Optional[GraphInstance]:
+    """从二进制缓存加载图实例，未命中时返回None"""
+    try:
+        with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+            hit = _sidecar_cache.get(path)
+    except OSError as e:
+        logger.warning(f"读取缓存失败: {e}")
+        return None
+    if hit is None:
+        return None
+    if stats is not None:
+        stats.cache = "sidecar"
+        stats.kind = "graph"
+    
+    header, arrays = hit
+    logger.info(f"从缓存加载图数据: {path}")
+    graph = GraphInstance(
+        name=header["name"],
+        n=header["n"],
+        m=header["m"],
+        edges=None,
+        meta=header["meta"],
+        edge_array=EdgeArrays(arrays["u"], arrays["v"], arrays["w"])
+    )
+    graph._csr = CSRGraph(arrays["indptr"], arrays["indices"], arrays["weights"])
+    return _attach_dense(graph, stats)
+
+
+def _store_cached_graph(path: str, graph: GraphInstance):
+    """把图实例写入二进制缓存，写入失败只记录警告"""
+    header = {"name": graph.name, "n": graph.n, "m": graph.m, "meta": graph.meta}
+    edges, csr = graph.edge_array, graph.csr
+    arrays = {"u": edges.u, "v": edges.v, "w": edges.w,
+              "indptr": csr.indptr, "indices": csr.indices, "weights": csr.weights}
+    try:
+        _sidecar_cache.put(path, header, arrays)
+    except OSError as e:
+        logger.warning(f"写入缓存失败: {e}")
+
+
+# 进程内实例缓存（默认关闭，通过 configure_memory_cache 启用）
+DEFAULT_MEMORY_CACHE_BYTES = 1 << 30  # 1GB
+
+
+def _readonly(arr: "np.ndarray") -> "np.ndarray":
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def instance_nbytes(instance: Union[GraphInstance, NPPInstance]) -> int:
+    """估算实例数据占用的内存字节数"""
+    if isinstance(instance, NPPInstance):
+        if "value_array" in instance.__dict__:
+            return instance.__dict__["value_array"].nbytes
+        return sum(sys.getsizeof(v) for v in instance.values) + 8 * len(instance.values)
+    if "edge_array" in instance.__dict__:
+        edges = instance.__dict__["edge_array"]
+        total = edges.u.nbytes + edges.v.nbytes + edges.w.nbytes
+    else:
+        # 元组 (u, v, w) 约 64 字节，加上列表中的指针
+        total = 72 * len(instance.__dict__["edges"])
+    if instance._csr is not None:
+        csr = instance._csr
+        total += csr.indptr.nbytes + csr.indices.nbytes + csr.weights.nbytes
+    if instance._dense is not None:
+        total += instance._dense.nbytes
+    return total
+
+
+class InstanceCache:
+    """
+    load_instance 的进程内LRU缓存
+    
+    以 (真实路径, mtime, 大小) 为键，源文件变化后自然失效。缓存中保存只读数据：
+    图的边数组和CSR数组设为不可写（CSR在放入缓存时构建），没有NumPy时边列表转为元组；
+    数值划分实例有数组表示时数组设为不可写，否则数值转为元组。
+    每次命中返回新的实例对象，共享只读数据，meta 为副本，
+    因此调用方修改返回的实例不会影响缓存内容。
+    """
+    
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[Union[GraphInstance, NPPInstance], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(path: str) -> Tuple[str, int, int]:
+        real = os.path.realpath(path)
+        size, mtime_ns = source_stat(real)
+        return real, mtime_ns, size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Tuple[str, int, int]) -> Optional[Union[GraphInstance, NPPInstance]]:
+        """查找缓存，命中时返回只读视图并更新LRU顺序"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._view(entry[0])
+    
+    def put(self, key: Tuple[str, int, int],
+            instance: Union[GraphInstance, NPPInstance]) -> Union[GraphInstance, NPPInstance]:
+        """
+        把实例冻结为只读数据后放入缓存
+        
+        Returns:
+            缓存实例的只读视图；实例超过内存上限时不缓存，原样返回
+        """
+        frozen = self._freeze(instance)
+        size = instance_nbytes(frozen)
+        if size > self.max_bytes:
+            logger.info(f"实例大小超过内存缓存上限，跳过缓存: {key[0]}")
+            return instance
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (frozen, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return self._view(frozen)
+    
+    def clear(self):
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """返回命中、未命中、淘汰次数以及当前条目数和字节数"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes}
+    
+    @staticmethod
+    def _freeze(instance: Union[GraphInstance, NPPInstance]) -> Union[GraphInstance, NPPInstance]:
+        if isinstance(instance, NPPInstance):
+            if "value_array" not in instance.__dict__:
+                return NPPInstance(name=instance.name, n=instance.n,
+                                   values=tuple(instance.values), meta=dict(instance.meta))
+            # 有数组表示时不保留整数列表，视图访问 values 时各自构建
+            arr = instance.__dict__["value_array"]
+            if isinstance(arr, np.ndarray):
+                arr = _readonly(arr)
+            else:
+                negative = None if arr.negative is None else _readonly(arr.negative)
+                arr = type(arr)(_readonly(arr.limbs), negative)
+            return NPPInstance(name=instance.name, n=instance.n, values=None,
+                               meta=dict(instance.meta), value_array=arr)
+        
+        frozen = object.__new__(GraphInstance)
+        frozen.__dict__.update(name=instance.name, n=instance.n, m=instance.m,
+                               meta=dict(instance.meta), _csr=None, _dense=None)
+        if "edge_array" in instance.__dict__:
+            # 有数组表示时不保留元组列表，视图访问 edges 时各自构建
+            edges = instance.__dict__["edge_array"]
+            frozen.__dict__["edge_array"] = EdgeArrays(_readonly(edges.u), _readonly(edges.v),
+                                                       _readonly(edges.w))
+        else:
+            frozen.__dict__["edges"] = tuple(instance.__dict__["edges"])
+        if np is not None:
+            # CSR在放入缓存时构建一次，由所有视图共享
+            csr = instance.csr
+            frozen._csr = CSRGraph(_readonly(csr.indptr), _readonly(csr.indices),
+                                   _readonly(csr.weights))
+        if instance._dense is not None:
+            dense = instance._dense
+            frozen._dense = type(dense)(_readonly(dense.bits), dense.n)
+        return frozen
+    
+    @staticmethod
+    def _view(frozen: Union[GraphInstance, NPPInstance]) -> Union[GraphInstance, NPPInstance]:
+        if isinstance(frozen, NPPInstance):
+            view = object.__new__(NPPInstance)
+        else:
+            view = object.__new__(GraphInstance)
+        view.__dict__.update(frozen.__dict__)
+        view.meta = dict(frozen.meta)
+        return view
+
+
+_memory_cache: Optional[InstanceCache] = None
+
+
+def configure_memory_cache(max_bytes: Optional[int] = None, enabled: bool = True) -> Optional[InstanceCache]:
+    """
+    配置 load_instance 的进程内实例缓存
+    
+    适用于反复加载同一批文件的场景（例如训练循环的每个epoch）。缓存按LRU淘汰，
+    返回的实例共享只读数据，修改数组会抛出 ValueError。
+    
+    Args:
+        max_bytes: 内存上限（字节），默认1GB
+        enabled: False 表示关闭并释放缓存
+        
+    Returns:
+        InstanceCache 对象（关闭时为None），可用于查看统计信息
+    """
+    global _memory_cache
+    if not enabled:
+        _memory_cache = None
+        return None
+    _memory_cache = InstanceCache(DEFAULT_MEMORY_CACHE_BYTES if max_bytes is None else max_bytes)
+    logger.info(f"启用进程内实例缓存，上限 {_memory_cache.max_bytes} 字节")
+    return _memory_cache
+
+
+def memory_cache_stats() -> Optional[Dict[str, int]]:
+    """返回进程内实例缓存的统计信息，未启用时返回None"""
+    return _memory_cache.stats() if _memory_cache is not None else None
+
+
+def load_graph_txt(path: str, use_numpy: Optional[bool] = None,
+                   stats: Optional[LoadStats] = None) -> GraphInstance:
+    """
+    加载图数据文件
+    
+    关键功能：
+    1. 正确处理 1-based 到 0-based 的索引转换
+    2. 执行去重和去自环
+    3. 规范化无向边顺序
+    
+    Args:
+        path: 图数据文件路径
+        use_numpy: 是否使用NumPy向量化解析，None 表示NumPy可用时自动启用
+        stats: 分阶段统计对象，None 表示不统计（设置了全局钩子时自动创建）
+        
+    Returns:
+        GraphInstance: 图实例对象
+    """
+    logger.info(f"加载图数据: {path}")
+    
+    stats = _load_stats.resolve(stats)
+    with _load_stats.measure(stats, path):
+        use_cache = use_numpy is not False and _get_sidecar_cache() is not None
+        if use_cache:
+            cached = _load_cached_graph(path, stats)
+            if cached is not None:
+                return cached
+        
+        with _open_instrumented(path, stats) as f:
+            meta, first_line = _read_header_instrumented(f, stats)
+            graph = _parse_graph(f, meta, first_line, path, use_numpy, stats)
+        
+        if use_cache:
+            with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+                _store_cached_graph(path, graph)
+        return graph
+
+
+def _parse_edge_line(ln: str) -> Optional[Tuple[int, int, int]]:
+    """解析单行边数据，返回0-based的 (u, v, w)，无效行返回None"""
+    parts = ln.split()
+    if len(parts) < 2:
+        return None  # 跳过无效行
+    
+    u, v, *rest = parts
+    try:
+        u = int(u) - 1  # 1-based -> 0-based
+        v = int(v) - 1  # 1-based -> 0-based
+        w = int(rest[0]) if rest else 1
+    except ValueError:
+        logger.warning(f"跳过无效边数据: {ln}")
+        return None
+    return u, v, w
+
+
+def _parse_graph(f: io.BufferedIOBase, meta: Header, first_line: Optional[str],
+                 path: str, use_numpy: Optional[bool] = None,
+                 stats: Optional[LoadStats] = None) -> GraphInstance:
+    """
+    从已读完头部的二进制流中解析图数据
+    
+    Args:
+        f: 二进制文件对象，位于第一个有效数据行之后
+        meta: 头部信息
+        first_line: 第一个有效数据行 "n m"
+        path: 文件路径（用于默认名称和错误信息）
+        use_numpy: 是否使用NumPy向量化解析，None 表示NumPy可用时自动启用
+        stats: 分阶段统计对象
+        
+    Returns:
+        GraphInstance: 图实例对象
+    """
+    if first_line is None:
+        raise ValueError(f"文件 {path} 没有有效数据行")
+    
+    # 第一行非注释行: "n m"
+    try:
+        n, m = map(int, first_line.split()[:2])
+    except ValueError as e:
+        raise ValueError(f"无法解析图规模信息: {first_line}") from e
+    
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImportError("NumPy 未安装，无法使用向量化解析")
+    
+    edges = edge_array = None
+    if use_numpy:
+        edge_array, duplicate_count, self_loop_count, max_node = _parse_edges_numpy(f, stats)
+    else:
+        edges, duplicate_count, self_loop_count, max_node = _parse_edges_python(f, stats)
+    
+    with _load_stats.stage(stats, _load_stats.STAGE_VALIDATE):
+        if duplicate_count > 0:
+            logger.info(f"去除了 {duplicate_count} 条重复边")
+        if self_loop_count > 0:
+            logger.info(f"去除了 {self_loop_count} 条自环")
+        
+        # 验证节点索引范围
+        if max_node >= n:
+            logger.warning(f"节点索引超出范围: 最大索引 {max_node}, 节点数 {n}")
+        
+        graph = GraphInstance(
+            name=meta.get("name", os.path.basename(path)),
+            n=n,
+            m=len(edges) if edges is not None else len(edge_array),
+            edges=edges,
+            meta=meta,
+            edge_array=edge_array
+        )
+    
+    if stats is not None:
+        stats.kind = "graph"
+        stats.lines_parsed += graph.m + duplicate_count + self_loop_count
+        stats.duplicates_removed += duplicate_count
+        stats.self_loops_removed += self_loop_count
+    return _attach_dense(graph, stats)
+
+
+def _parse_edges_python(f: io.BufferedIOBase,
+                        stats: Optional[LoadStats] = None) -> Tuple[List[Tuple[int, int, int]], int, int, int]:
+    """
+    逐行解析边数据（纯Python路径）
+    
+    Returns:
+        (edges, duplicate_count, self_loop_count, max_node)
+    """
+    edges = []
+    duplicate_count = 0
+    self_loop_count = 0
+    
+    with _load_stats.stage(stats, _load_stats.STAGE_PARSE):
+        for ln in _iter_lines(io.TextIOWrapper(f, encoding='utf-8')):
+            edge = _parse_edge_line(ln)
+            if edge is None:
+                continue
+            u, v, w = edge
+            
+            # 去除自环
+            if u == v:
+                self_loop_count += 1
+                continue
+                
+            # 规范化无向边顺序 (确保 u <= v)
+            if u > v:
+                u, v = v, u
+                
+            edges.append((u, v, w))
+    
+    with _load_stats.stage(stats, _load_stats.STAGE_DEDUP):
+        # 去重 - 使用字典去重，保留最后一个权重
+        edge_dict = {}
+        for u, v, w in edges:
+            if (u, v) in edge_dict:
+                duplicate_count += 1
+            edge_dict[(u, v)] = (u, v, w)
+        
+        edges = list(edge_dict.values())
+        max_node = max(max(u, v) for u, v, _ in edges) if edges else -1
+    return edges, duplicate_count, self_loop_count, max_node
+
+
+# 向量化解析时每次从解压流读取的字节数
+_PARSE_CHUNK_SIZE = 4 << 20
+# 向量化解析允许出现的非数字字节: 空格、制表符、回车、换行
+_WHITESPACE_BYTES = (9, 10, 13, 32)
+# int64 能安全表示的最大十进制位数
+_MAX_INT64_DIGITS = 18
+
+
+def _iter_line_chunks(f: io.BufferedIOBase, chunk_size: int = _PARSE_CHUNK_SIZE) -> Iterator[bytes]:
+    """按块读取二进制流，保证每块都在行边界处结束"""
+    tail = b""
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            if tail:
+                yield tail
+            return
+        if tail:
+            block = tail + block
+        cut = block.rfind(b"\n") + 1
+        if cut == 0:
+            tail = block
+            continue
+        tail = block[cut:]
+        yield block[:cut]
+
+
+def _digit_runs(buf: "np.ndarray") -> Optional[Tuple["np.ndarray", "np.ndarray"]]:
+    """
+    向量化地解析字节数组中所有十进制数字串
+    
+    Returns:
+        (values, starts): 各数字串的int64值及其起始位置；出现数字和空白以外的字节
+        或数字过长时返回None
+    """
+    is_digit = (buf >= 48) & (buf <= 57)
+    if not is_digit.any():
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    if not np.isin(buf[~is_digit], _WHITESPACE_BYTES).all():
+        return None
+    
+    # 数字串的起止位置
+    padded = np.concatenate(([False], is_digit, [False]))
+    bounds = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = bounds[0::2], bounds[1::2]
+    lengths = ends - starts
+    if lengths.max() > _MAX_INT64_DIGITS:
+        return None
+    
+    # 所有数字串右对齐后逐位累加（Horner法），临时数组大小只与数字串个数有关
+    values = np.zeros(len(starts), dtype=np.int64)
+    max_len = int(lengths.max())
+    for d in range(max_len):
+        pos = ends - max_len + d
+        digit = buf[np.maximum(pos, 0)].astype(np.int64) - 48
+        digit[pos < starts] = 0  # 右对齐后的前导位
+        values *= 10
+        values += digit
+    return values, starts
 
 
-@dataclass
-class NPPInstance:
-    """数值划分实例数据结构"""
-    name: str
-    n: int
-    values: List[int]
-    meta: Header
+def _tokenize_edge_chunk(chunk: bytes) -> Optional["np.ndarray"]:
+    """
+    向量化地把一块边数据解析为 (k, 3) 的int64数组 (u, v, w)，索引仍为1-based
     
-    def __post_init__(self):
-        """验证数据完整性"""
-        if self.n <= 0:
-            raise ValueError(f"数字个数必须为正数，得到: {self.n}")
-        if len(self.values) != self.n:
-            logger.warning(f"数字个数不匹配: 头部声明 {self.n}, 实际 {len(self.values)}")
-        if any(v <= 0 for v in self.values):
-            logger.warning("数值划分问题中存在非正整数")
+    与逐行解析语义一致：少于两个字段的行被跳过，缺省权重为1，多余字段被忽略。
+    块中出现数字和空白以外的字节（注释、负号等）或数字过长时返回None，
+    由调用方改用逐行解析。
+    """
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    runs = _digit_runs(buf)
+    if runs is None:
+        return None
+    values, starts = runs
+    if len(values) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    
+    # 按行分组：每个数字串所在的行号及其在行内的序号
+    newlines = np.flatnonzero((buf == 10) | (buf == 13))
+    line_of_token = np.searchsorted(newlines, starts)
+    first_token = np.flatnonzero(np.concatenate(([True], line_of_token[1:] != line_of_token[:-1])))
+    counts = np.diff(np.concatenate((first_token, [len(starts)])))
+    
+    valid = counts >= 2
+    first_token, counts = first_token[valid], counts[valid]
+    out = np.ones((len(first_token), 3), dtype=np.int64)
+    out[:, 0] = values[first_token]
+    out[:, 1] = values[first_token + 1]
+    has_weight = counts >= 3
+    out[has_weight, 2] = values[first_token[has_weight] + 2]
+    return out
 
 
-def load_graph_txt(path: str) -> GraphInstance:
+def _parse_edge_chunk_python(chunk: bytes) -> "np.ndarray":
+    """逐行解析一块边数据，返回与 _tokenize_edge_chunk 相同布局的数组"""
+    rows = []
+    for ln in chunk.decode("utf-8").splitlines():
+        ln = ln.strip()
+        if not ln or ln.startswith("#"):
+            continue
+        edge = _parse_edge_line(ln)
+        if edge is not None:
+            u, v, w = edge
+            rows.append((u + 1, v + 1, w))
+    try:
+        return np.array(rows, dtype=np.int64).reshape(-1, 3)
+    except OverflowError as e:
+        raise ValueError("边数据超出int64范围，请使用 use_numpy=False") from e
+
+
+def _dedup_edge_arrays(u: "np.ndarray", v: "np.ndarray", w: "np.ndarray"):
     """
-    加载图数据文件
+    向量化地去自环、规范化边方向并去重
     
-    关键功能：
-    1. 正确处理 1-based 到 0-based 的索引转换
-    2. 执行去重和去自环
-    3. 规范化无向边顺序
+    与字典去重语义一致：每条边保留第一次出现的位置和最后一次出现的权重。
     
     Args:
-        path: 图数据文件路径
+        u, v, w: 0-based 的边端点和权重数组
         
     Returns:
-        GraphInstance: 图实例对象
+        (u, v, w, duplicate_count, self_loop_count)
     """
-    logger.info(f"加载图数据: {path}")
+    loops = u == v
+    self_loop_count = int(loops.sum())
+    if self_loop_count:
+        keep = ~loops
+        u, v, w = u[keep], v[keep], w[keep]
     
-    with _open_file(path) as f:
-        raw = f.read()
+    lo = np.minimum(u, v)
+    hi = np.maximum(u, v)
+    if len(lo) == 0:
+        return lo, hi, w, 0, self_loop_count
     
-    meta = parse_header(raw)
-    f = io.StringIO(raw)
-    lines = list(_iter_lines(f))
+    # 稳定排序后，同一条边的多次出现按原始顺序相邻
+    order = np.lexsort((hi, lo))
+    lo_s, hi_s = lo[order], hi[order]
+    boundary = np.empty(len(order), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (lo_s[1:] != lo_s[:-1]) | (hi_s[1:] != hi_s[:-1])
+    group_first = np.flatnonzero(boundary)
+    group_last = np.concatenate((group_first[1:], [len(order)])) - 1
     
-    if not lines:
-        raise ValueError(f"文件 {path} 没有有效数据行")
+    first_pos = order[group_first]
+    last_pos = order[group_last]
+    # 按第一次出现的位置恢复原始顺序
+    restore = np.argsort(first_pos, kind="stable")
+    first_pos, last_pos = first_pos[restore], last_pos[restore]
     
-    # 第一行非注释行: "n m"
-    try:
-        n, m = map(int, lines[0].split()[:2])
-    except ValueError as e:
-        raise ValueError(f"无法解析图规模信息: {lines[0]}") from e
+    duplicate_count = len(lo) - len(first_pos)
+    return lo[first_pos], hi[first_pos], w[last_pos], duplicate_count, self_loop_count
+
+
+def _iter_edge_blocks(f: io.BufferedIOBase) -> Iterator["np.ndarray"]:
+    """逐块解析边数据，产生 (k, 3) 的int64数组 (u, v, w)，索引仍为1-based"""
+    for chunk in _iter_line_chunks(f):
+        arr = _tokenize_edge_chunk(chunk)
+        if arr is None:
+            arr = _parse_edge_chunk_python(chunk)
+        yield arr
+
+
+def _parse_edges_numpy(f: io.BufferedIOBase,
+                       stats: Optional[LoadStats] = None) -> Tuple[EdgeArrays, int, int, int]:
+    """
+    使用NumPy向量化解析边数据
     
-    edges = []
-    duplicate_count = 0
-    self_loop_count = 0
+    Returns:
+        (edge_array, duplicate_count, self_loop_count, max_node)
+    """
+    with _load_stats.stage(stats, _load_stats.STAGE_TOKENIZE):
+        blocks = list(_iter_edge_blocks(f))
+        raw = np.concatenate(blocks) if blocks else np.empty((0, 3), dtype=np.int64)
     
-    for ln in lines[1:]:
-        parts = ln.split()
-        if len(parts) < 2:
-            continue  # 跳过无效行
-            
-        u, v, *rest = parts
-        try:
-            u = int(u) - 1  # 1-based -> 0-based
-            v = int(v) - 1  # 1-based -> 0-based
-            w = int(rest[0]) if rest else 1
-        except ValueError as e:
-            logger.warning(f"跳过无效边数据: {ln}")
-            continue
+    with _load_stats.stage(stats, _load_stats.STAGE_DEDUP):
+        u, v, w, duplicate_count, self_loop_count = _dedup_edge_arrays(
+            raw[:, 0] - 1, raw[:, 1] - 1, raw[:, 2])
+        max_node = int(v.max()) if len(v) else -1
+    return EdgeArrays.from_arrays(u, v, w), duplicate_count, self_loop_count, max_node
+
+
+# 流式去重时把 (u, v) 编码为单个int64键，要求节点编号小于 2^31
+_KEY_SHIFT = 32
+_MAX_KEY_NODE = (1 << 31) - 1
+# 外部归并时每个有序段每次读入的条目数
+_MERGE_BLOCK = 1 << 18
+
+
+def iter_edges(path: str, chunk_size: int = 1 << 20, dedup: bool = False,
+               max_memory_edges: int = 1 << 25,
+               spill_dir: Optional[str] = None) -> Iterator[EdgeArrays]:
+    """
+    流式迭代图文件中的边，内存占用与文件大小无关
+    
+    边直接从解压流中分块解析，已转换为0-based、去除自环并规范化为 u < v，
+    每次产生最多 chunk_size 条边（int64数组）。
+    
+    dedup=False 时按文件顺序输出，重复边原样保留。dedup=True 时按 (u, v) 升序输出
+    并去重（保留最后出现的权重）：缓冲区超过 max_memory_edges 条边时，
+    把排序去重后的有序段写入 spill_dir 下的临时文件，最后多路归并。
+    
+    Args:
+        path: 图数据文件路径
+        chunk_size: 每块最多包含的边数
+        dedup: 是否流式去重
+        max_memory_edges: 去重时内存中最多缓存的边数
+        spill_dir: 溢写临时文件的目录，默认使用系统临时目录
         
-        # 去除自环
-        if u == v:
-            self_loop_count += 1
-            continue
-            
-        # 规范化无向边顺序 (确保 u <= v)
-        if u > v:
-            u, v = v, u
-            
-        edges.append((u, v, w))
+    Yields:
+        EdgeArrays: 边数组块
+    """
+    if np is None:
+        raise ImportError("NumPy 未安装，无法流式迭代边数据")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size 必须为正数，得到: {chunk_size}")
+    
+    if is_binary_file(path):
+        yield from _iter_binary_edges(path, chunk_size, dedup)
+        return
     
-    # 去重 - 使用字典去重，保留最后一个权重
-    edge_dict = {}
-    for u, v, w in edges:
-        if (u, v) in edge_dict:
-            duplicate_count += 1
-        edge_dict[(u, v)] = (u, v, w)
+    with _open_binary(path) as f:
+        _, first_line = _read_header_block(f)
+        if first_line is None:
+            raise ValueError(f"文件 {path} 没有有效数据行")
+        
+        blocks = _iter_canonical_edges(_iter_edge_blocks(f))
+        if dedup:
+            blocks = _external_dedup(blocks, max_memory_edges, spill_dir)
+        yield from _rechunk_edges(blocks, chunk_size)
+
+
+def _iter_binary_edges(path: str, chunk_size: int, dedup: bool) -> Iterator[EdgeArrays]:
+    """按块产生 .cobin 文件中的边（已去重）；dedup=True 时保证按 (u, v) 升序"""
+    fields, _ = read_binary_header(path)
+    graph = read_binary_instance(path)
+    if not isinstance(graph, GraphInstance):
+        raise ValueError(f"文件 {path} 不是图实例")
+    edges = graph.edge_array
+    order = None
+    if dedup and not fields["flags"] & BINARY_FLAG_SORTED:
+        order = np.lexsort((edges.v, edges.u))
+    for start in range(0, len(edges), chunk_size):
+        if order is None:
+            part = slice(start, start + chunk_size)
+        else:
+            part = order[start:start + chunk_size]
+        yield EdgeArrays(edges.u[part].astype(np.int64), edges.v[part].astype(np.int64),
+                         edges.w[part].astype(np.int64))
+
+
+def _iter_canonical_edges(blocks: Iterator["np.ndarray"]) -> Iterator[Tuple["np.ndarray", ...]]:
+    """把1-based的原始边块转换为去自环、u < v 的0-based (u, v, w) 数组"""
+    for raw in blocks:
+        u, v, w = raw[:, 0] - 1, raw[:, 1] - 1, raw[:, 2]
+        keep = u != v
+        if not keep.all():
+            u, v, w = u[keep], v[keep], w[keep]
+        yield np.minimum(u, v), np.maximum(u, v), w
+
+
+def _rechunk_edges(blocks: Iterator[Tuple["np.ndarray", ...]], chunk_size: int) -> Iterator[EdgeArrays]:
+    """把任意大小的 (u, v, w) 数组块重新切分为最多 chunk_size 条边的块"""
+    pending: List[Tuple["np.ndarray", ...]] = []
+    pending_len = 0
+    for block in blocks:
+        if len(block[0]) == 0:
+            continue
+        pending.append(block)
+        pending_len += len(block[0])
+        if pending_len < chunk_size:
+            continue
+        u, v, w = (np.concatenate(cols) for cols in zip(*pending))
+        full = len(u) // chunk_size * chunk_size
+        for start in range(0, full, chunk_size):
+            end = start + chunk_size
+            yield EdgeArrays(u[start:end], v[start:end], w[start:end])
+        pending = [(u[full:], v[full:], w[full:])] if full < len(u) else []
+        pending_len = len(u) - full
+    if pending_len:
+        u, v, w = (np.concatenate(cols) for cols in zip(*pending))
+        yield EdgeArrays(u, v, w)
+
+
+def _sorted_unique_last(keys: "np.ndarray", w: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """按键稳定排序并去重，每个键保留最后出现的权重"""
+    order = np.argsort(keys, kind="stable")
+    keys, w = keys[order], w[order]
+    last = np.empty(len(keys), dtype=bool)
+    if len(keys):
+        last[:-1] = keys[1:] != keys[:-1]
+        last[-1] = True
+    return keys[last], w[last]
+
+
+def _external_dedup(blocks: Iterator[Tuple["np.ndarray", ...]], max_memory_edges: int,
+                    spill_dir: Optional[str]) -> Iterator[Tuple["np.ndarray", ...]]:
+    """
+    外部排序去重：内存缓冲区满时把有序段溢写到磁盘，最后分块多路归并
     
-    edges = list(edge_dict.values())
+    后写入的段对应文件中更靠后的边，归并时相同键保留最后一个段中的权重。
+    """
+    import tempfile
     
-    if duplicate_count > 0:
-        logger.info(f"去除了 {duplicate_count} 条重复边")
-    if self_loop_count > 0:
-        logger.info(f"去除了 {self_loop_count} 条自环")
+    buf_keys: List["np.ndarray"] = []
+    buf_w: List["np.ndarray"] = []
+    buffered = 0
+    runs: List[Tuple["np.ndarray", "np.ndarray"]] = []
+    tmp = None
     
-    # 验证节点索引范围
-    max_node = max(max(u, v) for u, v, _ in edges) if edges else -1
-    if max_node >= n:
-        logger.warning(f"节点索引超出范围: 最大索引 {max_node}, 节点数 {n}")
+    def flush():
+        nonlocal buffered, tmp
+        keys, w = _sorted_unique_last(np.concatenate(buf_keys), np.concatenate(buf_w))
+        buf_keys.clear()
+        buf_w.clear()
+        buffered = 0
+        if tmp is None:
+            tmp = tempfile.TemporaryDirectory(prefix="co_edges_", dir=spill_dir)
+        key_path = os.path.join(tmp.name, f"run{len(runs)}_keys.npy")
+        w_path = os.path.join(tmp.name, f"run{len(runs)}_w.npy")
+        np.save(key_path, keys)
+        np.save(w_path, w)
+        runs.append((np.load(key_path, mmap_mode="r"), np.load(w_path, mmap_mode="r")))
     
-    return GraphInstance(
-        name=meta.get("name", os.path.basename(path)),
-        n=n,
-        m=len(edges),
-        edges=edges,
-        meta=meta
-    )
+    try:
+        for u, v, w in blocks:
+            if len(v) and (int(u.min()) < 0 or int(v.max()) > _MAX_KEY_NODE):
+                raise ValueError(f"节点编号超出流式去重支持的范围: [{int(u.min())}, {int(v.max())}]")
+            buf_keys.append((u << _KEY_SHIFT) | v)
+            buf_w.append(w)
+            buffered += len(u)
+            if buffered >= max_memory_edges:
+                flush()
+        
+        if not runs:
+            # 数据全部在内存中，无需归并
+            if buffered:
+                keys, w = _sorted_unique_last(np.concatenate(buf_keys), np.concatenate(buf_w))
+                yield _split_keys(keys, w)
+            return
+        if buffered:
+            flush()
+        logger.info(f"流式去重溢写了 {len(runs)} 个有序段，开始归并")
+        
+        cursors = [0] * len(runs)
+        while True:
+            active = [i for i, (keys, _) in enumerate(runs) if cursors[i] < len(keys)]
+            if not active:
+                break
+            # 各段当前块末尾键的最小值；不超过它的键都已完整出现在各段的当前块中
+            threshold = min(runs[i][0][min(cursors[i] + _MERGE_BLOCK, len(runs[i][0])) - 1]
+                            for i in active)
+            part_keys, part_w = [], []
+            for i in active:
+                keys, w = runs[i]
+                start = cursors[i]
+                window = keys[start:start + _MERGE_BLOCK]
+                end = start + int(np.searchsorted(window, threshold, side="right"))
+                part_keys.append(np.asarray(keys[start:end]))
+                part_w.append(np.asarray(w[start:end]))
+                cursors[i] = end
+            # 按段顺序拼接后稳定排序，相同键中最后一个来自最靠后的段
+            keys, w = _sorted_unique_last(np.concatenate(part_keys), np.concatenate(part_w))
+            yield _split_keys(keys, w)
+    finally:
+        runs.clear()
+        if tmp is not None:
+            tmp.cleanup()
+
+
+def _split_keys(keys: "np.ndarray", w: "np.ndarray") -> Tuple["np.ndarray", ...]:
+    """把 (u << 32) | v 形式的键拆回 (u, v, w) 数组"""
+    return keys >> _KEY_SHIFT, keys & ((1 << _KEY_SHIFT) - 1), w
 
 
-def load_npp_txt(path: str) -> NPPInstance:
+def load_npp_txt(path: str, stats: Optional[LoadStats] = None) -> NPPInstance:
     """
     加载数值划分数据文件
     
     Args:
         path: 数值划分数据文件路径
+        stats: 分阶段统计对象，None 表示不统计（设置了全局钩子时自动创建）
         
     Returns:
         NPPInstance: 数值划分实例对象
     """
     logger.info(f"加载数值划分数据: {path}")
     
-    with _open_file(path) as f:
-        raw = f.read()
+    stats = _load_stats.resolve(stats)
+    with _load_stats.measure(stats, path):
+        with _open_instrumented(path, stats) as f:
+            meta, first_line = _read_header_instrumented(f, stats)
+            return _parse_npp(f, meta, first_line, path, stats)
+
+
+def _parse_npp(f: io.BufferedIOBase, meta: Header, first_line: Optional[str],
+               path: str, stats: Optional[LoadStats] = None) -> NPPInstance:
+    """
+    从已读完头部的二进制流中解析数值划分数据
     
-    meta = parse_header(raw)
-    f = io.StringIO(raw)
-    it = _iter_lines(f)
+    Args:
+        f: 二进制文件对象，位于第一个有效数据行之后
+        meta: 头部信息
+        first_line: 第一个有效数据行（数字个数）
+        path: 文件路径（用于默认名称和错误信息）
+        stats: 分阶段统计对象
+        
+    Returns:
+        NPPInstance: 数值划分实例对象
+    """
+    if first_line is None:
+        raise ValueError(f"文件 {path} 没有数字个数信息")
     
     try:
         # 第一行: 数字个数
-        n = int(next(it))
-    except StopIteration:
-        raise ValueError(f"文件 {path} 没有数字个数信息")
+        n = int(first_line)
     except ValueError as e:
         raise ValueError(f"无法解析数字个数: {e}") from e
     
-    # 兼容逐行或单行格式
-    vals: List[int] = []
-    for ln in it:
-        parts = ln.split()
-        try:
-            vals.extend(map(int, parts))
-        except ValueError as e:
-            logger.warning(f"跳过无效数字: {ln}")
-            continue
-            
-        if len(vals) >= n:
-            break
+    if stats is not None:
+        stats.kind = "npp"
+    
+    data = f.read()
+    if np is not None:
+        # 所有数字都不超过18位（decimal实例等）时直接向量化解析为int64数组，不创建Python整数
+        with _load_stats.stage(stats, _load_stats.STAGE_TOKENIZE, len(data)):
+            runs = _digit_runs(np.frombuffer(data, dtype=np.uint8))
+        if runs is not None:
+            arr = runs[0][:n]
+            if len(arr) < n:
+                logger.warning(f"数字数量不足: 期望 {n}, 实际 {len(arr)}")
+            if stats is not None:
+                stats.lines_parsed += len(arr)
+            return NPPInstance(
+                name=meta.get("name", os.path.basename(path)),
+                n=len(arr),
+                values=None,
+                meta=meta,
+                value_array=arr
+            )
     
-    vals = vals[:n]
+    with _load_stats.stage(stats, _load_stats.STAGE_PARSE, len(data)):
+        it = _iter_lines(io.StringIO(data.decode('utf-8')))
+        
+        # 兼容逐行或单行格式
+        vals: List[int] = []
+        for ln in it:
+            parts = ln.split()
+            try:
+                vals.extend(map(int, parts))
+            except ValueError as e:
+                logger.warning(f"跳过无效数字: {ln}")
+                continue
+                
+            if len(vals) >= n:
+                break
+        
+        vals = vals[:n]
+    
+    if stats is not None:
+        stats.lines_parsed += len(vals)
     
     if len(vals) < n:
         logger.warning(f"数字数量不足: 期望 {n}, 实际 {len(vals)}")
@@ -250,12 +1657,112 @@ def load_npp_txt(path: str) -> NPPInstance:
     )
 
 
-def load_instance(path: str) -> Union[GraphInstance, NPPInstance]:
+# 二进制实例格式（.cobin），由 binary_corpus.py 转换生成:
+# 固定头部 | UTF-8 JSON 元数据（名称、文本头部、数组布局）| 按64字节对齐的小端序数组
+BINARY_MAGIC = b"COBINARY"
+BINARY_VERSION = 1
+BINARY_SUFFIX = ".cobin"
+BINARY_KIND_GRAPH = 1
+BINARY_KIND_NPP = 2
+BINARY_FLAG_CSR = 1       # 包含CSR数组
+BINARY_FLAG_BIGINT = 2    # 数值划分的数字以limb矩阵存储
+BINARY_FLAG_SORTED = 4    # 边按 (u, v) 升序存储，而不是文本中首次出现的顺序
+BINARY_FLAG_SIGNED = 8    # 含负数：limb矩阵存储绝对值，另有 negative 数组（uint8）标记负数
+# MAGIC | uint16 版本 | uint16 问题类别 | uint32 标志位 | uint64 n | uint64 m | uint64 元数据长度
+BINARY_HEADER = struct.Struct("<8sHHIQQQ")
+
+
+def is_binary_file(path: str) -> bool:
+    """是否为 .cobin 二进制实例文件"""
+    return path.endswith(BINARY_SUFFIX) and os.path.isfile(path)
+
+
+def _unpack_binary_header(head: bytes, path: str) -> Dict[str, int]:
+    if len(head) < BINARY_HEADER.size or head[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError(f"不是有效的二进制实例文件: {path}")
+    _, version, kind, flags, n, m, metadata_len = BINARY_HEADER.unpack(head[:BINARY_HEADER.size])
+    if version != BINARY_VERSION:
+        raise ValueError(f"二进制实例文件版本不匹配: {version}（期望 {BINARY_VERSION}）")
+    return {"version": version, "kind": kind, "flags": flags, "n": n, "m": m,
+            "metadata_len": metadata_len}
+
+
+def read_binary_header(path: str) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """
+    只读取 .cobin 文件的固定头部和元数据
+    
+    Returns:
+        (fields, metadata): 固定头部字段（version, kind, flags, n, m）和元数据
+    """
+    with open(path, "rb") as f:
+        fields = _unpack_binary_header(f.read(BINARY_HEADER.size), path)
+        metadata = json.loads(f.read(fields.pop("metadata_len")).decode("utf-8"))
+    return fields, metadata
+
+
+def read_binary_instance(path: str) -> Union[GraphInstance, NPPInstance]:
+    """
+    通过mmap读取 .cobin 文件，数组直接引用映射内存（只读，零拷贝）
+    
+    Args:
+        path: .cobin 文件路径
+        
+    Returns:
+        GraphInstance 或 NPPInstance 对象
+    """
+    if np is None:
+        raise ImportError("NumPy 未安装，无法读取二进制实例文件")
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        fields = _unpack_binary_header(mm[:BINARY_HEADER.size], path)
+        start = BINARY_HEADER.size
+        metadata = json.loads(mm[start:start + fields["metadata_len"]].decode("utf-8"))
+    except ValueError:
+        mm.close()
+        raise
+    
+    arrays = {}
+    for key, spec in metadata["arrays"].items():
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[key] = np.frombuffer(mm, dtype=np.dtype(spec["dtype"]), count=count,
+                                    offset=spec["offset"]).reshape(spec["shape"])
+    
+    if fields["kind"] == BINARY_KIND_GRAPH:
+        graph = GraphInstance(
+            name=metadata["name"],
+            n=fields["n"],
+            m=fields["m"],
+            edges=None,
+            meta=metadata["meta"],
+            edge_array=EdgeArrays(arrays["u"], arrays["v"], arrays["w"])
+        )
+        if fields["flags"] & BINARY_FLAG_CSR:
+            graph._csr = CSRGraph(arrays["indptr"], arrays["indices"], arrays["weights"])
+        return _attach_dense(graph)
+    if fields["kind"] == BINARY_KIND_NPP:
+        if fields["flags"] & BINARY_FLAG_BIGINT:
+            negative = arrays["negative"].view(np.bool_) if fields["flags"] & BINARY_FLAG_SIGNED else None
+            values = _import_limb_array().LimbArray(arrays["limbs"], negative)
+        else:
+            values = arrays["values"]
+        return NPPInstance(
+            name=metadata["name"],
+            n=fields["n"],
+            values=None,
+            meta=metadata["meta"],
+            value_array=values
+        )
+    raise ValueError(f"未知的问题类别: {fields['kind']}")
+
+
+def load_instance(path: str, stats: Optional[LoadStats] = None) -> Union[GraphInstance, NPPInstance]:
     """
     主要的调度函数，根据文件类型自动选择加载器
     
     Args:
         path: 数据文件路径
+        stats: 分阶段统计对象，None 表示不统计（设置了全局钩子时自动创建）
         
     Returns:
         GraphInstance 或 NPPInstance 对象
@@ -265,48 +1772,328 @@ def load_instance(path: str) -> Union[GraphInstance, NPPInstance]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"文件不存在: {path}")
     
-    # 首先尝试读取头部信息确定问题类型
-    try:
-        with _open_file(path) as f:
-            raw = f.read()
-        meta = parse_header(raw)
-        problem_type = meta.get("problem", "").lower()
-        
-        if "graph" in problem_type:
-            return load_graph_txt(path)
-        elif "number" in problem_type:
-            return load_npp_txt(path)
-    except Exception as e:
-        logger.warning(f"无法通过头部信息确定文件类型: {e}")
+    stats = _load_stats.resolve(stats)
+    with _load_stats.measure(stats, path):
+        memory_cache = _memory_cache
+        if memory_cache is not None:
+            with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+                key = InstanceCache.key(path)
+                cached = memory_cache.get(key)
+            if cached is not None:
+                if stats is not None:
+                    stats.cache = "memory"
+                    stats.kind = "graph" if isinstance(cached, GraphInstance) else "npp"
+                return cached
+        
+        instance = _load_instance_from_disk(path, stats)
+        if memory_cache is not None:
+            with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+                instance = memory_cache.put(key, instance)
+        return instance
+
+
+def _load_instance_from_disk(path: str,
+                             stats: Optional[LoadStats] = None) -> Union[GraphInstance, NPPInstance]:
+    """经过二进制缓存（如已启用）加载实例，.cobin 文件直接映射读取"""
+    if is_binary_file(path):
+        with _load_stats.stage(stats, _load_stats.STAGE_MMAP):
+            instance = read_binary_instance(path)
+        if stats is not None:
+            stats.kind = "graph" if isinstance(instance, GraphInstance) else "npp"
+        return instance
+    
+    use_cache = _get_sidecar_cache() is not None
+    if use_cache:
+        # 二进制缓存只保存图数据：先读头部确认类型，数值划分文件不计算内容哈希
+        with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+            use_cache = "graph" in probe_header(path).problem.lower()
+    if use_cache:
+        cached = _load_cached_graph(path, stats)
+        if cached is not None:
+            return cached
+    
+    instance = _load_instance_uncached(path, stats)
+    if use_cache and isinstance(instance, GraphInstance):
+        with _load_stats.stage(stats, _load_stats.STAGE_CACHE):
+            _store_cached_graph(path, instance)
+    return instance
+
+
+def _load_instance_uncached(path: str,
+                            stats: Optional[LoadStats] = None) -> Union[GraphInstance, NPPInstance]:
+    """解析数据文件，不经过二进制缓存"""
+    return _parse_instance(lambda: _open_instrumented(path, stats), path, stats)
+
+
+def parse_instance_bytes(data: bytes, source: str = "<bytes>",
+                         stats: Optional[LoadStats] = None) -> Union[GraphInstance, NPPInstance]:
+    """
+    解析内存中的实例文本（已解压），用于打包文件等不对应单个数据文件的场景
+    
+    Args:
+        data: 实例文件的完整文本内容
+        source: 用于日志和缺省实例名的来源描述
+        stats: 分阶段统计对象
+    """
+    return _parse_instance(lambda: io.BytesIO(data), source, stats)
+
+
+def _parse_instance(open_stream: Callable[[], io.BufferedIOBase], path: str,
+                    stats: Optional[LoadStats]) -> Union[GraphInstance, NPPInstance]:
+    # 单次流式读取：先读头部确定问题类型，再把同一个流交给对应的解析器
+    with open_stream() as f:
+        meta, first_line = _read_header_instrumented(f, stats)
+        parser, by_header = _select_parser(meta, first_line)
+        try:
+            return parser(f, meta, first_line, path, stats=stats)
+        except Exception as e:
+            if by_header:
+                raise
+            logger.warning(f"按内容推断的格式解析失败，尝试另一种格式: {e}")
+    
+    # 仅在按内容推断失败时才重新打开文件
+    fallback = _parse_npp if parser is _parse_graph else _parse_graph
+    with open_stream() as f:
+        meta, first_line = _read_header_instrumented(f, stats)
+        return fallback(f, meta, first_line, path, stats=stats)
+
+
+def _select_parser(meta: Header, first_line: Optional[str]):
+    """
+    根据头部信息或第一个有效数据行选择解析函数
+    
+    Returns:
+        (parser, by_header): 解析函数，以及是否由头部的problem字段确定
+    """
+    problem_type = meta.get("problem", "").lower()
+    if "graph" in problem_type:
+        return _parse_graph, True
+    if "number" in problem_type:
+        return _parse_npp, True
     
     # 如果头部信息不足，尝试通过内容判断
+    parts = first_line.split() if first_line else []
+    # 如果有两个或更多数字，可能是图数据 (n m)
+    if len(parts) >= 2 and all(p.isdigit() for p in parts[:2]):
+        return _parse_graph, False
+    # 可能是数值划分数据
+    return _parse_npp, False
+
+
+@dataclass
+class HeaderInfo:
+    """数据文件的头部摘要信息（不读取数据主体）"""
+    path: str
+    problem: str
+    name: str
+    n: Optional[int]
+    m: Optional[int]
+    k: Optional[int]
+    meta: Header
+
+
+def _header_int(meta: Header, key: str) -> Optional[int]:
     try:
-        with _open_file(path) as f:
-            # 跳过注释行，找到第一个有效行
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                    
-                parts = line.split()
-                # 如果有两个或更多数字，可能是图数据 (n m)
-                if len(parts) >= 2 and all(p.isdigit() for p in parts[:2]):
-                    try:
-                        # 尝试作为图数据加载
-                        return load_graph_txt(path)
-                    except:
-                        # 如果失败，尝试作为数值划分数据加载
-                        return load_npp_txt(path)
-                else:
-                    # 可能是数值划分数据
-                    try:
-                        return load_npp_txt(path)
-                    except:
-                        return load_graph_txt(path)
-                        
-    except Exception as e:
-        logger.error(f"无法加载文件 {path}: {e}")
-        raise
+        return int(meta[key])
+    except (KeyError, ValueError):
+        return None
+
+
+def probe_header(path: str) -> HeaderInfo:
+    """
+    只解压到第一个有效数据行，读取文件的头部信息
+    
+    n、m 优先取自 "# key: value" 头部，缺失时使用第一个有效数据行
+    （图为 "n m"，数值划分为 "n"）。问题类型缺失时按第一个有效数据行推断。
+    
+    Args:
+        path: 数据文件路径
+        
+    Returns:
+        HeaderInfo: 头部摘要信息
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"文件不存在: {path}")
+    if is_binary_file(path):
+        return _probe_binary_header(path)
+    
+    with _open_binary(path) as f:
+        meta, first_line = _read_header_block(f)
+    
+    parser, _ = _select_parser(meta, first_line)
+    is_graph = parser is _parse_graph
+    problem = meta.get("problem") or ("graph" if is_graph else "number_partitioning")
+    
+    n = _header_int(meta, "n")
+    m = _header_int(meta, "m") if is_graph else None
+    parts = first_line.split() if first_line else []
+    try:
+        if n is None and parts:
+            n = int(parts[0])
+        if is_graph and m is None and len(parts) >= 2:
+            m = int(parts[1])
+    except ValueError:
+        pass
+    
+    return HeaderInfo(
+        path=path,
+        problem=problem,
+        name=meta.get("name", os.path.basename(path)),
+        n=n,
+        m=m,
+        k=_header_int(meta, "k"),
+        meta=meta
+    )
+
+
+def _probe_binary_header(path: str) -> HeaderInfo:
+    fields, metadata = read_binary_header(path)
+    meta = metadata["meta"]
+    is_graph = fields["kind"] == BINARY_KIND_GRAPH
+    return HeaderInfo(
+        path=path,
+        problem=meta.get("problem") or ("graph" if is_graph else "number_partitioning"),
+        name=metadata["name"],
+        n=fields["n"],
+        m=fields["m"] if is_graph else None,
+        k=_header_int(meta, "k"),
+        meta=meta
+    )
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _xz_uncompressed_size(path: str) -> int:
+    """从xz文件尾部的流索引读取解压后大小，不解压数据（支持多个流和流填充）"""
+    total = 0
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            f.seek(end - 4)
+            if f.read(4) == b"\0\0\0\0":
+                end -= 4
+                continue
+            f.seek(end - 12)
+            footer = f.read(12)
+            if len(footer) != 12 or footer[10:12] != b"YZ":
+                raise ValueError(f"无效的xz文件尾部: {path}")
+            index_size = (int.from_bytes(footer[4:8], 'little') + 1) * 4
+            f.seek(end - 12 - index_size)
+            index = f.read(index_size)
+            if not index or index[0] != 0:
+                raise ValueError(f"无效的xz索引: {path}")
+            count, pos = _read_varint(index, 1)
+            blocks = 0
+            for _ in range(count):
+                unpadded, pos = _read_varint(index, pos)
+                size, pos = _read_varint(index, pos)
+                blocks += (unpadded + 3) // 4 * 4
+                total += size
+            end -= 12 + index_size + blocks + 12
+    if end < 0:
+        raise ValueError(f"无效的xz流: {path}")
+    return total
+
+
+def uncompressed_size(path: str) -> int:
+    """
+    返回数据文件解压后的字节数
+    
+    gzip取文件尾部的ISIZE字段（模 2^32），tar封装的xz取tar成员头部记录的大小，
+    其他xz文件和分卷目录读取xz流索引，都不需要解压数据主体。
+    
+    Args:
+        path: 数据文件路径或分卷目录
+        
+    Returns:
+        int: 解压后的字节数
+    """
+    if is_parts_dir(path):
+        parts = part_files(path)
+        for part in parts:
+            _check_lfs_pointer(part)
+        return sum(_xz_uncompressed_size(part) for part in parts)
+    if path.endswith('.gz'):
+        _check_lfs_pointer(path)
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), 'little')
+    if path.endswith('.xz'):
+        _check_lfs_pointer(path)
+        with _XzTarStream(path) as stream:
+            if stream.member_size is not None:
+                return stream.member_size
+        return _xz_uncompressed_size(path)
+    return os.path.getsize(path)
+
+
+def estimate_instance_nbytes(path: str) -> int:
+    """
+    不加载数据主体，估算 load_instance 结果占用的内存字节数（与 instance_nbytes 口径一致）
+    
+    图按每条边 24 字节（int64 的端点和权重）计；数值划分按解压后的平均数字位数估算，
+    int64 范围内每个数 8 字节，超出时按Python整数对象的大小计；二进制文件直接取文件大小。
+    估算值偏保守，适合作为内存预算。
+    
+    Args:
+        path: 数据文件路径或分卷目录
+        
+    Returns:
+        int: 估算的字节数
+    """
+    if is_binary_file(path):
+        return os.path.getsize(path)
+    info = probe_header(path)
+    size = uncompressed_size(path)
+    if "graph" in info.problem.lower():
+        # 缺少边数时按每条边至少约8个字符（"u v w\n"）估算
+        m = info.m if info.m is not None else size // 8
+        return 24 * m
+    n = info.n or 1
+    # 每个十进制位约 log2(10) ≈ 3.33 位
+    bits = size * 10 // 3 // n
+    if bits < 64:
+        return 8 * n
+    # Python整数每30位占4字节，另有约28字节对象头和列表中的8字节指针
+    return n * (36 + 4 * -(-bits // 30))
+
+
+DATA_SUFFIXES = ('.txt', '.gz', '.xz', BINARY_SUFFIX)
+SIZE_TIERS = ('tiny', 'small', 'medium', 'large', 'xlarge')
+
+
+def find_data_files(root: str = "processed/") -> List[str]:
+    """
+    查找目录下按规模分类存放的所有数据文件
+    
+    只收集 <问题>/compressed/<规模>/ 目录中的文件和 .parts 分卷目录，
+    跳过压缩报告等说明文件。
+    
+    Args:
+        root: 数据根目录
+        
+    Returns:
+        List[str]: 排序后的数据文件路径列表
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if os.path.basename(dirpath) not in SIZE_TIERS:
+            continue
+        names = [name for name in filenames if name.endswith(DATA_SUFFIXES)]
+        names += [name for name in dirnames if name.endswith(PARTS_SUFFIX)]
+        for name in sorted(names):
+            files.append(os.path.join(dirpath, name))
+    return files
 
 
 def load_dataset_split(split_file: str) -> List[str]:
@@ -343,12 +2130,121 @@ def create_dataset_split(data_files: List[str], output_file: str,
             f.write(f"{rel_path}\n")
 
 
-def batch_load_instances(file_paths: List[str]) -> List[Union[GraphInstance, NPPInstance]]:
+def _export_shared(arrays: Dict[str, "np.ndarray"]) -> Dict[str, Tuple[str, str, Tuple[int, ...]]]:
+    """把数组复制到共享内存块，返回 {数组名: (共享内存名, dtype, shape)}"""
+    from multiprocessing import shared_memory
+    
+    exported = {}
+    for key, arr in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        try:
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            exported[key] = (shm.name, arr.dtype.str, arr.shape)
+        finally:
+            shm.close()
+    return exported
+
+
+def _import_shared(exported: Dict[str, Tuple[str, str, Tuple[int, ...]]]) -> Dict[str, "np.ndarray"]:
+    """从共享内存块复制出数组，并释放共享内存"""
+    from multiprocessing import shared_memory
+    
+    arrays = {}
+    for key, (shm_name, dtype, shape) in exported.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    return arrays
+
+
+def _batch_load_worker(path: str, stats: Optional[LoadStats] = None):
+    """
+    进程池工作函数：加载实例，并通过共享内存返回边数组或数值数组
+    
+    Returns:
+        ("ok", 类型, 描述信息, 共享数组) / ("pickled", 实例) / ("error", 错误信息)
+    """
+    try:
+        instance = load_instance(path, stats=stats)
+    except Exception as e:
+        return "error", str(e)
+    
+    if isinstance(instance, GraphInstance) and "edge_array" in instance.__dict__:
+        edges = instance.edge_array
+        info = {"name": instance.name, "n": instance.n, "m": instance.m, "meta": instance.meta}
+        arrays = {"u": edges.u, "v": edges.v, "w": edges.w}
+        if instance._dense is not None:
+            info["dense_n"] = instance._dense.n
+            arrays["dense"] = instance._dense.bits
+        return "ok", "graph", info, _export_shared(arrays)
+    if isinstance(instance, NPPInstance) and np is not None:
+        values = instance.value_array
+        info = {"name": instance.name, "n": instance.n, "meta": instance.meta}
+        if isinstance(values, np.ndarray):
+            return "ok", "npp", info, _export_shared({"values": values})
+        arrays = {"limbs": values.limbs}
+        if values.negative is not None:
+            arrays["negative"] = values.negative
+        return "ok", "npp", info, _export_shared(arrays)
+    return "pickled", instance
+
+
+def _init_batch_worker():
+    """工作进程初始化：清除从主进程继承的统计钩子，统计改为随结果传回主进程"""
+    set_stats_hook(None)
+
+
+def _batch_load_worker_with_stats(path: str, trace_memory: bool = False):
+    """收集分阶段统计的工作函数，返回 (_batch_load_worker 的结果, LoadStats)"""
+    stats = LoadStats(trace_memory=trace_memory)
+    return _batch_load_worker(path, stats), stats
+
+
+def _rebuild_from_shared(kind: str, info: Dict[str, Any],
+                         exported: Dict[str, Tuple[str, str, Tuple[int, ...]]]):
+    """根据工作进程返回的描述信息和共享数组重建实例"""
+    arrays = _import_shared(exported)
+    if kind == "graph":
+        graph = GraphInstance(
+            name=info["name"],
+            n=info["n"],
+            m=info["m"],
+            edges=None,
+            meta=info["meta"],
+            edge_array=EdgeArrays(arrays["u"], arrays["v"], arrays["w"])
+        )
+        if "dense" in arrays:
+            graph._dense = _import_dense_adjacency().DenseAdjacency(arrays["dense"], info["dense_n"])
+        return graph
+    if "limbs" in arrays:
+        values = _import_limb_array().LimbArray(arrays["limbs"], arrays.get("negative"))
+    else:
+        values = arrays["values"]
+    return NPPInstance(
+        name=info["name"],
+        n=info["n"],
+        values=None,
+        meta=info["meta"],
+        value_array=values
+    )
+
+
+def batch_load_instances(file_paths: List[str],
+                         workers: Optional[int] = 1) -> List[Union[GraphInstance, NPPInstance]]:
     """
     批量加载数据实例
     
+    workers 大于1时使用进程池并行解压和解析，工作进程通过
+    multiprocessing.shared_memory 传回边数组/数值数组，避免序列化大量元组。
+    返回结果保持输入顺序。设置了全局统计钩子（collect_stats / set_stats_hook）时，
+    工作进程的分阶段统计会传回主进程并交给钩子汇总。
+    
     Args:
         file_paths: 数据文件路径列表
+        workers: 工作进程数，1 表示在当前进程顺序加载，None 表示使用全部CPU
         
     Returns:
         List[Union[GraphInstance, NPPInstance]]: 数据实例列表
@@ -356,13 +2252,51 @@ def batch_load_instances(file_paths: List[str]) -> List[Union[GraphInstance, NPP
     instances = []
     failed_files = []
     
-    for path in file_paths:
-        try:
-            instance = load_instance(path)
-            instances.append(instance)
-        except Exception as e:
-            logger.error(f"加载文件失败 {path}: {e}")
-            failed_files.append((path, str(e)))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(file_paths))
+    
+    if workers <= 1 or np is None:
+        for path in file_paths:
+            try:
+                instance = load_instance(path)
+                instances.append(instance)
+            except Exception as e:
+                logger.error(f"加载文件失败 {path}: {e}")
+                failed_files.append((path, str(e)))
+    else:
+        import multiprocessing as mp
+        from multiprocessing import resource_tracker
+        
+        # 先启动资源跟踪进程，使工作进程创建的共享内存由同一个跟踪进程管理，
+        # 主进程释放后不会被重复清理，主进程异常退出时也能被回收
+        resource_tracker.ensure_running()
+        logger.info(f"使用 {workers} 个进程并行加载 {len(file_paths)} 个文件")
+        # 设置了统计钩子时，工作进程各自统计，随结果传回主进程后交给钩子
+        hook = _load_stats.get_stats_hook()
+        if hook is not None:
+            worker = functools.partial(_batch_load_worker_with_stats,
+                                       trace_memory=getattr(hook, "trace_memory", False))
+        else:
+            worker = _batch_load_worker
+        with mp.Pool(workers, initializer=_init_batch_worker) as pool:
+            # imap 按输入顺序返回结果
+            for path, result in zip(file_paths, pool.imap(worker, file_paths)):
+                if hook is not None:
+                    result, stats = result
+                    if result[0] != "error":
+                        hook(stats)
+                status = result[0]
+                try:
+                    if status == "error":
+                        raise RuntimeError(result[1])
+                    if status == "pickled":
+                        instances.append(result[1])
+                    else:
+                        instances.append(_rebuild_from_shared(*result[1:]))
+                except Exception as e:
+                    logger.error(f"加载文件失败 {path}: {e}")
+                    failed_files.append((path, str(e)))
     
     if failed_files:
         logger.warning(f"共有 {len(failed_files)} 个文件加载失败")
@@ -371,12 +2305,13 @@ def batch_load_instances(file_paths: List[str]) -> List[Union[GraphInstance, NPP
 
 
 if __name__ == "__main__":
-    import sys
     import argparse
     
     parser = argparse.ArgumentParser(description="统一数据加载器")
     parser.add_argument("file_path", help="数据文件路径")
     parser.add_argument("--verbose", "-v", action="store_true", help="详细输出")
+    parser.add_argument("--stats", action="store_true", help="输出分阶段加载统计")
+    parser.add_argument("--trace-memory", action="store_true", help="统计各阶段内存峰值（较慢）")
     
     args = parser.parse_args()
     
@@ -384,7 +2319,8 @@ if __name__ == "__main__":
         logging.getLogger().setLevel(logging.DEBUG)
     
     try:
-        instance = load_instance(args.file_path)
+        stats = LoadStats(trace_memory=args.trace_memory) if args.stats or args.trace_memory else None
+        instance = load_instance(args.file_path, stats=stats)
         
         if isinstance(instance, GraphInstance):
             print(f"图: {instance.name}")
@@ -394,6 +2330,9 @@ if __name__ == "__main__":
             print(f"数值划分: {instance.name}")
             print(f"数字个数: {instance.n}")
             print(f"前10个数字: {instance.values[:10]}")
+        
+        if stats is not None:
+            print(stats.format())
             
     except Exception as e:
         logger.error(f"加载失败: {e}")
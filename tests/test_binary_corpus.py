@@ -0,0 +1,156 @@
+"""binary_corpus 的往返测试：.cobin 文件与文本加载结果语义一致"""
+
+import numpy as np
+import pytest
+
+import binary_corpus
+import unified_loader
+from binary_corpus import _convert_streaming, convert_file, verify_roundtrip, write_instance
+from limb_array import LimbArray
+from unified_loader import (BINARY_FLAG_CSR, BINARY_FLAG_SIGNED, BINARY_FLAG_SORTED, load_instance,
+                            read_binary_header)
+
+# 含重复边和反向边，检验去重后的边集合与权重
+GRAPH_TEXT = (
+    "# problem: graph_partitioning\n"
+    "# name: square\n"
+    "# n: 5\n"
+    "# m: 6\n"
+    "5 6\n"
+    "1 2 3\n"
+    "2 3 1\n"
+    "3 4 2\n"
+    "4 1 5\n"
+    "2 1 3\n"
+    "1 5 7\n"
+)
+NPP_INT64_TEXT = (
+    "# problem: number_partitioning\n"
+    "# name: small\n"
+    "# n: 5\n"
+    "\n"
+    "5\n"
+    "9\n"
+    "123456789012345678\n"
+    "0\n"
+    "42\n"
+    "7\n"
+)
+NPP_BIGINT_TEXT = (
+    "# problem: number_partitioning\n"
+    "# name: big\n"
+    "# n: 4\n"
+    "\n"
+    "4\n"
+    "1234567890123456789012345678901234567890\n"
+    "18446744073709551616\n"
+    "3\n"
+    "99999999999999999999999999\n"
+)
+NPP_NEGATIVE_BIGINT_TEXT = (
+    "# problem: number_partitioning\n"
+    "# name: signed\n"
+    "# n: 3\n"
+    "\n"
+    "3\n"
+    "-1234567890123456789012345678901234567890\n"
+    "5\n"
+    "18446744073709551616\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def no_caches(monkeypatch):
+    monkeypatch.setattr(unified_loader, "_memory_cache", None)
+    monkeypatch.setattr(unified_loader, "_sidecar_cache", None)
+    monkeypatch.setattr(unified_loader, "_sidecar_cache_configured", True)
+
+
+def _write_text(tmp_path, text):
+    src = tmp_path / "inst.txt"
+    src.write_text(text, encoding="utf-8")
+    return str(src), str(tmp_path / "inst.cobin")
+
+
+def _edge_set(graph):
+    edges = graph.edge_array
+    return sorted(zip(edges.u.tolist(), edges.v.tolist(), edges.w.tolist()))
+
+
+def _assert_same_graph(expected, actual):
+    assert (actual.name, actual.n, actual.m, actual.meta) == (expected.name, expected.n, expected.m,
+                                                              expected.meta)
+    assert _edge_set(actual) == _edge_set(expected)
+    for name in ("indptr", "indices", "weights"):
+        assert np.array_equal(getattr(actual.csr, name), getattr(expected.csr, name))
+
+
+def test_graph_roundtrip_with_csr(tmp_path):
+    src, dst = _write_text(tmp_path, GRAPH_TEXT)
+    expected = load_instance(src)
+    write_instance(dst, expected, include_csr=True)
+
+    actual = load_instance(dst)
+
+    fields, _ = read_binary_header(dst)
+    assert fields["flags"] & BINARY_FLAG_CSR
+    assert actual._csr is not None
+    _assert_same_graph(expected, actual)
+    assert verify_roundtrip(src, dst) == []
+
+
+def test_graph_roundtrip_streaming(tmp_path, monkeypatch):
+    src, dst = _write_text(tmp_path, GRAPH_TEXT)
+    _convert_streaming(src, dst, spill_dir=str(tmp_path))
+    expected = load_instance(src)
+
+    actual = load_instance(dst)
+
+    fields, _ = read_binary_header(dst)
+    assert not fields["flags"] & BINARY_FLAG_CSR
+    assert fields["flags"] & BINARY_FLAG_SORTED
+    assert actual._csr is None
+    _assert_same_graph(expected, actual)
+
+    # 流式转换的文件按块校验，不加载整个文本实例
+    def no_full_load(path):
+        raise AssertionError(f"verify_roundtrip 加载了整个实例: {path}")
+
+    monkeypatch.setattr(binary_corpus, "load_instance", no_full_load)
+    assert verify_roundtrip(src, dst, spill_dir=str(tmp_path)) == []
+
+
+def test_streaming_verify_reports_edge_mismatch(tmp_path):
+    src, dst = _write_text(tmp_path, GRAPH_TEXT)
+    _convert_streaming(src, dst)
+    with open(src, "a", encoding="utf-8") as f:
+        f.write("3 5 9\n")
+
+    problems = verify_roundtrip(src, dst)
+    assert len(problems) == 1 and problems[0].startswith("边数不同")
+
+
+def test_convert_file_uses_streaming_above_memory_limit(tmp_path):
+    src, dst = _write_text(tmp_path, GRAPH_TEXT)
+    assert convert_file(src, dst, max_memory_mb=0) == "streaming"
+    assert verify_roundtrip(src, dst) == []
+
+
+@pytest.mark.parametrize("text, array_type, signed", [
+    (NPP_INT64_TEXT, np.ndarray, False),
+    (NPP_BIGINT_TEXT, LimbArray, False),
+    (NPP_NEGATIVE_BIGINT_TEXT, LimbArray, True),
+], ids=["int64", "bigint", "negative-bigint"])
+def test_npp_roundtrip(tmp_path, text, array_type, signed):
+    src, dst = _write_text(tmp_path, text)
+    expected = load_instance(src)
+    assert convert_file(src, dst) == "memory"
+
+    actual = load_instance(dst)
+
+    assert (actual.name, actual.n, actual.meta) == (expected.name, expected.n, expected.meta)
+    assert actual.values == expected.values
+    assert isinstance(actual.value_array, array_type)
+    fields, _ = read_binary_header(dst)
+    assert bool(fields["flags"] & BINARY_FLAG_SIGNED) == signed
+    assert verify_roundtrip(src, dst) == []
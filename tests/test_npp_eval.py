@@ -0,0 +1,48 @@
+"""npp_eval 的评估测试：与逐个求和的结果一致，包括负数和大整数"""
+
+import numpy as np
+import pytest
+
+from npp_eval import NPPEvaluator, largest_differencing
+from unified_loader import NPPInstance
+
+
+def _instance(values):
+    return NPPInstance(name="t", n=len(values), values=list(values), meta={})
+
+
+def _expected_sums(values, assignments, k):
+    return [[sum(v for v, p in zip(values, row) if p == part) for part in range(k)]
+            for row in assignments]
+
+
+@pytest.mark.parametrize("values, bigint", [
+    ([5, 3, 9, 1, 7, 2], False),
+    ([-4, 3, 9, -1, 7, 0], False),
+    ([2 ** 100 + 1, 3, 2 ** 70, 5, 2 ** 65, 11], True),
+    ([-1234567890123456789012345678901234567890, 5, 2 ** 64, -3, 7, 2 ** 80], True),
+], ids=["int64", "int64-negative", "bigint", "bigint-negative"])
+@pytest.mark.parametrize("k", [2, 3])
+def test_part_sums_match_python(values, bigint, k):
+    rng = np.random.default_rng(0)
+    assignments = rng.integers(0, k, size=(8, len(values)))
+    evaluator = NPPEvaluator(_instance(values), k)
+
+    result = evaluator(assignments)
+
+    assert evaluator.bigint == bigint
+    expected = _expected_sums(values, assignments.tolist(), k)
+    assert result.part_sums.tolist() == expected
+    assert result.difference.tolist() == [max(s) - min(s) for s in expected]
+
+
+@pytest.mark.parametrize("k", [2, 3, 4])
+def test_largest_differencing_assignment_matches_part_sums(k):
+    rng = np.random.default_rng(1)
+    values = rng.integers(1, 10 ** 9, size=200).tolist()
+
+    result = largest_differencing(values, k)
+
+    sums = _expected_sums(values, [result.assignment.tolist()], k)[0]
+    assert result.part_sums == sums
+    assert result.difference == max(sums) - min(sums)
@@ -0,0 +1,24 @@
+import threading
+
+import prefetch
+from prefetch import InstancePrefetcher
+
+
+def test_max_bytes_reserves_budget_for_loads_in_flight(monkeypatch):
+    monkeypatch.setattr(prefetch, "estimate_instance_nbytes", lambda path: 100)
+    monkeypatch.setattr(prefetch, "instance_nbytes", lambda instance: 100)
+    started = []
+    release = threading.Event()
+
+    def loader(path):
+        started.append(path)
+        release.wait(timeout=5)
+        return path
+
+    paths = [f"inst{i}" for i in range(6)]
+    with InstancePrefetcher(paths, ahead=6, workers=6, max_bytes=250, loader=loader) as prefetcher:
+        prefetcher._fill()
+        # 两个加载中的实例已占用 200 字节预算，第三个会超出上限
+        assert len(prefetcher._pending) == 2
+        release.set()
+        assert list(prefetcher) == paths
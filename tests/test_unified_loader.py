@@ -0,0 +1,174 @@
+"""unified_loader 的单次解压加载测试"""
+
+import gzip
+import io
+import lzma
+import tarfile
+
+import pytest
+
+import unified_loader
+from unified_loader import GraphInstance, NPPInstance, load_instance
+
+GRAPH_TEXT = (
+    "# problem: graph_coloring\n"
+    "# name: tri\n"
+    "# n: 3\n"
+    "# m: 3\n"
+    "3 3\n"
+    "1 2 1\n"
+    "2 3 1\n"
+    "1 3 1\n"
+)
+NPP_TEXT = (
+    "# problem: number_partitioning\n"
+    "# name: nums\n"
+    "# n: 4\n"
+    "\n"
+    "4\n"
+    "3\n"
+    "1\n"
+    "1\n"
+    "2\n"
+)
+# 没有 "# problem:" 行，需要按第一个有效数据行推断格式
+SNIFF_GRAPH_TEXT = "# name: tri\n3 3\n1 2 1\n2 3 1\n1 3 1\n"
+SNIFF_NPP_TEXT = "# name: nums\n4\n3\n1\n1\n2\n"
+
+
+def _write_plain(path, text):
+    path.write_text(text, encoding="utf-8")
+
+
+def _write_gz(path, text):
+    with gzip.open(path, "wb") as f:
+        f.write(text.encode("utf-8"))
+
+
+def _write_xz(path, text):
+    with lzma.open(path, "wb") as f:
+        f.write(text.encode("utf-8"))
+
+
+def _write_tar_xz(path, text):
+    data = text.encode("utf-8")
+    info = tarfile.TarInfo(name=path.name[:-len(".xz")])
+    info.size = len(data)
+    with tarfile.open(path, "w:xz", format=tarfile.PAX_FORMAT) as tar:
+        tar.addfile(info, io.BytesIO(data))
+
+
+# (文件名, 写入函数)：tar 封装的 .xz 与数据集中的压缩文件格式相同
+FORMATS = [
+    ("inst.txt", _write_plain),
+    ("inst.txt.gz", _write_gz),
+    ("inst.txt.xz", _write_xz),
+    ("inst.txt.xz", _write_tar_xz),
+]
+
+
+@pytest.fixture
+def no_caches(monkeypatch):
+    """关闭两级缓存（通过 monkeypatch 设置，测试结束后恢复原状态）"""
+    monkeypatch.setattr(unified_loader, "_memory_cache", None)
+    monkeypatch.setattr(unified_loader, "_sidecar_cache", None)
+    monkeypatch.setattr(unified_loader, "_sidecar_cache_configured", True)
+
+
+@pytest.fixture
+def decompress_counter(monkeypatch, no_caches):
+    """
+    记录读取数据的解压流：gzip.open / lzma.open（_XzTarStream 内部使用）的每次调用，
+    以及 unified_loader 直接以二进制方式打开的未压缩文本文件；
+    解压流上的 seek（回退会重新解压）也记录下来
+    """
+    passes = []
+
+    def track(kind, opener):
+        def opened(path, mode="rb", *args, **kwargs):
+            f = opener(path, mode, *args, **kwargs)
+            if "r" in mode:
+                passes.append((kind, str(path)))
+                original_seek = f.seek
+
+                def seek(*seek_args):
+                    passes.append(("seek", str(path)))
+                    return original_seek(*seek_args)
+
+                f.seek = seek
+            return f
+        return opened
+
+    monkeypatch.setattr(gzip, "open", track("gzip", gzip.open))
+    monkeypatch.setattr(lzma, "open", track("xz", lzma.open))
+    monkeypatch.setattr(unified_loader, "open", track("raw", open), raising=False)
+    return passes
+
+
+@pytest.mark.parametrize("filename, writer", FORMATS, ids=["txt", "gz", "xz", "tar-xz"])
+@pytest.mark.parametrize("text, kind", [
+    (GRAPH_TEXT, GraphInstance),
+    (NPP_TEXT, NPPInstance),
+    (SNIFF_GRAPH_TEXT, GraphInstance),
+    (SNIFF_NPP_TEXT, NPPInstance),
+])
+def test_load_instance_decompresses_once(tmp_path, filename, writer, text, kind, request):
+    path = tmp_path / filename
+    writer(path, text)
+    passes = request.getfixturevalue("decompress_counter")
+
+    instance = load_instance(str(path))
+
+    assert isinstance(instance, kind)
+    if filename.endswith(".txt"):
+        assert passes == [("raw", str(path))]
+    else:
+        # 压缩文件另有一次读取开头几个字节的LFS指针检查，不经过解压
+        expected = "gzip" if filename.endswith(".gz") else "xz"
+        assert [p for p in passes if p[0] != "raw"] == [(expected, str(path))]
+    if kind is GraphInstance:
+        assert (instance.n, instance.m) == (3, 3)
+        assert sorted(instance.edges) == [(0, 1, 1), (0, 2, 1), (1, 2, 1)]
+    else:
+        assert instance.values == [3, 1, 1, 2]
+
+
+@pytest.mark.parametrize("writer, expected", [(_write_xz, False), (_write_tar_xz, True)],
+                         ids=["xz", "tar-xz"])
+def test_is_tar_xz(tmp_path, writer, expected):
+    path = tmp_path / "inst.txt.xz"
+    writer(path, GRAPH_TEXT)
+
+    assert unified_loader.is_tar_xz(str(path)) is expected
+
+
+def test_sidecar_cache_skips_npp_and_reuses_index(tmp_path, monkeypatch):
+    import graph_cache
+
+    monkeypatch.setattr(unified_loader, "_memory_cache", None)
+    cache = graph_cache.SidecarCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(unified_loader, "_sidecar_cache", cache)
+    monkeypatch.setattr(unified_loader, "_sidecar_cache_configured", True)
+    hashed = []
+    original_sha256 = graph_cache.file_sha256
+
+    def counting_sha256(path):
+        hashed.append(path)
+        return original_sha256(path)
+
+    monkeypatch.setattr(graph_cache, "file_sha256", counting_sha256)
+    npp_path, graph_path = tmp_path / "nums.txt", tmp_path / "tri.txt"
+    _write_plain(npp_path, NPP_TEXT)
+    _write_plain(graph_path, GRAPH_TEXT)
+
+    for _ in range(2):
+        assert load_instance(str(npp_path)).values == [3, 1, 1, 2]
+    assert hashed == []
+
+    load_instance(str(graph_path))
+    assert hashed == [str(graph_path)]
+    saves = []
+    monkeypatch.setattr(cache, "_save_index", saves.append)
+    instance = load_instance(str(graph_path))
+    assert sorted(instance.edges) == [(0, 1, 1), (0, 2, 1), (1, 2, 1)]
+    assert hashed == [str(graph_path)] and saves == []